@@ -0,0 +1,94 @@
+"""
+Benchmark memory and scrolling of MColumnarTableModel against MTableModel.
+Run with: python -m benchmarks.columnar_model_benchmark [row_count]
+"""
+
+# Import built-in modules
+import random
+import sys
+import time
+import tracemalloc
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.columnar_model import MColumnarTableModel
+from dayu_widgets.item_model import MTableModel
+
+
+HEADER_LIST = [
+    {"label": "Job", "key": "job", "searchable": True},
+    {"label": "Status", "key": "status", "color": lambda x, y: "#f00" if x == "error" else "#fff"},
+    {"label": "User", "key": "user"},
+    {"label": "Frames", "key": "frames"},
+    {"label": "Render Time", "key": "render_time", "display": lambda x, y: "{:.1f}s".format(x)},
+]
+STATUS_LIST = ["queued", "running", "done", "error"]
+USER_LIST = ["user_{}".format(i) for i in range(50)]
+
+
+def make_rows(row_count):
+    return [
+        {
+            "job": "job_{}".format(i),
+            "status": STATUS_LIST[i % 4],
+            "user": USER_LIST[i % 50],
+            "frames": i % 240,
+            "render_time": (i % 1000) * 0.5,
+        }
+        for i in range(row_count)
+    ]
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def scroll(model, screen_count=2000, screen_rows=40):
+    """Read every role a table view asks for, for random screens of rows."""
+    roles = [int(QtCore.Qt.DisplayRole), int(QtCore.Qt.ForegroundRole), int(QtCore.Qt.BackgroundRole)]
+    row_count = model.rowCount()
+    start_time = time.perf_counter()
+    for _ in range(screen_count):
+        first = random.randrange(0, row_count - screen_rows)
+        for row in range(first, first + screen_rows):
+            for column in range(len(HEADER_LIST)):
+                index = model.index(row, column)
+                for role in roles:
+                    model.data(index, role)
+    return screen_count / (time.perf_counter() - start_time)
+
+
+def main(row_count=1000000):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+
+    def build_table_model():
+        model = MTableModel()
+        model.set_header_list(HEADER_LIST)
+        model.set_data_list(make_rows(row_count))
+        return model
+
+    def build_columnar_model():
+        model = MColumnarTableModel()
+        model.set_header_list(HEADER_LIST)
+        model.set_data_list(make_rows(row_count))
+        return model
+
+    for name, build in (("MTableModel", build_table_model), ("MColumnarTableModel", build_columnar_model)):
+        model, size = measure_memory(build)
+        print(
+            "{:>20}: {:>8.1f} MB, {:>5.0f} bytes/row, {:>8.0f} screens/sec".format(
+                name, size / 1024.0 / 1024.0, float(size) / row_count, scroll(model)
+            )
+        )
+        del model
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,71 @@
+"""
+Benchmark the facets of MSortFilterModel on 500k rows: building the index,
+selecting values with the counts of every key, and appending rows.
+Run with: python -m benchmarks.facet_filter_benchmark
+"""
+
+# Import built-in modules
+import timeit
+
+# Import third-party modules
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name"},
+    {"label": "Status", "key": "status", "default_filter": True},
+    {"label": "Dept", "key": "dept", "default_filter": True},
+    {"label": "Artist", "key": "artist", "default_filter": True},
+]
+
+
+def main(row_count=500000, repeat=3):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    status_list = ("wip", "review", "approved", "omit")
+    dept_list = ("anim", "comp", "fx", "light", "layout")
+    data_list = [
+        {
+            "name": "shot_{:06d}".format(i),
+            "status": status_list[i % 4],
+            "dept": dept_list[i % 5],
+            "artist": "artist_{}".format(i % 40),
+        }
+        for i in range(row_count)
+    ]
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list(data_list)
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(HEADER_LIST)
+
+    seconds = timeit.timeit(proxy_model.get_facet_index, number=1)
+    print("build index of {} rows: {:>8.1f} ms".format(row_count, seconds * 1000))
+
+    def get_counts():
+        for data_dict in HEADER_LIST[1:]:
+            proxy_model.get_facet_counts(data_dict["key"])
+
+    def select():
+        proxy_model.set_facet_values("status", ["wip", "review"])
+        proxy_model.set_facet_values("dept", ["comp"])
+        proxy_model.rowCount()
+        get_counts()
+        proxy_model.set_facet_values("status", [])
+        proxy_model.set_facet_values("dept", [])
+        proxy_model.rowCount()
+
+    seconds = min(timeit.repeat(get_counts, number=10, repeat=repeat)) / 10
+    print("counts of all the keys: {:>8.1f} ms".format(seconds * 1000))
+    seconds = min(timeit.repeat(select, number=1, repeat=repeat)) / 4
+    print("select a value and re-filter: {:>8.1f} ms".format(seconds * 1000))
+    seconds = min(timeit.repeat(lambda: model.append({"name": "new", "status": "wip"}), number=100, repeat=1)) / 100
+    print("append one row: {:>8.3f} ms".format(seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
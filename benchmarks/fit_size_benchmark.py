@@ -0,0 +1,63 @@
+"""
+Benchmark the "Fit Size" of MTableView on 100k rows: ResizeToContents and resizeRowsToContents of Qt
+against MHeaderView.fit_sections measuring a sample of the rows, then its cached sizes.
+Run with: python -m benchmarks.fit_size_benchmark
+"""
+
+# Import built-in modules
+import time
+
+# Import third-party modules
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+from dayu_widgets.item_view import MTableView
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name"},
+    {"label": "Status", "key": "status"},
+    {"label": "Frames", "key": "frames"},
+    {"label": "Artist", "key": "artist"},
+]
+
+
+def _time(function):
+    start_time = time.perf_counter()
+    function()
+    return time.perf_counter() - start_time
+
+
+def main(row_count=100000):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list(
+        [
+            {"name": "shot_{:06d}".format(i), "status": "wip", "frames": i, "artist": "artist_{}".format(i % 50)}
+            for i in range(row_count)
+        ]
+    )
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(HEADER_LIST)
+    view = MTableView()
+    view.setModel(proxy_model)
+    view.set_header_list(HEADER_LIST)
+    view.resize(800, 600)
+    view.show()
+    app.processEvents()
+    header_view = view.header_view
+    seconds = _time(lambda: header_view.resizeSections(QtWidgets.QHeaderView.ResizeToContents))
+    print("{:>24}: {:>8.3f} s".format("qt columns", seconds))
+    print("{:>24}: {:>8.3f} s".format("sampled columns", _time(header_view.fit_sections)))
+    print("{:>24}: {:>8.3f} s".format("cached columns", _time(header_view.fit_sections)))
+    print("{:>24}: {:>8.3f} s".format("sampled rows", _time(view.verticalHeader().fit_sections)))
+    seconds = _time(lambda: QtWidgets.QTableView.resizeRowsToContents(view))
+    print("{:>24}: {:>8.3f} s".format("qt rows", seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark the fuzzy search of MSortFilterModel on 200k asset names: building the trigram index,
+querying it with typos, and the whole search including the filtering of the proxy.
+Run with: python -m benchmarks.fuzzy_search_benchmark
+"""
+
+# Import built-in modules
+import random
+import timeit
+
+# Import third-party modules
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name", "searchable": True},
+    {"label": "Step", "key": "step", "searchable": True},
+]
+WORD_LIST = ["dragon", "knight", "castle", "forest", "tree", "rock", "sword", "shield", "horse", "wolf", "tower"]
+
+
+def main(row_count=200000, repeat=3):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    random.seed(0)
+    data_list = [
+        {
+            "name": "{}_{}_{}{:03d}_v{:03d}".format(
+                random.choice(("chr", "prp", "env")),
+                random.choice(WORD_LIST),
+                random.choice(WORD_LIST),
+                random.randrange(1000),
+                random.randrange(1, 50),
+            ),
+            "step": random.choice(("mdl", "rig", "tex", "lgt", "anim")),
+        }
+        for _ in range(row_count)
+    ]
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list(data_list)
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(HEADER_LIST)
+    proxy_model.set_fuzzy_search(True)
+
+    seconds = timeit.timeit(proxy_model.get_trigram_index, number=1)
+    print("build index of {} rows: {:>8.1f} ms".format(row_count, seconds * 1000))
+    trigram_index = proxy_model.get_trigram_index()
+    for pattern in ("dargon rig", "chr_knigt_castel042", "towr", "shield wolf"):
+        seconds = min(
+            timeit.repeat(lambda pattern=pattern: trigram_index.search(pattern).ranked(50), number=1, repeat=repeat)
+        )
+        matches = trigram_index.search(pattern)
+
+        def search(pattern=pattern):
+            proxy_model.set_search_pattern(pattern)
+            proxy_model.rowCount()
+
+        total_seconds = min(timeit.repeat(search, number=1, repeat=repeat))
+        print(
+            "{:>20}: {:>6} matches, query + 50 best {:>6.1f} ms, with proxy filtering {:>8.1f} ms".format(
+                pattern, len(matches), seconds * 1000, total_seconds * 1000
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
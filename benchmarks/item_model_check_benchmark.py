@@ -0,0 +1,53 @@
+"""
+Benchmark the tristate check propagation of MTableModel on a 111k node tree.
+Run with: python -m benchmarks.item_model_check_benchmark
+"""
+
+# Import built-in modules
+import timeit
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MTableModel
+
+
+def make_tree(depth, width):
+    if depth == 0:
+        return None
+    return [{"name": "node", "children": make_tree(depth - 1, width)} for _ in range(width)]
+
+
+def walk(model, parent_index=QtCore.QModelIndex()):
+    """Create the index of every node, like a fully expanded view or a recursive filter does."""
+    for row in range(model.rowCount(parent_index)):
+        walk(model, model.index(row, 0, parent_index))
+
+
+def main(repeat=3):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    model = MTableModel()
+    model.set_header_list([{"label": "Name", "key": "name", "checkable": True}])
+    model.set_data_list([{"name": "root", "children": make_tree(5, 10)}])
+    root_index = model.index(0, 0)
+    leaf_index = root_index
+    for _ in range(5):
+        leaf_index = model.index(0, 0, leaf_index)
+
+    def toggle(index):
+        model.setData(index, QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+        model.setData(index, QtCore.Qt.Unchecked, QtCore.Qt.CheckStateRole)
+
+    for name in ("not exposed", "all exposed"):
+        if name == "all exposed":
+            walk(model)
+        seconds = min(timeit.repeat(lambda: toggle(root_index), number=1, repeat=repeat)) / 2
+        print("{:>12}: check root of 111111 nodes {:>8.1f} ms".format(name, seconds * 1000))
+    seconds = min(timeit.repeat(lambda: toggle(leaf_index), number=100, repeat=repeat)) / 200
+    print("{:>12}: check leaf at depth 6      {:>8.3f} ms".format("", seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark MTableModel.data(), the compiled role table against the old per call dispatch.
+Run with: python -m benchmarks.item_model_data_benchmark
+"""
+
+# Import built-in modules
+import timeit
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MTableModel
+from dayu_widgets.item_model import SETTING_MAP
+from dayu_widgets.utils import apply_formatter
+from dayu_widgets.utils import get_obj_value
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name", "searchable": True, "color": "#fff"},
+    {"label": "Age", "key": "age", "display": lambda x, y: "{} 岁".format(x)},
+    {"label": "Status", "key": "status", "alignment": "center", "bg_color": lambda x, y: "#f00" if x else "#0f0"},
+]
+ROLES = [
+    QtCore.Qt.DisplayRole,
+    QtCore.Qt.ForegroundRole,
+    QtCore.Qt.BackgroundRole,
+    QtCore.Qt.TextAlignmentRole,
+    QtCore.Qt.FontRole,
+    QtCore.Qt.DecorationRole,
+    QtCore.Qt.CheckStateRole,
+]
+
+
+def legacy_data(model, index, role=QtCore.Qt.DisplayRole):
+    """The MTableModel.data() implementation before the role table was compiled."""
+    if not index.isValid():
+        return None
+    attr_dict = model.header_list[index.column()]
+    data_obj = index.internalPointer()
+    attr = attr_dict.get("key")
+    if role in SETTING_MAP.keys():
+        formatter_from_config = attr_dict.get(SETTING_MAP[role].get("config"))
+        if not formatter_from_config and role not in [
+            QtCore.Qt.DisplayRole,
+            QtCore.Qt.EditRole,
+            QtCore.Qt.ToolTipRole,
+        ]:
+            return None
+        value = apply_formatter(formatter_from_config, get_obj_value(data_obj, attr), data_obj)
+        return apply_formatter(SETTING_MAP[role].get("formatter", None), value)
+    if role == QtCore.Qt.CheckStateRole and attr_dict.get("checkable", False):
+        state = get_obj_value(data_obj, attr + "_checked")
+        return QtCore.Qt.Unchecked if state is None else state
+    return None
+
+
+def main(row_count=2000, repeat=5):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list([{"name": "shot_{}".format(i), "age": i, "status": i % 2} for i in range(row_count)])
+    # view 传进来的 role 是 int
+    roles = [int(role) for role in ROLES]
+    index_list = [model.index(row, column) for row in range(row_count) for column in range(len(HEADER_LIST))]
+    call_count = len(index_list) * len(roles)
+
+    def run_compiled():
+        for index in index_list:
+            for role in roles:
+                model.data(index, role)
+
+    def run_legacy():
+        for index in index_list:
+            for role in roles:
+                legacy_data(model, index, role)
+
+    for name, func in (("legacy", run_legacy), ("compiled", run_compiled)):
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        print("{:>10}: {:>12,.0f} calls/sec".format(name, call_count / seconds))
+
+
+if __name__ == "__main__":
+    main()
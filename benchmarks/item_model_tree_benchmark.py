@@ -0,0 +1,99 @@
+"""
+Benchmark MTableModel.parent() on wide and deep trees, the node map against _parent and list.index.
+Run with: python -m benchmarks.item_model_tree_benchmark
+"""
+
+# Import built-in modules
+import timeit
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MTableModel
+from dayu_widgets.utils import get_obj_value
+from dayu_widgets.utils import set_obj_value
+
+
+class LegacyTableModel(MTableModel):
+    """MTableModel with the index()/parent() implementation before the node map."""
+
+    def index(self, row, column, parent_index=None):
+        if parent_index and parent_index.isValid():
+            parent_item = parent_index.internalPointer()
+        else:
+            parent_item = self.root_item
+        children_list = get_obj_value(parent_item, "children")
+        if children_list and len(children_list) > row:
+            child_item = children_list[row]
+            if child_item:
+                set_obj_value(child_item, "_parent", parent_item)
+                return self.createIndex(row, column, child_item)
+        return QtCore.QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent_item = get_obj_value(index.internalPointer(), "_parent")
+        if parent_item is None:
+            return QtCore.QModelIndex()
+        grand_item = get_obj_value(parent_item, "_parent")
+        if grand_item is None:
+            return QtCore.QModelIndex()
+        parent_list = get_obj_value(grand_item, "children")
+        return self.createIndex(parent_list.index(parent_item), 0, parent_item)
+
+
+def make_wide_tree(folder_count, child_count):
+    return [
+        {"name": "folder_{}".format(i), "children": [{"name": "file_{}".format(j)} for j in range(child_count)]}
+        for i in range(folder_count)
+    ]
+
+
+def make_deep_tree(depth, width):
+    """Every level has width siblings, the last one holds the next level."""
+    root_list = []
+    current = root_list
+    for level in range(depth):
+        level_list = [{"name": "node_{}_{}".format(level, i), "children": []} for i in range(width)]
+        current.extend(level_list)
+        current = level_list[-1]["children"]
+    return root_list
+
+
+def collect_leaf_indexes(model, parent_index=QtCore.QModelIndex()):
+    result = []
+    for row in range(model.rowCount(parent_index)):
+        index = model.index(row, 0, parent_index)
+        if model.rowCount(index):
+            result.extend(collect_leaf_indexes(model, index))
+        else:
+            result.append(index)
+    return result
+
+
+def main(repeat=3):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    header_list = [{"label": "Name", "key": "name"}]
+    for tree_name, data_list in (
+        ("wide 20000 x 2", make_wide_tree(20000, 2)),
+        ("deep 500 x 100", make_deep_tree(500, 100)),
+    ):
+        for model_name, model_class in (("legacy", LegacyTableModel), ("node map", MTableModel)):
+            model = model_class()
+            model.set_header_list(header_list)
+            model.set_data_list(data_list)
+            index_list = collect_leaf_indexes(model)
+
+            def run(model=model, index_list=index_list):
+                for index in index_list:
+                    model.parent(index)
+
+            seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+            print("{:>16} {:>8}: {:>12,.0f} parent() calls/sec".format(tree_name, model_name, len(index_list) / seconds))
+
+
+if __name__ == "__main__":
+    main()
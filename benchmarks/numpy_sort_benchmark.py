@@ -0,0 +1,54 @@
+"""
+Benchmark sorting 50k rows by a numeric column: MSortFilterModel comparing the cached sort keys
+against set_numpy_sort ranking the keys of a MTableModel or a MColumnarTableModel with NumPy.
+Both sort the proxy with lessThan, the ranks only make each comparison cheaper, most of the time is
+still spent by QSortFilterProxyModel calling lessThan.
+Run with: python -m benchmarks.numpy_sort_benchmark
+"""
+
+# Import built-in modules
+import random
+import time
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.columnar_model import MColumnarTableModel
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name"},
+    {"label": "Frames", "key": "frames", "sort_key": "numeric"},
+]
+
+
+def main(row_count=50000):
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    random.seed(0)
+    data_list = [{"name": "shot_{}".format(i), "frames": random.randrange(10000)} for i in range(row_count)]
+    for name, model_class, numpy_sort in (
+        ("sort keys", MTableModel, False),
+        ("numpy", MTableModel, True),
+        ("columnar", MColumnarTableModel, True),
+    ):
+        model = model_class()
+        model.set_header_list(HEADER_LIST)
+        model.set_data_list(data_list)
+        proxy_model = MSortFilterModel()
+        proxy_model.setSourceModel(model)
+        proxy_model.set_header_list(HEADER_LIST)
+        proxy_model.set_numpy_sort(numpy_sort)
+        proxy_model.rowCount()
+        for order in (QtCore.Qt.AscendingOrder, QtCore.Qt.DescendingOrder):
+            start_time = time.perf_counter()
+            proxy_model.sort(1, order)
+            proxy_model.rowCount()
+            print("{:>10}: {:>8.2f} s sorting {} rows".format(name, time.perf_counter() - start_time, row_count))
+
+
+if __name__ == "__main__":
+    main()
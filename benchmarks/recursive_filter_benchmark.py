@@ -0,0 +1,57 @@
+"""
+Benchmark searching a 290k nodes asset tree with MSortFilterModel: the recursive filtering of
+QSortFilterProxyModel against the subtree matches computed bottom-up once per pattern.
+Run with: python -m benchmarks.recursive_filter_benchmark
+"""
+
+# Import built-in modules
+import time
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+HEADER_LIST = [{"label": "Name", "key": "name", "searchable": True}]
+
+
+def make_tree(depth, width, prefix="asset"):
+    if depth == 0:
+        return [{"name": "{}_{}".format(prefix, i)} for i in range(width)]
+    return [
+        {"name": "{}_{}".format(prefix, i), "children": make_tree(depth - 1, width, "{}_{}".format(prefix, i))}
+        for i in range(width)
+    ]
+
+
+def main(depth=3, width=23):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    data_list = make_tree(depth, width)
+    pattern_list = ["asset_5_7_1_9", "asset_1_2", "asset_1"]
+    for name in ("qt recursive", "subtree matches"):
+        model = MTableModel()
+        model.set_header_list(HEADER_LIST)
+        model.set_data_list(data_list)
+        proxy_model = MSortFilterModel()
+        proxy_model.setSourceModel(model)
+        proxy_model.set_header_list(HEADER_LIST)
+        if name == "qt recursive":
+            proxy_model.recursive_filtering = False
+            QtCore.QSortFilterProxyModel.setRecursiveFilteringEnabled(proxy_model, True)
+        # 第一次搜索会建立文本索引
+        proxy_model.set_search_pattern("zzz")
+        proxy_model.rowCount()
+        for pattern in pattern_list:
+            start_time = time.perf_counter()
+            proxy_model.set_search_pattern(pattern)
+            proxy_model.rowCount()
+            seconds = time.perf_counter() - start_time
+            print("{:>16}: {:>8.2f} s searching {!r}".format(name, seconds, pattern))
+
+
+if __name__ == "__main__":
+    main()
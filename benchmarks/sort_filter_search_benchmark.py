@@ -0,0 +1,86 @@
+"""
+Benchmark MSortFilterModel.set_search_pattern on 50k rows, the search text index against
+calling data() and the formatters for every row on every search,
+and typing a search text one character at a time then deleting it.
+Run with: python -m benchmarks.sort_filter_search_benchmark
+"""
+
+# Import built-in modules
+import timeit
+
+# Import third-party modules
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+class LegacySortFilterModel(MSortFilterModel):
+    """MSortFilterModel with the filterAcceptsRow before the search text index."""
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.search_reg:
+            for index, data_dict in enumerate(self.header_list):
+                if data_dict.get("searchable", False):
+                    model_index = self.sourceModel().index(source_row, index, source_parent)
+                    value = self.sourceModel().data(model_index)
+                    if value is not None and self.search_reg.search(str(value)) is not None:
+                        break
+            else:
+                return False
+        for index, data_dict in enumerate(self.header_list):
+            model_index = self.sourceModel().index(source_row, index, source_parent)
+            value = self.sourceModel().data(model_index)
+            reg_exp = data_dict.get("reg", None)
+            if reg_exp and value is not None and not reg_exp.search(str(value)):
+                return False
+        return True
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name", "searchable": True},
+    {"label": "Status", "key": "status", "searchable": True, "display": lambda value, data_obj: value.title()},
+    {"label": "Frame", "key": "frame"},
+]
+
+
+def main(row_count=50000, repeat=3):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    data_list = [
+        {"name": "shot_{:06d}".format(i), "status": ("wip", "review", "approved")[i % 3], "frame": i}
+        for i in range(row_count)
+    ]
+    pattern_list = ["shot_0012", "review", "approved", "shot_1"]
+    typed_text = "shot_0012"
+    typing_list = [typed_text[:i] for i in range(1, len(typed_text) + 1)]
+    typing_list += list(reversed(typing_list[:-1]))
+    for name, proxy_class in (("legacy", LegacySortFilterModel), ("text index", MSortFilterModel)):
+        model = MTableModel()
+        model.set_header_list(HEADER_LIST)
+        model.set_data_list(data_list)
+        proxy_model = proxy_class()
+        proxy_model.setSourceModel(model)
+        proxy_model.set_header_list(HEADER_LIST)
+        # 第一次搜索会建立索引
+        proxy_model.set_search_pattern("shot")
+        proxy_model.rowCount()
+
+        def run(proxy_model=proxy_model):
+            for pattern in pattern_list:
+                proxy_model.set_search_pattern(pattern)
+                proxy_model.rowCount()
+
+        def type_text(proxy_model=proxy_model):
+            for pattern in typing_list:
+                proxy_model.set_search_pattern(pattern)
+                proxy_model.rowCount()
+
+        seconds = min(timeit.repeat(run, number=1, repeat=repeat)) / len(pattern_list)
+        print("{:>10}: {:>8.1f} ms per search of {} rows".format(name, seconds * 1000, row_count))
+        seconds = min(timeit.repeat(type_text, number=1, repeat=repeat)) / len(typing_list)
+        print("{:>10}: {:>8.1f} ms per keystroke typing and deleting {!r}".format(name, seconds * 1000, typed_text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark sorting 100k rows, QSortFilterProxyModel comparing data() on every comparison
+against MSortFilterModel comparing the cached sort keys.
+Run with: python -m benchmarks.sort_key_benchmark
+"""
+
+# Import built-in modules
+import random
+import timeit
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name", "display": lambda value, data_obj: value.upper()},
+    {"label": "Shot", "key": "name", "sort_key": "natural"},
+]
+
+
+def main(row_count=100000):
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa: F841
+    random.seed(0)
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list([{"name": "shot_{}".format(random.randrange(row_count * 10))} for _ in range(row_count)])
+    for name, proxy_class in (("data()", QtCore.QSortFilterProxyModel), ("sort keys", MSortFilterModel)):
+        proxy_model = proxy_class()
+        proxy_model.setSourceModel(model)
+        if proxy_class is MSortFilterModel:
+            proxy_model.set_header_list(HEADER_LIST)
+        proxy_model.rowCount()
+        seconds = timeit.timeit(lambda proxy_model=proxy_model: proxy_model.sort(0), number=1)
+        print("{:>10}: {:>8.2f} s sorting {} rows by display text".format(name, seconds, row_count))
+        if proxy_class is MSortFilterModel:
+            # 打乱顺序后再排序，key 已经缓存
+            proxy_model.sort(-1)
+            seconds = timeit.timeit(
+                lambda proxy_model=proxy_model: proxy_model.sort(0, QtCore.Qt.DescendingOrder), number=1
+            )
+            print("{:>10}: {:>8.2f} s sorting again with cached keys".format(name, seconds))
+            seconds = timeit.timeit(lambda proxy_model=proxy_model: proxy_model.sort(1), number=1)
+            print("{:>10}: {:>8.2f} s sorting by natural order".format(name, seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -32,8 +32,12 @@ from dayu_widgets.card import MMeta
 from dayu_widgets.carousel import MCarousel
 from dayu_widgets.check_box import MCheckBox
 from dayu_widgets.collapse import MCollapse
+from dayu_widgets.columnar_model import MColumnarTableModel
 from dayu_widgets.combo_box import MComboBox
+from dayu_widgets.data_loader import MDataLoader
 from dayu_widgets.divider import MDivider
+from dayu_widgets.facet_filter import MFacetFilter
+from dayu_widgets.facet_index import MFacetIndex
 from dayu_widgets.field_mixin import MFieldMixin
 from dayu_widgets.flow_layout import MFlowLayout
 from dayu_widgets.item_model import MSortFilterModel
@@ -53,6 +57,9 @@ from dayu_widgets.menu import MMenu
 from dayu_widgets.menu_tab_widget import MMenuTabWidget
 from dayu_widgets.message import MMessage
 from dayu_widgets.page import MPage
+from dayu_widgets.page_provider import MListPageProvider
+from dayu_widgets.page_provider import MPageLoader
+from dayu_widgets.page_provider import MSqlitePageProvider
 from dayu_widgets.progress_bar import MProgressBar
 from dayu_widgets.progress_circle import MProgressCircle
 from dayu_widgets.push_button import MPushButton
@@ -68,6 +75,7 @@ from dayu_widgets.tab_widget import MTabWidget
 from dayu_widgets.text_edit import MTextEdit
 from dayu_widgets.toast import MToast
 from dayu_widgets.tool_button import MToolButton
+from dayu_widgets.trigram_index import MTrigramIndex
 
 
 __all__ = [
@@ -91,8 +99,12 @@ __all__ = [
     "MCarousel",
     "MCheckBox",
     "MCollapse",
+    "MColumnarTableModel",
     "MComboBox",
+    "MDataLoader",
     "MDivider",
+    "MFacetFilter",
+    "MFacetIndex",
     "MFieldMixin",
     "MFlowLayout",
     "MSortFilterModel",
@@ -112,6 +124,9 @@ __all__ = [
     "MMenuTabWidget",
     "MMessage",
     "MPage",
+    "MListPageProvider",
+    "MPageLoader",
+    "MSqlitePageProvider",
     "MProgressBar",
     "MProgressCircle",
     "MPushButton",
@@ -127,4 +142,5 @@ __all__ = [
     "MTextEdit",
     "MToast",
     "MToolButton",
+    "MTrigramIndex",
 ]
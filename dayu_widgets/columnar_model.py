@@ -0,0 +1,461 @@
+"""
+MColumnarTableModel
+A table model keeping each column as a NumPy array, for tables with millions of rows.
+It uses the same header_list config as MTableModel.
+"""
+
+# Import built-in modules
+from collections.abc import Iterator
+from collections.abc import Mapping
+import operator
+
+# Import third-party modules
+from qtpy import QtCore
+
+# Import local modules
+from dayu_widgets.item_model import compile_header_list
+from dayu_widgets.item_model import get_header_flags
+from dayu_widgets.item_model import make_key_array
+from dayu_widgets.utils import get_obj_value
+
+
+try:
+    # Import third-party modules
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_NUMERIC_KINDS = "biuf"
+_MISSING = object()
+
+
+class _NumericColumn(object):
+    """A column of bool/int/float values stored in one NumPy array."""
+
+    def __init__(self, array):
+        super(_NumericColumn, self).__init__()
+        self.array = array
+
+    def get(self, row):
+        return self.array.item(row)
+
+    def set(self, row, value):
+        """Return False if the value can not be stored in this column."""
+        if isinstance(value, (bool, int, float, np.number)) and np.can_cast(
+            np.min_scalar_type(value), self.array.dtype, "same_kind"
+        ):
+            self.array[row] = value
+            return True
+        return False
+
+    def extend(self, values, start):
+        """Return False if the values can not be stored in this column."""
+        array = np.asarray(values)
+        if array.dtype.kind not in _NUMERIC_KINDS or not np.can_cast(array.dtype, self.array.dtype, "same_kind"):
+            return False
+        self.array = _ensure_capacity(self.array, start + len(array))
+        self.array[start : start + len(array)] = array
+        return True
+
+    def to_list(self, size):
+        return self.array[:size].tolist()
+
+    def reorder(self, order):
+        self.array[: len(order)] = self.array[order]
+
+
+class _CategoryColumn(object):
+    """A dictionary encoded column, the distinct values are stored once and each row keeps a code."""
+
+    def __init__(self, codes, categories):
+        super(_CategoryColumn, self).__init__()
+        self.codes = codes
+        self.categories = categories
+        # 值到编码的反查表只在写入时需要，按需创建，避免常驻内存
+        self.lookup = None
+
+    def _encode(self, value):
+        if self.lookup is None:
+            self.lookup = {category: code for code, category in enumerate(self.categories)}
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+    def release_lookup(self):
+        self.lookup = None
+
+    def get(self, row):
+        return self.categories[self.codes.item(row)]
+
+    def set(self, row, value):
+        try:
+            self.codes[row] = self._encode(value)
+        except TypeError:
+            return False
+        return True
+
+    def extend(self, values, start):
+        try:
+            codes = [self._encode(value) for value in values]
+        except TypeError:
+            return False
+        self.codes = _ensure_capacity(self.codes, start + len(codes))
+        self.codes[start : start + len(codes)] = codes
+        return True
+
+    def to_list(self, size):
+        categories = self.categories
+        return [categories[code] for code in self.codes[:size].tolist()]
+
+    def reorder(self, order):
+        self.codes[: len(order)] = self.codes[order]
+
+
+class _ObjectColumn(object):
+    """A column of unhashable values, stored in a NumPy object array."""
+
+    def __init__(self, array):
+        super(_ObjectColumn, self).__init__()
+        self.array = array
+
+    def get(self, row):
+        return self.array[row]
+
+    def set(self, row, value):
+        self.array[row] = value
+        return True
+
+    def extend(self, values, start):
+        self.array = _ensure_capacity(self.array, start + len(values))
+        for offset, value in enumerate(values):
+            self.array[start + offset] = value
+        return True
+
+    def to_list(self, size):
+        return self.array[:size].tolist()
+
+    def reorder(self, order):
+        self.array[: len(order)] = self.array[order]
+
+
+def _ensure_capacity(array, size):
+    """Grow the array by doubling, so that appending rows is amortized O(1)."""
+    if len(array) >= size:
+        return array
+    new_array = np.zeros(max(size, len(array) * 2), dtype=array.dtype)
+    new_array[: len(array)] = array
+    return new_array
+
+
+def _object_array(values):
+    array = np.empty(len(values), dtype=object)
+    for row, value in enumerate(values):
+        array[row] = value
+    return array
+
+
+def make_column(values):
+    """
+    Create the best column storage for values.
+    Numbers are kept in a typed array, hashable values are dictionary encoded,
+    anything else falls back to an object array.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in _NUMERIC_KINDS:
+        return _NumericColumn(values)
+    values = list(values)
+    if values and all(isinstance(value, (bool, int, float)) for value in values):
+        array = np.asarray(values)
+        if array.dtype.kind in _NUMERIC_KINDS:
+            return _NumericColumn(array)
+    column = _CategoryColumn(np.zeros(0, dtype=np.int32), [])
+    if column.extend(values, 0):
+        column.release_lookup()
+        return column
+    return _ObjectColumn(_object_array(values))
+
+
+def _filled_column(value, size):
+    return _CategoryColumn(np.zeros(size, dtype=np.int32), [value])
+
+
+class MColumnarRow(object):
+    """
+    A light view of one row of MColumnarTableModel.
+    It reads and writes like a dict (row["key"], row.get("key")) and like an object (row.key),
+    so the formatters in header_list and get_obj_value/set_obj_value work the same as with MTableModel.
+    Writing a value doesn't emit dataChanged, like changing a row object of MTableModel.
+    """
+
+    __slots__ = ("_model", "_row")
+
+    def __init__(self, model, row):
+        object.__setattr__(self, "_model", model)
+        object.__setattr__(self, "_row", row)
+
+    def get(self, key, default=None):
+        return self._model.get_value(self._row, key, default)
+
+    def __getitem__(self, key):
+        value = self._model.get_value(self._row, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __getattr__(self, key):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        value = self._model.get_value(self._row, key, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._model.set_value(self._row, key, value)
+
+    def __setattr__(self, key, value):
+        self._model.set_value(self._row, key, value)
+
+    def __contains__(self, key):
+        return key in self._model.columns
+
+    def keys(self):
+        return list(self._model.columns.keys())
+
+    def to_dict(self):
+        return {key: self.get(key) for key in self.keys()}
+
+
+class MColumnarRows(object):
+    """The sequence returned by MColumnarTableModel.get_data_list, rows are created on access."""
+
+    def __init__(self, model):
+        super(MColumnarRows, self).__init__()
+        self._model = model
+
+    def __len__(self):
+        return self._model.rowCount()
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [MColumnarRow(self._model, i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return MColumnarRow(self._model, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield MColumnarRow(self._model, row)
+
+
+class MColumnarTableModel(QtCore.QAbstractTableModel):
+    """
+    A flat table model using the same header_list config as MTableModel,
+    but keeping each column in a NumPy array instead of a list of dict/object.
+    Strings and other hashable values are dictionary encoded.
+    It can replace MTableModel under MSortFilterModel and the item views.
+    Every field of the rows is kept, so the formatters can read the fields not shown in header_list.
+    Rows have no object behind them, so index.internalPointer() is None,
+    use get_row(row) or utils.real_data_obj(index) to read and write a row.
+    """
+
+    def __init__(self, parent=None):
+        if np is None:
+            raise ImportError("MColumnarTableModel requires numpy, please install it first.")
+        super(MColumnarTableModel, self).__init__(parent)
+        self.header_list = []
+        self.columns = {}
+        self._row_count = 0
+        self._role_getters = []
+
+    def set_header_list(self, header_list):
+        self.header_list = header_list
+        self._role_getters = compile_header_list(
+            header_list, value_getter_factory=lambda attr: operator.methodcaller("get", attr)
+        )
+
+    def _get_column_keys(self, data_list):
+        """
+        Return the columns to store for data_list: the ones used by header_list, key_checked for checkable columns,
+        key_list for selectable columns, then every other field of the rows.
+        """
+        result = {}
+        for attr_dict in self.header_list:
+            key = attr_dict.get("key")
+            result[key] = None
+            if attr_dict.get("checkable", False):
+                result[key + "_checked"] = None
+            if attr_dict.get("selectable", False):
+                result[key + "_list"] = None
+        for data_obj in data_list:
+            # 只需要字段名，dict.update 比逐个取 key 快很多
+            result.update(data_obj if hasattr(data_obj, "keys") else getattr(data_obj, "__dict__", {}))
+        return list(result)
+
+    def set_data_list(self, data_list):
+        """
+        Set the rows of the model.
+        :param data_list: list of dict/object like MTableModel, or a dict of column name to values.
+        """
+        if isinstance(data_list, Iterator):
+            data_list = list(data_list)
+        self.beginResetModel()
+        if not data_list:
+            self.columns = {}
+            self._row_count = 0
+        elif isinstance(data_list, Mapping):
+            self.columns = {key: make_column(values) for key, values in data_list.items()}
+            self._row_count = len(next(iter(data_list.values())))
+        else:
+            self.columns = {
+                key: make_column([get_obj_value(data_obj, key) for data_obj in data_list])
+                for key in self._get_column_keys(data_list)
+            }
+            self._row_count = len(data_list)
+        self.endResetModel()
+
+    def clear(self):
+        self.set_data_list(None)
+
+    def get_data_list(self):
+        return MColumnarRows(self)
+
+    def get_row(self, row):
+        return MColumnarRow(self, row)
+
+    def get_value(self, row, key, default=None):
+        column = self.columns.get(key)
+        if column is None:
+            return default
+        return column.get(row)
+
+    def set_value(self, row, key, value):
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = _filled_column(None, self._row_count)
+        if not column.set(row, value):
+            # 类型变了，换成更通用的存储
+            values = column.to_list(self._row_count)
+            values[row] = value
+            self.columns[key] = make_column(values)
+
+    def append(self, data_dict):
+        self.append_many([data_dict])
+
+    def append_many(self, data_list):
+        """Append rows at the end of the model with a single rowsInserted."""
+        data_list = list(data_list)
+        if not data_list:
+            return
+        start = self._row_count
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(data_list) - 1)
+        for key in dict.fromkeys(self._get_column_keys(data_list) + list(self.columns)):
+            values = [get_obj_value(data_obj, key) for data_obj in data_list]
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = _filled_column(None, start)
+            if not column.extend(values, start):
+                self.columns[key] = make_column(column.to_list(start) + values)
+        self._row_count += len(data_list)
+        self.endInsertRows()
+
+    def get_key_array(self, key, key_func):
+        """
+        Return a float array of key_func applied to the value of key of each row, NaN where it returns None,
+        to sort by this column with NumPy. key_func is only called once for each distinct value.
+        :param key: the column name
+        :param key_func: callable receive a value, return a number or None, like numeric_sort_key
+        """
+        column = self.columns.get(key)
+        if column is None:
+            return np.full(self._row_count, np.nan)
+        if isinstance(column, _CategoryColumn):
+            return make_key_array(column.categories, key_func)[column.codes[: self._row_count]]
+        if isinstance(column, _NumericColumn):
+            values, inverse = np.unique(column.array[: self._row_count], return_inverse=True)
+            return make_key_array(values.tolist(), key_func)[inverse]
+        return make_key_array(column.to_list(self._row_count), key_func)
+
+    def reorder_rows(self, order, parent_index=None):
+        """
+        Put the rows in a new order with a single layoutChanged, like sorting them.
+        The persistent indexes, so the selection and the current index, follow their rows.
+        :param order: list or array of row number, the new row n is the old row order[n]
+        :param parent_index: only the invalid index of the top level is accepted
+        :return: None
+        """
+        order = np.asarray(order, dtype=np.intp)
+        if (
+            (parent_index is not None and parent_index.isValid())
+            or len(order) != self._row_count
+            or not np.array_equal(np.sort(order), np.arange(self._row_count))
+        ):
+            raise ValueError("order is not a permutation of the rows")
+        new_rows = np.empty(self._row_count, dtype=np.intp)
+        new_rows[order] = np.arange(self._row_count)
+        self.layoutAboutToBeChanged.emit()
+        for column in self.columns.values():
+            column.reorder(order)
+        old_index_list = self.persistentIndexList()
+        new_index_list = [self.index(int(new_rows[index.row()]), index.column()) for index in old_index_list]
+        self.changePersistentIndexList(old_index_list, new_index_list)
+        self.layoutChanged.emit()
+
+    def flags(self, index):
+        result = QtCore.QAbstractTableModel.flags(self, index)
+        if not index.isValid():
+            return QtCore.Qt.ItemIsEnabled
+        return get_header_flags(self.header_list[index.column()], result)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Vertical:
+            return super(MColumnarTableModel, self).headerData(section, orientation, role)
+        if not self.header_list or section >= len(self.header_list):
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return self.header_list[section]["label"]
+        return None
+
+    def rowCount(self, parent_index=None):
+        if parent_index is not None and parent_index.isValid():
+            return 0
+        return self._row_count
+
+    def get_child_counts(self, parent_index=None):
+        """Return the list of the rowCount under each row of parent_index, always 0 in a flat table."""
+        return [0] * self.rowCount(parent_index)
+
+    def columnCount(self, parent_index=None):
+        if parent_index is not None and parent_index.isValid():
+            return 0
+        return len(self.header_list)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        role_getters = self._role_getters[index.column()]
+        getter = role_getters.get(role)
+        if getter is None:
+            if role.__class__ is int:
+                return None
+            getter = role_getters.get(int(role))
+            if getter is None:
+                return None
+        return getter(MColumnarRow(self, index.row()))
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if index.isValid() and role in [QtCore.Qt.CheckStateRole, QtCore.Qt.EditRole]:
+            attr_dict = self.header_list[index.column()]
+            key = attr_dict.get("key")
+            if role == QtCore.Qt.CheckStateRole:
+                if not attr_dict.get("checkable", False):
+                    return False
+                key += "_checked"
+            self.set_value(index.row(), key, value)
+            self.dataChanged.emit(index, index)
+            return True
+        return False
@@ -0,0 +1,172 @@
+"""
+MDataLoader
+Run a slow data source (database query, file parsing...) on a QThreadPool worker,
+and hand the rows back to the GUI thread in batches.
+"""
+
+# Import built-in modules
+import threading
+
+# Import third-party modules
+from qtpy import QtCore
+
+
+class _MLoadSignals(QtCore.QObject):
+    """
+    Signals emitted from the worker thread.
+    It is a child of MDataLoader, so the worker never holds the last reference of a QObject
+    living in the GUI thread.
+    """
+
+    sig_batch = QtCore.Signal(int, object)
+    sig_done = QtCore.Signal(int, object)
+
+
+class _MLoadRunnable(QtCore.QRunnable):
+    """Iterate the data source in the worker thread, emit a batch every batch_size rows."""
+
+    def __init__(self, signals, generation, data_source, batch_size, cancel_event):
+        super(_MLoadRunnable, self).__init__()
+        self.setAutoDelete(True)
+        self.signals = signals
+        self.generation = generation
+        self.data_source = data_source
+        self.batch_size = batch_size
+        self.cancel_event = cancel_event
+
+    def _iter_batch(self):
+        batch = []
+        for item in self.data_source():
+            if self.cancel_event.is_set():
+                return
+            # 和 MTableModel.set_data_list 一样，list/tuple 视为一块数据
+            if isinstance(item, (list, tuple)):
+                batch.extend(item)
+            else:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self):
+        error = None
+        try:
+            try:
+                for batch in self._iter_batch():
+                    if self.cancel_event.is_set():
+                        break
+                    self.signals.sig_batch.emit(self.generation, batch)
+            except Exception as load_error:
+                error = load_error
+            # 取消了也要发出，GUI 线程收到以后才删除 signals
+            self.signals.sig_done.emit(self.generation, error)
+        except RuntimeError:
+            # MDataLoader 已经被删除
+            pass
+        finally:
+            self.signals = None
+            self.data_source = None
+
+
+class MDataLoader(QtCore.QObject):
+    """
+    Load rows from a data source in a background thread.
+    A data source is a callable without arguments returning an iterable of rows,
+    it can also yield list/tuple of rows as chunks. It is called in the worker thread,
+    so it must not touch any widget.
+    The batches from the worker are collected and emitted at most once per interval
+    by sig_rows_loaded in the GUI thread, so the receiver can insert them without freezing the UI.
+    Calling load() again or cancel() drops the running load, its remaining rows are never emitted.
+    """
+
+    sig_started = QtCore.Signal()
+    sig_rows_loaded = QtCore.Signal(list)
+    sig_progress = QtCore.Signal(int)
+    sig_finished = QtCore.Signal()
+    sig_error = QtCore.Signal(object)
+
+    def __init__(self, batch_size=1000, interval=16, thread_pool=None, parent=None):
+        super(MDataLoader, self).__init__(parent)
+        self.batch_size = batch_size
+        self.thread_pool = thread_pool or QtCore.QThreadPool.globalInstance()
+        self._generation = 0
+        self._cancel_event = None
+        self._pending_rows = []
+        self._loaded_count = 0
+        self._done_result = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._slot_flush)
+
+    def set_interval(self, interval):
+        """Set the minimum time in ms between two sig_rows_loaded."""
+        self._timer.setInterval(interval)
+
+    def is_loading(self):
+        return self._cancel_event is not None
+
+    def load(self, data_source):
+        """
+        Cancel the running load and start loading data_source in the thread pool.
+        :param data_source: callable returning an iterable of rows.
+        :return: None
+        """
+        self.cancel()
+        # runnable 由线程池负责删除，这里只保留取消用的 Event
+        self._cancel_event = threading.Event()
+        signals = _MLoadSignals(self)
+        # 信号从工作线程发出，接收者在 GUI 线程，自动成为 QueuedConnection
+        signals.sig_batch.connect(self._slot_batch)
+        signals.sig_done.connect(self._slot_done)
+        runnable = _MLoadRunnable(signals, self._generation, data_source, self.batch_size, self._cancel_event)
+        self.sig_started.emit()
+        self.thread_pool.start(runnable)
+
+    def cancel(self):
+        """Stop the running load, the rows not emitted yet are dropped."""
+        self._generation += 1
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+        self._timer.stop()
+        self._pending_rows = []
+        self._loaded_count = 0
+        self._done_result = None
+
+    @QtCore.Slot(int, object)
+    def _slot_batch(self, generation, batch):
+        if generation != self._generation:
+            return
+        self._pending_rows.extend(batch)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @QtCore.Slot(int, object)
+    def _slot_done(self, generation, error):
+        self.sender().deleteLater()
+        if generation != self._generation:
+            return
+        self._cancel_event = None
+        # 等剩下的数据发出去以后再结束
+        self._done_result = (error,)
+        if not self._timer.isActive():
+            self._slot_flush()
+
+    @QtCore.Slot()
+    def _slot_flush(self):
+        generation = self._generation
+        if self._pending_rows:
+            rows, self._pending_rows = self._pending_rows, []
+            self._loaded_count += len(rows)
+            self.sig_rows_loaded.emit(rows)
+            self.sig_progress.emit(self._loaded_count)
+        # 接收者可能在 sig_rows_loaded 里重新 load 或 cancel
+        if generation == self._generation and self._done_result is not None:
+            (error,) = self._done_result
+            self._done_result = None
+            if error is not None:
+                self.sig_error.emit(error)
+            self.sig_finished.emit()
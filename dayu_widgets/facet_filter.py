@@ -0,0 +1,127 @@
+"""MFacetFilter"""
+
+# Import built-in modules
+import functools
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.check_box import MCheckBox
+from dayu_widgets.label import MLabel
+from dayu_widgets.utils import display_formatter
+
+
+class MFacetFilter(QtWidgets.QScrollArea):
+    """
+    MFacetFilter
+    A panel of check boxes filtering a MSortFilterModel by facets, one group for each facet key
+    (the default_filter columns of header_list). Each check box shows a value with the count of rows
+    it gives together with the values checked in the other groups.
+    Values checked in one group are combined with OR, groups are combined with AND.
+    """
+
+    def __init__(self, sort_filter_model=None, parent=None):
+        super(MFacetFilter, self).__init__(parent)
+        self.setWidgetResizable(True)
+        self.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self._main_lay = QtWidgets.QVBoxLayout()
+        self._main_lay.setContentsMargins(0, 0, 0, 0)
+        self._main_lay.addStretch()
+        container = QtWidgets.QWidget()
+        container.setLayout(self._main_lay)
+        self.setWidget(container)
+        # key -> (标题, 放 check box 的 layout, {value: check box})
+        self._group_map = {}
+        self._dirty = False
+        self.sort_filter_model = None
+        if sort_filter_model is not None:
+            self.set_model(sort_filter_model)
+
+    def set_model(self, sort_filter_model):
+        if self.sort_filter_model is not None:
+            self.sort_filter_model.sig_facet_changed.disconnect(self.refresh)
+        self.sort_filter_model = sort_filter_model
+        self.sort_filter_model.sig_facet_changed.connect(self.refresh)
+        self.refresh()
+
+    def clear(self):
+        """Uncheck all the values."""
+        for key in self.sort_filter_model.get_facet_keys():
+            if self.sort_filter_model.get_facet_values(key):
+                self.sort_filter_model.set_facet_values(key, [])
+
+    @QtCore.Slot()
+    def refresh(self):
+        """Update the groups and the counts from the model."""
+        if self.isHidden():
+            # 隐藏时不建立索引，显示出来再更新
+            self._dirty = True
+            return
+        self._dirty = False
+        keys = self.sort_filter_model.get_facet_keys()
+        for key in list(self._group_map):
+            if key not in keys:
+                self._remove_group(key)
+        for key in keys:
+            if key not in self._group_map:
+                self._add_group(key)
+            self._update_group(key)
+
+    def showEvent(self, event):
+        if self._dirty:
+            self.refresh()
+        return super(MFacetFilter, self).showEvent(event)
+
+    def _get_label(self, key):
+        for data_dict in self.sort_filter_model.header_list:
+            if data_dict.get("key") == key:
+                return data_dict.get("label", key)
+        return key
+
+    def _add_group(self, key):
+        title_label = MLabel(self._get_label(key)).strong()
+        check_box_lay = QtWidgets.QVBoxLayout()
+        check_box_lay.setContentsMargins(0, 0, 0, 10)
+        self._main_lay.insertWidget(self._main_lay.count() - 1, title_label)
+        self._main_lay.insertLayout(self._main_lay.count() - 1, check_box_lay)
+        self._group_map[key] = (title_label, check_box_lay, {})
+
+    def _remove_group(self, key):
+        title_label, check_box_lay, check_box_map = self._group_map.pop(key)
+        for check_box in check_box_map.values():
+            check_box.deleteLater()
+        title_label.deleteLater()
+        self._main_lay.removeItem(check_box_lay)
+        check_box_lay.deleteLater()
+
+    def _update_group(self, key):
+        _, check_box_lay, check_box_map = self._group_map[key]
+        counts = self.sort_filter_model.get_facet_counts(key)
+        selected = self.sort_filter_model.get_facet_values(key)
+        for value in list(check_box_map):
+            if value not in counts:
+                check_box = check_box_map.pop(value)
+                check_box_lay.removeWidget(check_box)
+                check_box.deleteLater()
+        for row, (value, count) in enumerate(counts.items()):
+            check_box = check_box_map.get(value)
+            if check_box is None:
+                check_box = check_box_map[value] = MCheckBox()
+                check_box.toggled.connect(functools.partial(self._slot_check_changed, key))
+            if check_box_lay.indexOf(check_box) != row:
+                # 保持和 counts 一样的顺序
+                check_box_lay.removeWidget(check_box)
+                check_box_lay.insertWidget(row, check_box)
+            check_box.setText("{} ({})".format(display_formatter(value), count))
+            check_box.blockSignals(True)
+            check_box.setChecked(value in selected)
+            check_box.blockSignals(False)
+            check_box.setEnabled(count > 0 or value in selected)
+
+    def _slot_check_changed(self, key, checked):
+        check_box_map = self._group_map[key][2]
+        values = [value for value, check_box in check_box_map.items() if check_box.isChecked()]
+        self.sort_filter_model.set_facet_values(key, values)
@@ -0,0 +1,211 @@
+"""
+MFacetIndex
+Inverted indexes of some keys over the rows of a table, used to filter by facets.
+"""
+
+# Import built-in modules
+from collections import OrderedDict
+
+# Import local modules
+from dayu_widgets.utils import display_formatter
+from dayu_widgets.utils import get_obj_value
+from dayu_widgets.utils import natural_sort_key
+
+
+if hasattr(int, "bit_count"):
+    _bit_count = int.bit_count
+else:
+
+    def _bit_count(bits):
+        return bin(bits).count("1")
+
+
+def rows_to_bits(rows):
+    """
+    Make a bitset from row numbers, bit n is set if row n is in rows.
+    :param rows: iterable of int
+    :return: int
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    # 先在 bytearray 里置位，再一次性转成 int，避免大整数反复移位
+    buffer = bytearray((max(rows) >> 3) + 1)
+    for row in rows:
+        buffer[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def bits_to_mask(bits):
+    """
+    Make a text of "0" and "1" from a bitset, mask[n] == "1" if bit n is set.
+    Reading one row from it is O(1), while bits >> n is O(n).
+    """
+    return bin(bits)[:1:-1]
+
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _get_facet_values(value):
+    """Return the facet values of a cell, a list/tuple/set puts the row under each item."""
+    if value.__class__ in _SCALAR_TYPES:
+        return (value,)
+    items = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+    result = []
+    for item in items:
+        try:
+            hash(item)
+        except TypeError:
+            item = display_formatter(item)
+        result.append(item)
+    return tuple(dict.fromkeys(result))
+
+
+class MFacetIndex(object):
+    """
+    For each key, map each value to the bitset of the rows having this value.
+    The bitset is a python int, bit n is row n, so combining the selected values is a few OR
+    inside a key and AND between keys, and the count of a value is a popcount.
+    The selection is OR inside a key, AND between keys, a key without selected value filters nothing.
+    :param keys: the keys of the rows to index.
+    """
+
+    def __init__(self, keys):
+        super(MFacetIndex, self).__init__()
+        self.keys = list(keys)
+        self.row_count = 0
+        self._value_bits = {key: {} for key in self.keys}
+        # 每一行的值，数据变化时用来找到旧值
+        self._row_values = {key: [] for key in self.keys}
+        self._selected = {key: [] for key in self.keys}
+
+    def rebuild(self, data_list):
+        """Index all the rows of data_list again, the selection is kept."""
+        self.row_count = len(data_list)
+        for key in self.keys:
+            row_values = [_get_facet_values(get_obj_value(data_obj, key)) for data_obj in data_list]
+            value_rows = {}
+            for row, values in enumerate(row_values):
+                for value in values:
+                    value_rows.setdefault(value, []).append(row)
+            self._row_values[key] = row_values
+            self._value_bits[key] = {value: rows_to_bits(rows) for value, rows in value_rows.items()}
+
+    def insert_rows(self, data_list, first, last):
+        """Rows first to last of data_list are just inserted."""
+        count = last - first + 1
+        for key in self.keys:
+            value_bits = self._value_bits[key]
+            if first < self.row_count:
+                # 插入位置之后的行号都要后移
+                low_mask = (1 << first) - 1
+                for value, bits in value_bits.items():
+                    value_bits[value] = (bits & low_mask) | ((bits >> first) << (first + count))
+            new_values = [_get_facet_values(get_obj_value(data_obj, key)) for data_obj in data_list[first : last + 1]]
+            self._row_values[key][first:first] = new_values
+            value_rows = {}
+            for row, values in enumerate(new_values, first):
+                for value in values:
+                    value_rows.setdefault(value, []).append(row)
+            for value, rows in value_rows.items():
+                value_bits[value] = value_bits.get(value, 0) | rows_to_bits(rows)
+        self.row_count += count
+
+    def remove_rows(self, first, last):
+        """Rows first to last are just removed."""
+        low_mask = (1 << first) - 1
+        for key in self.keys:
+            value_bits = self._value_bits[key]
+            for value, bits in list(value_bits.items()):
+                bits = (bits & low_mask) | ((bits >> (last + 1)) << first)
+                if bits:
+                    value_bits[value] = bits
+                else:
+                    del value_bits[value]
+            del self._row_values[key][first : last + 1]
+        self.row_count -= last - first + 1
+
+    def update_rows(self, data_list, first, last):
+        """
+        Rows first to last of data_list are just changed.
+        :return: True if any indexed value changed.
+        """
+        if last - first >= 64:
+            # 每一行的修改都是大整数运算，很多行时直接重建更快
+            self.rebuild(data_list)
+            return True
+        changed = False
+        for key in self.keys:
+            value_bits = self._value_bits[key]
+            row_values = self._row_values[key]
+            for row in range(first, last + 1):
+                new_values = _get_facet_values(get_obj_value(data_list[row], key))
+                old_values = row_values[row]
+                if new_values == old_values:
+                    continue
+                changed = True
+                row_values[row] = new_values
+                row_bit = 1 << row
+                for value in old_values:
+                    bits = value_bits[value] & ~row_bit
+                    if bits:
+                        value_bits[value] = bits
+                    else:
+                        del value_bits[value]
+                for value in new_values:
+                    value_bits[value] = value_bits.get(value, 0) | row_bit
+        return changed
+
+    def set_selected(self, key, values):
+        """Select the values of a key, an empty list removes the filter of this key."""
+        self._selected[key] = list(values or [])
+
+    def get_selected(self, key):
+        return list(self._selected[key])
+
+    def get_values(self, key):
+        """Return the values of a key present in the rows, in natural order."""
+        return sorted(self._value_bits[key], key=lambda value: natural_sort_key(display_formatter(value)))
+
+    def get_key_bits(self, key):
+        """Return the bitset of the rows matching the selection of key, None if nothing is selected."""
+        if not self._selected[key]:
+            return None
+        value_bits = self._value_bits[key]
+        result = 0
+        for value in self._selected[key]:
+            result |= value_bits.get(value, 0)
+        return result
+
+    def get_accepted_bits(self, exclude_key=None):
+        """
+        Return the bitset of the rows matching the selection of all the keys, None if nothing is selected.
+        :param exclude_key: ignore the selection of this key
+        """
+        result = None
+        for key in self.keys:
+            if key == exclude_key:
+                continue
+            key_bits = self.get_key_bits(key)
+            if key_bits is not None:
+                result = key_bits if result is None else result & key_bits
+        return result
+
+    def get_accepted_mask(self):
+        """Return get_accepted_bits as a "0"/"1" text, see bits_to_mask."""
+        bits = self.get_accepted_bits()
+        return None if bits is None else bits_to_mask(bits)
+
+    def get_counts(self, key):
+        """
+        Return an OrderedDict of value to the count of rows having it
+        and matching the selection of the other keys.
+        """
+        other_bits = self.get_accepted_bits(exclude_key=key)
+        value_bits = self._value_bits[key]
+        result = OrderedDict()
+        for value in self.get_values(key):
+            bits = value_bits[value]
+            result[value] = _bit_count(bits if other_bits is None else bits & other_bits)
+        return result
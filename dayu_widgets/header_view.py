@@ -1,5 +1,6 @@
 # Import built-in modules
 import functools
+import random
 
 # Import third-party modules
 from qtpy import QtCore
@@ -11,6 +12,10 @@ from dayu_widgets.menu import MMenu
 import dayu_widgets.utils as utils
 
 
+# Fit Size 总是测量开头和结尾的这么多行
+_FIT_EDGE_ROWS = 20
+
+
 class MHeaderView(QtWidgets.QHeaderView):
     def __init__(self, orientation, parent=None, show_sort_indicator=True):
         super(MHeaderView, self).__init__(orientation, parent)
@@ -24,6 +29,13 @@ class MHeaderView(QtWidgets.QHeaderView):
             "orientation",
             "horizontal" if orientation == QtCore.Qt.Horizontal else "vertical",
         )
+        # Fit Size 只测量开头和结尾的行、可见的行，再加 fit_sample_size 个随机的行，None 表示测量所有的行
+        self.fit_sample_size = 200
+        # Fit Size 的最大宽度，竖直表头是最大高度，None 表示不限制
+        self.fit_max_size = None
+        # 测量的结果: 水平表头 {列: 宽度}，竖直表头 {行: 高度}，数据变化时丢掉
+        self._fit_size_cache = {}
+        self._fit_model = None
 
     # def enterEvent(self, *args, **kwargs):
     #     # 调整表头宽度的 cursor 就被覆盖了
@@ -76,8 +88,7 @@ class MHeaderView(QtWidgets.QHeaderView):
         source_model.beginResetModel()
         attr = "{}_checked".format(source_model.header_list[column].get("key"))
         for row in range(current_model.rowCount()):
-            real_index = utils.real_index(current_model.index(row, column))
-            data_obj = real_index.internalPointer()
+            data_obj = utils.real_data_obj(current_model.index(row, column))
             if state is None:
                 old_state = utils.get_obj_value(data_obj, attr)
                 utils.set_obj_value(
@@ -97,10 +108,162 @@ class MHeaderView(QtWidgets.QHeaderView):
     @QtCore.Slot(bool)
     def _slot_set_resize_mode(self, flag):
         if flag:
-            self.resizeSections(QtWidgets.QHeaderView.ResizeToContents)
+            self.fit_sections()
         else:
             self.resizeSections(QtWidgets.QHeaderView.Interactive)
 
+    def set_fit_sample_size(self, count):
+        """
+        Set how many random rows Fit Size measures besides the first, the last and the visible rows.
+        :param count: int, None to measure all the rows like ResizeToContents.
+        """
+        self.fit_sample_size = count
+        self._fit_size_cache = {}
+
+    def set_fit_max_size(self, size):
+        """
+        Set the largest size Fit Size gives to a section, the width of a column or the height of the rows.
+        :param size: int, None for no limit.
+        """
+        self.fit_max_size = size
+
+    def setModel(self, model):
+        if model is not self._fit_model:
+            if self._fit_model is not None:
+                for signal, slot in self._get_fit_connections(self._fit_model):
+                    signal.disconnect(slot)
+            if model is not None:
+                for signal, slot in self._get_fit_connections(model):
+                    signal.connect(slot)
+            self._fit_model = model
+        self._fit_size_cache = {}
+        super(MHeaderView, self).setModel(model)
+
+    def _get_fit_connections(self, model):
+        return [
+            (model.dataChanged, self._slot_fit_data_changed),
+            (model.rowsInserted, self._slot_clear_fit_sizes),
+            (model.rowsRemoved, self._slot_clear_fit_sizes),
+            (model.rowsMoved, self._slot_clear_fit_sizes),
+            (model.columnsInserted, self._slot_clear_fit_sizes),
+            (model.columnsRemoved, self._slot_clear_fit_sizes),
+            (model.columnsMoved, self._slot_clear_fit_sizes),
+            (model.layoutChanged, self._slot_clear_fit_sizes),
+            (model.modelReset, self._slot_clear_fit_sizes),
+        ]
+
+    @QtCore.Slot()
+    def _slot_clear_fit_sizes(self):
+        self._fit_size_cache = {}
+
+    @QtCore.Slot(QtCore.QModelIndex, QtCore.QModelIndex)
+    def _slot_fit_data_changed(self, top_left, bottom_right, roles=None):
+        if not top_left.isValid() or not bottom_right.isValid():
+            self._fit_size_cache = {}
+            return
+        if self.orientation() == QtCore.Qt.Horizontal:
+            first, last = top_left.column(), bottom_right.column()
+        else:
+            first, last = top_left.row(), bottom_right.row()
+        for section in [section for section in self._fit_size_cache if first <= section <= last]:
+            del self._fit_size_cache[section]
+
+    def fit_sections(self):
+        """
+        Resize the sections to their contents like ResizeToContents, but only measure a sample of the rows,
+        see fit_sample_size, and reuse the sizes measured before until the data changes.
+        A horizontal header fits each visible column, a vertical header fits each of the measured rows.
+        """
+        view = self.parentWidget()
+        if not isinstance(view, QtWidgets.QAbstractItemView) or view.model() is None:
+            self.resizeSections(QtWidgets.QHeaderView.ResizeToContents)
+            return
+        if self.orientation() == QtCore.Qt.Horizontal:
+            for column in range(self.count()):
+                if self.isSectionHidden(column):
+                    continue
+                size = self._fit_size_cache.get(column)
+                if size is None:
+                    size = self._fit_size_cache[column] = self._measure_column(view, column)
+                self.resizeSection(column, self._cap_fit_size(size))
+        else:
+            # 没有量过的行保持原来的高度
+            for row in self._get_fit_rows(view, view.model().rowCount()):
+                size = self._fit_size_cache.get(row)
+                if size is None:
+                    size = self._fit_size_cache[row] = self._measure_row(view, row)
+                self.resizeSection(row, self._cap_fit_size(size))
+
+    def _cap_fit_size(self, size):
+        return size if self.fit_max_size is None else min(size, self.fit_max_size)
+
+    def _get_fit_rows(self, view, row_count):
+        """Return the top level rows to measure: the first, the last, the visible and fit_sample_size random rows."""
+        if self.fit_sample_size is None or row_count <= _FIT_EDGE_ROWS * 2 + self.fit_sample_size:
+            return range(row_count)
+        rows = set(range(_FIT_EDGE_ROWS))
+        rows.update(range(row_count - _FIT_EDGE_ROWS, row_count))
+        rows.update(random.sample(range(row_count), self.fit_sample_size))
+        top_index = view.indexAt(QtCore.QPoint(0, 0))
+        if top_index.isValid():
+            # 子节点的行号不是顶层的行号，只取顶层的行
+            while top_index.parent().isValid():
+                top_index = top_index.parent()
+            bottom_index = view.indexAt(QtCore.QPoint(0, view.viewport().height() - 1))
+            while bottom_index.parent().isValid():
+                bottom_index = bottom_index.parent()
+            bottom_row = bottom_index.row() if bottom_index.isValid() else row_count - 1
+            rows.update(range(top_index.row(), bottom_row + 1))
+        return sorted(rows)
+
+    def _iter_fit_indexes(self, view, column):
+        """Yield the indexes of column to measure, the sampled top level rows and the visible children."""
+        model = view.model()
+        for row in self._get_fit_rows(view, model.rowCount()):
+            yield model.index(row, column)
+        if isinstance(view, QtWidgets.QTreeView):
+            index = view.indexAt(QtCore.QPoint(0, 0))
+            height = view.viewport().height()
+            while index.isValid() and view.visualRect(index).top() < height:
+                if index.parent().isValid():
+                    yield index.sibling(index.row(), column)
+                index = view.indexBelow(index)
+
+    def _measure_column(self, view, column):
+        """Return the width fitting the header label and the sampled cells of column."""
+        option = _get_view_item_option(view)
+        width = self.sectionSizeFromContents(column).width()
+        tree_column = -1
+        if isinstance(view, QtWidgets.QTreeView):
+            tree_column = view.treePosition() if hasattr(view, "treePosition") else self.logicalIndex(0)
+        for index in self._iter_fit_indexes(view, column):
+            cell_width = _get_delegate(view, index).sizeHint(option, index).width()
+            if column == tree_column:
+                # 树形的列还要加上缩进
+                depth = 1 if view.rootIsDecorated() else 0
+                parent_index = index.parent()
+                while parent_index.isValid():
+                    depth += 1
+                    parent_index = parent_index.parent()
+                cell_width += depth * view.indentation()
+            width = max(width, cell_width)
+        return width + _get_grid_width(view)
+
+    def _measure_row(self, view, row):
+        """Return the height fitting all the visible cells of a top level row."""
+        option = _get_view_item_option(view)
+        model = view.model()
+        height = 0
+        for column in range(model.columnCount()):
+            if hasattr(view, "isColumnHidden") and view.isColumnHidden(column):
+                continue
+            index = model.index(row, column)
+            if view.wordWrap() and hasattr(view, "columnWidth"):
+                # 自动换行的文字按列宽计算高度
+                option.rect.setWidth(view.columnWidth(column))
+            height = max(height, _get_delegate(view, index).sizeHint(option, index).height())
+        return height + _get_grid_width(view)
+
     def setClickable(self, flag):
         try:
             QtWidgets.QHeaderView.setSectionsClickable(self, flag)
@@ -124,3 +287,24 @@ class MHeaderView(QtWidgets.QHeaderView):
             QtWidgets.QHeaderView.setResizeMode(self, mode)
         except AttributeError:
             QtWidgets.QHeaderView.setSectionResizeMode(self, mode)
+
+
+def _get_view_item_option(view):
+    option = QtWidgets.QStyleOptionViewItem()
+    try:
+        view.initViewItemOption(option)
+    except AttributeError:
+        option = view.viewOptions()
+    return option
+
+
+def _get_grid_width(view):
+    # QTableView 给网格线留出一个像素
+    return 1 if isinstance(view, QtWidgets.QTableView) and view.showGrid() else 0
+
+
+def _get_delegate(view, index):
+    try:
+        return view.itemDelegateForIndex(index)
+    except AttributeError:
+        return view.itemDelegate(index)
@@ -1,19 +1,43 @@
 # Import built-in modules
+import bisect
+from collections import OrderedDict
+from collections.abc import Iterator
+import contextlib
+import functools
+import heapq
+import itertools
+import operator
 import re
+import threading
+import time
 
 # Import third-party modules
 from qtpy import QtCore
 from qtpy import QtGui
 
 # Import local modules
+from dayu_widgets.facet_index import MFacetIndex
+from dayu_widgets.trigram_index import DEFAULT_FUZZY_THRESHOLD
+from dayu_widgets.trigram_index import MTrigramIndex
+from dayu_widgets.trigram_index import MTrigramPattern
 from dayu_widgets.utils import apply_formatter
+from dayu_widgets.utils import date_sort_key
 from dayu_widgets.utils import display_formatter
 from dayu_widgets.utils import font_formatter
 from dayu_widgets.utils import get_obj_value
 from dayu_widgets.utils import icon_formatter
+from dayu_widgets.utils import natural_sort_key
+from dayu_widgets.utils import numeric_sort_key
 from dayu_widgets.utils import set_obj_value
 
 
+try:
+    # Import third-party modules
+    import numpy as np
+except ImportError:
+    np = None
+
+
 SETTING_MAP = {
     QtCore.Qt.BackgroundRole: {"config": "bg_color", "formatter": QtGui.QColor},
     QtCore.Qt.DisplayRole: {"config": "display", "formatter": display_formatter},
@@ -44,6 +68,304 @@ SETTING_MAP = {
     QtCore.Qt.UserRole: {"config": "data"},  # anything
 }
 
+# header_list 里 sort_key 的可选值，"locale" 由 MSortFilterModel 用 QCollator 处理
+SORT_KEY_MAP = {
+    "natural": natural_sort_key,
+    "numeric": numeric_sort_key,
+    "date": date_sort_key,
+}
+
+_MISSING = object()
+
+# 没有配置也要经过 formatter 的 role
+ALWAYS_FORMATTED_ROLES = (
+    int(QtCore.Qt.DisplayRole),
+    int(QtCore.Qt.EditRole),
+    int(QtCore.Qt.ToolTipRole),
+)
+
+
+def _make_value_getter(attr):
+    """
+    Make a function to read attr from a row.
+    The accessor is picked once per row type instead of checking the type on every call.
+    """
+    accessor_map = {}
+
+    def getter(data_obj):
+        accessor = accessor_map.get(data_obj.__class__)
+        if accessor is None:
+            if isinstance(data_obj, dict):
+                accessor = operator.methodcaller("get", attr)
+            else:
+                accessor = lambda obj: getattr(obj, attr, None)  # noqa: E731
+            accessor_map[data_obj.__class__] = accessor
+        return accessor(data_obj)
+
+    return getter
+
+
+def _make_constant_getter(factory):
+    """Make a function always returning the result of factory, which is only called once."""
+    cache = []
+
+    def getter(data_obj):
+        if not cache:
+            cache.append(factory())
+        return cache[0]
+
+    return getter
+
+
+def _compile_role_getter(attr_dict, role, value_getter):
+    """
+    Compile the header config of one column for one role into a function of the row.
+    It gives the same result as apply the config formatter and then the SETTING_MAP formatter.
+    :return: a callable receive the row object, None if this role is not configured.
+    """
+    setting = SETTING_MAP[role]
+    config = attr_dict.get(setting.get("config"))
+    if not config and int(role) not in ALWAYS_FORMATTED_ROLES:
+        return None
+    model_formatter = setting.get("formatter", None)
+    if config is not None and not isinstance(config, dict) and not callable(config):
+        # 直接值型配置，结果是常量
+        return _make_constant_getter(lambda: apply_formatter(model_formatter, config))
+
+    if config is None:
+        value_func = value_getter
+    elif isinstance(config, dict):
+        config_get = config.get
+
+        def value_func(data_obj):
+            return config_get(value_getter(data_obj))
+
+    else:
+
+        def value_func(data_obj):
+            return config(value_getter(data_obj), data_obj)
+
+    if model_formatter is None:
+        return value_func
+    if isinstance(model_formatter, dict):
+        model_get = model_formatter.get
+        return lambda data_obj: model_get(value_func(data_obj))
+    return lambda data_obj: model_formatter(value_func(data_obj))
+
+
+def _compile_check_state_getter(attr, value_getter_factory=_make_value_getter):
+    check_getter = value_getter_factory(attr + "_checked")
+    unchecked = QtCore.Qt.Unchecked
+
+    def getter(data_obj):
+        state = check_getter(data_obj)
+        return unchecked if state is None else state
+
+    return getter
+
+
+def compile_header_list(header_list, value_getter_factory=_make_value_getter):
+    """
+    Compile header_list into a per column table, which maps the int role to a prebound callable.
+    :param header_list: list of header config dict
+    :param value_getter_factory: callable receive the attr, return a function reading it from a row
+    :return: list of dict, one dict for each column
+    """
+    result = []
+    for attr_dict in header_list:
+        value_getter = value_getter_factory(attr_dict.get("key"))
+        role_getters = {}
+        for role in SETTING_MAP:
+            getter = _compile_role_getter(attr_dict, role, value_getter)
+            if getter is not None:
+                role_getters[int(role)] = getter
+        if attr_dict.get("checkable", False):
+            role_getters[int(QtCore.Qt.CheckStateRole)] = _compile_check_state_getter(
+                attr_dict.get("key"), value_getter_factory
+            )
+        result.append(role_getters)
+    return result
+
+
+def is_lazy_children(children):
+    """Return whether the children of a node are loaded lazily, from an iterator or a callable."""
+    return isinstance(children, Iterator) or callable(children)
+
+
+def _has_children(data_obj):
+    return bool(get_obj_value(data_obj, "children"))
+
+
+def _is_search_refinement(old_pattern, new_pattern):
+    """
+    Return True if every row matching new_pattern also matches old_pattern,
+    it is only decided for literal patterns: the new text contains the old text.
+    """
+    if old_pattern == new_pattern:
+        return True
+    if re.escape(old_pattern) != old_pattern or re.escape(new_pattern) != new_pattern:
+        return False
+    return old_pattern.lower() in new_pattern.lower()
+
+
+def _move_slice(sequence, first, last, dest_row):
+    """Move sequence[first:last + 1] before dest_row, the same way as QAbstractItemModel.beginMoveRows."""
+    moved = sequence[first : last + 1]
+    del sequence[first : last + 1]
+    insert_row = dest_row - len(moved) if dest_row > first else dest_row
+    sequence[insert_row:insert_row] = moved
+
+
+def _longest_increasing_subsequence(sequence):
+    """Return the positions of a longest strictly increasing subsequence of sequence, in O(n log n)."""
+    tail_values = []
+    tail_positions = []
+    previous = [-1] * len(sequence)
+    for position, value in enumerate(sequence):
+        length = bisect.bisect_left(tail_values, value)
+        if length == len(tail_values):
+            tail_values.append(value)
+            tail_positions.append(position)
+        else:
+            tail_values[length] = value
+            tail_positions[length] = position
+        previous[position] = tail_positions[length - 1] if length else -1
+    result = []
+    position = tail_positions[-1] if tail_positions else -1
+    while position != -1:
+        result.append(position)
+        position = previous[position]
+    result.reverse()
+    return result
+
+
+def _plan_row_moves(target_rows):
+    """
+    Plan the moves putting the rows in a new order, moving as few rows as possible in O(n log n):
+    the rows of a longest increasing subsequence stay, each other row is moved once right after the row
+    before it in the new order, the rows contiguous in both orders are moved together.
+    :param target_rows: list, the new row of each current row, a permutation of range(len(target_rows))
+    :return: list of (first, last, dest_row) in the way of beginMoveRows, to apply one after another
+    """
+    count = len(target_rows)
+    source_rows = [0] * count
+    for row, target_row in enumerate(target_rows):
+        source_rows[target_row] = row
+    lis_rows = _longest_increasing_subsequence(target_rows)
+    is_fixed = bytearray(count)
+    for row in lis_rows:
+        is_fixed[target_rows[row]] = 1
+    # 任何时候列表都是: 移到最前面的行，[不动的行，移到它后面的行，还没移动的行] x len(lis_rows)
+    # 给每一行移动前后的位置按这个顺序编号，用树状数组算出它当前的行号
+    placed_ranks = [0] * count
+    unplaced_ranks = [0] * count
+    rank = 0
+    lis_targets = [target_rows[row] for row in lis_rows]
+    for group in range(-1, len(lis_rows)):
+        target_end = lis_targets[group + 1] if group + 1 < len(lis_rows) else count
+        for target_row in range(lis_targets[group] if group >= 0 else 0, target_end):
+            placed_ranks[target_row] = rank
+            rank += 1
+        row_end = lis_rows[group + 1] if group + 1 < len(lis_rows) else count
+        for row in range(lis_rows[group] + 1 if group >= 0 else 0, row_end):
+            unplaced_ranks[row] = rank
+            rank += 1
+    tree = [0] * (rank + 1)
+
+    def _add(rank, delta):
+        rank += 1
+        while rank < len(tree):
+            tree[rank] += delta
+            rank += rank & -rank
+
+    def _current_row(rank):
+        result = 0
+        while rank > 0:
+            result += tree[rank]
+            rank -= rank & -rank
+        return result
+
+    for target_row in range(count):
+        if is_fixed[target_row]:
+            _add(placed_ranks[target_row], 1)
+        else:
+            _add(unplaced_ranks[source_rows[target_row]], 1)
+    moves = []
+    target_row = 0
+    while target_row < count:
+        if is_fixed[target_row]:
+            target_row += 1
+            continue
+        end = target_row + 1
+        while end < count and not is_fixed[end] and source_rows[end] == source_rows[end - 1] + 1:
+            end += 1
+        first = _current_row(unplaced_ranks[source_rows[target_row]])
+        dest_row = _current_row(placed_ranks[target_row - 1]) + 1 if target_row else 0
+        if dest_row != first:
+            moves.append((first, first + end - target_row - 1, dest_row))
+        for row in range(target_row, end):
+            _add(unplaced_ranks[source_rows[row]], -1)
+            _add(placed_ranks[row], 1)
+        target_row = end
+    return moves
+
+
+def make_key_array(values, key_func):
+    """Return a NumPy float array of key_func applied to each value, NaN where it returns None."""
+    return np.array([np.nan if key is None else key for key in map(key_func, values)], dtype=float)
+
+
+def rank_key_array(key_array):
+    """
+    Return the rank of each key of a float array of sort keys in ascending order, NaN (no value) first,
+    the same keys share one rank, the ranks of the distinct keys follow each other from 0.
+    :param key_array: NumPy float array, one key for each row
+    :return: list of int
+    """
+    is_empty = np.isnan(key_array)
+    # 先按有没有值，再按值排序；lexsort 是稳定的
+    row_order = np.lexsort((np.where(is_empty, 0.0, key_array), ~is_empty))
+    sorted_keys = key_array[row_order]
+    sorted_empty = is_empty[row_order]
+    is_new_key = np.ones(len(row_order), dtype=bool)
+    is_new_key[1:] = (sorted_keys[1:] != sorted_keys[:-1]) & ~(sorted_empty[1:] & sorted_empty[:-1])
+    ranks = np.empty(len(row_order), dtype=np.int64)
+    ranks[row_order] = np.cumsum(is_new_key) - 1
+    return ranks.tolist()
+
+
+def _check_state_int(state):
+    """Qt.CheckState, int or None -> 0/1/2"""
+    if state is None:
+        return 0
+    return state.value if hasattr(state, "value") else int(state)
+
+
+def _group_ranges(rows):
+    """Group row numbers into sorted contiguous ranges, [1, 2, 3, 7] -> [(1, 3), (7, 7)]."""
+    result = []
+    for row in sorted(set(rows)):
+        if result and result[-1][1] == row - 1:
+            result[-1] = (result[-1][0], row)
+        else:
+            result.append((row, row))
+    return result
+
+
+def get_header_flags(attr_dict, flags):
+    """Add the item flags configured in the header of one column."""
+    if attr_dict.get("checkable", False):
+        flags |= QtCore.Qt.ItemIsUserCheckable
+    if attr_dict.get("selectable", False):
+        flags |= QtCore.Qt.ItemIsEditable
+    if attr_dict.get("editable", False):
+        flags |= QtCore.Qt.ItemIsEditable
+    if attr_dict.get("draggable", False):
+        flags |= QtCore.Qt.ItemIsDragEnabled
+    if attr_dict.get("droppable", False):
+        flags |= QtCore.Qt.ItemIsDropEnabled
+    return QtCore.Qt.ItemFlags(flags)
+
 
 class MTableModel(QtCore.QAbstractItemModel):
     def __init__(self, parent=None):
@@ -51,28 +373,396 @@ class MTableModel(QtCore.QAbstractItemModel):
         self.origin_count = 0
         self.root_item = {"name": "root", "children": []}
         self.data_generator = None
+        self._pending_rows = []
         self.header_list = []
+        self._role_getters = []
+        self.fetch_batch_size = 200
+        self.auto_fetch = True
         self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.fetchMore)
+        self.timer.timeout.connect(self._slot_fetch_timeout)
+        # id(节点) -> [节点的 QPersistentModelIndex, children 迭代器, 等待插入的行]
+        self._lazy_children = {}
+        self._value_cache = None
+        self._cache_max_size = 0
+        self._cache_size = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # id(节点) -> [父节点, 在父节点 children 中的位置]，行号原地更新，重排大量的行时不会新建对象
+        # 顶层的行只记录行号，int 不被垃圾回收跟踪，几十万行也不会拖慢 gc
+        # 由 model 自己持有，不往用户的数据对象上写 _parent，也就不会产生循环引用
+        self._node_map = {}
+        # 批量操作时，推迟到最后再统一更新 _node_map: id(父节点) -> (父节点, 起始行)
+        self._deferred_rows = None
+        # key 的值 -> 行对象，为 None 时在下次查找时重建
+        self._key_attr = None
+        self._key_index = None
+        # id(节点) -> {key_checked: [选中的子节点数, 半选的子节点数]}，按需创建
+        self._check_counts = {}
+        # _set_check_state 自己发的 dataChanged 不清计数，它会增量更新
+        self._setting_check_state = False
+        # append 的行先缓存 append_delay 毫秒再一起插入，None 表示马上插入
+        self.append_delay = None
+        self._append_buffer = []
+        self._append_timer = QtCore.QTimer(self)
+        self._append_timer.setSingleShot(True)
+        self._append_timer.timeout.connect(self.flush_appends)
+        # 先于 view 连接，保证 view 访问之前缓存和索引都已经更新
+        self.dataChanged.connect(self._slot_data_changed)
+        self.modelReset.connect(self._slot_model_reset)
+        self.rowsAboutToBeRemoved.connect(self._slot_rows_about_to_be_removed)
+        self.rowsRemoved.connect(self._slot_rows_changed)
+        self.rowsInserted.connect(self._slot_rows_inserted)
+        self.rowsMoved.connect(self._slot_rows_moved)
 
     def set_header_list(self, header_list):
+        """Set the header config, it is compiled once here so that data() is a table lookup."""
         self.header_list = header_list
+        self._role_getters = compile_header_list(header_list)
+        self.invalidate_rows()
+
+    def enable_value_cache(self, enable, max_size=200000):
+        """
+        Cache the formatted value of each (row, column, role), so the formatters in header_list
+        are not run again on every repaint, hover or filter.
+        The least recently used rows are dropped when more than max_size values are cached.
+        Values are invalidated by dataChanged, row removal and model reset.
+        Call invalidate_rows when the row objects are changed outside of the model.
+        """
+        self._value_cache = OrderedDict() if enable else None
+        self._cache_max_size = max_size
+        self._cache_size = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def invalidate_rows(self, data_list=None):
+        """
+        Drop the cached values of the given row objects.
+        :param data_list: list of row object, None means all rows.
+        """
+        if self._value_cache is None:
+            return
+        if data_list is None:
+            self._value_cache.clear()
+            self._cache_size = 0
+            return
+        for data_obj in data_list:
+            row_cache = self._value_cache.pop(id(data_obj), None)
+            if row_cache is not None:
+                self._cache_size -= len(row_cache)
+
+    def cache_stats(self):
+        """Return the hit/miss counts and the size of the value cache."""
+        return {
+            "enabled": self._value_cache is not None,
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "size": self._cache_size,
+            "max_size": self._cache_max_size,
+        }
+
+    def _cached_value(self, data_obj, column, role, getter):
+        cache = self._value_cache
+        row_cache = cache.get(id(data_obj))
+        if row_cache is None:
+            row_cache = cache[id(data_obj)] = {}
+        else:
+            cache.move_to_end(id(data_obj))
+        value = row_cache.get((column, role), _MISSING)
+        if value is not _MISSING:
+            self._cache_hits += 1
+            return value
+        self._cache_misses += 1
+        value = row_cache[(column, role)] = getter(data_obj)
+        self._cache_size += 1
+        while self._cache_size > self._cache_max_size and cache:
+            _, old_row_cache = cache.popitem(last=False)
+            self._cache_size -= len(old_row_cache)
+        return value
+
+    def set_key_index(self, key):
+        """
+        Keep a hash index of the rows by the value of key, so row_for_key/index_for_key are O(1).
+        The index is kept current through insert, remove, reset and setData.
+        Call invalidate_key_index when the key of a row is changed outside of the model.
+        :param key: the attr identifying a row, None to drop the index.
+        :return: None
+        """
+        self._key_attr = key
+        self._key_index = None
+
+    def invalidate_key_index(self):
+        """Rebuild the key index at the next lookup."""
+        self._key_index = None
+
+    def _get_key_index(self):
+        if self._key_index is None:
+            self._key_index = {}
+            self._add_key_index(self.root_item["children"])
+        return self._key_index
+
+    def _add_key_index(self, data_list):
+        if self._key_index is None:
+            return
+        key_attr = self._key_attr
+        for data_obj in self._iter_subtree(data_list):
+            self._key_index[get_obj_value(data_obj, key_attr)] = data_obj
+
+    def _remove_key_index(self, data_list):
+        if self._key_index is None:
+            return
+        key_attr = self._key_attr
+        for data_obj in data_list:
+            data_key = get_obj_value(data_obj, key_attr)
+            if self._key_index.get(data_key) is data_obj:
+                del self._key_index[data_key]
+
+    def item_for_key(self, key_value):
+        """Return the row object whose key is key_value, None if not found."""
+        if self._key_attr is None:
+            raise ValueError("Call set_key_index first")
+        return self._get_key_index().get(key_value)
+
+    def row_for_key(self, key_value):
+        """
+        Return the row of the object whose key is key_value under its parent, -1 if not found.
+        :param key_value: the value of the key set by set_key_index
+        :return: int
+        """
+        data_obj = self.item_for_key(key_value)
+        if data_obj is None:
+            return -1
+        _, row = self._locate(data_obj)
+        return -1 if row is None else row
+
+    def index_for_key(self, key_value, column=0):
+        """
+        Return the QModelIndex of the object whose key is key_value, invalid if not found.
+        :param key_value: the value of the key set by set_key_index
+        :param column: int
+        :return: QModelIndex
+        """
+        data_obj = self.item_for_key(key_value)
+        if data_obj is None:
+            return QtCore.QModelIndex()
+        return self._index_of_item(data_obj, column)
+
+    def _iter_subtree(self, data_list):
+        for data_obj in data_list:
+            yield data_obj
+            children = get_obj_value(data_obj, "children")
+            if isinstance(children, list):
+                for sub_obj in self._iter_subtree(children):
+                    yield sub_obj
+
+    @QtCore.Slot(QtCore.QModelIndex, QtCore.QModelIndex)
+    def _slot_data_changed(self, top_left, bottom_right, roles=None):
+        if top_left is None or not top_left.isValid() or bottom_right is None or not bottom_right.isValid():
+            self._check_counts.clear()
+            self.invalidate_rows()
+            return
+        parent_index = top_left.parent()
+        if not self._setting_check_state:
+            # 行的数据在外面改过，父节点的勾选计数可能过期
+            self._check_counts.pop(id(self._get_item(parent_index)), None)
+        if self._value_cache is None:
+            return
+        self.invalidate_rows(
+            [
+                self.index(row, 0, parent_index).internalPointer()
+                for row in range(top_left.row(), bottom_right.row() + 1)
+            ]
+        )
+
+    @QtCore.Slot()
+    def _slot_model_reset(self):
+        self._node_map.clear()
+        self._lazy_children.clear()
+        self._key_index = None
+        self._check_counts.clear()
+        self.invalidate_rows()
+
+    @QtCore.Slot(QtCore.QModelIndex, int, int)
+    def _slot_rows_about_to_be_removed(self, parent_index, first, last):
+        parent_item = self._get_item(parent_index)
+        children = get_obj_value(parent_item, "children")
+        self._check_counts.pop(id(parent_item), None)
+        # 删掉的对象的 id 可能被新对象复用，子节点也要一起清掉
+        data_list = list(self._iter_subtree(children[first : last + 1]))
+        for data_obj in data_list:
+            self._node_map.pop(id(data_obj), None)
+            self._lazy_children.pop(id(data_obj), None)
+            self._check_counts.pop(id(data_obj), None)
+        self._remove_key_index(data_list)
+        self.invalidate_rows(data_list)
+
+    @QtCore.Slot(QtCore.QModelIndex, int, int)
+    def _slot_rows_inserted(self, parent_index, first, last):
+        parent_item = self._get_item(parent_index)
+        children = get_obj_value(parent_item, "children")
+        self._check_counts.pop(id(parent_item), None)
+        self._add_key_index(children[first : last + 1])
+        self._slot_rows_changed(parent_index, first, last)
+
+    @QtCore.Slot(QtCore.QModelIndex, int, int)
+    def _slot_rows_changed(self, parent_index, first, last):
+        parent_item = self._get_item(parent_index)
+        if self._deferred_rows is None:
+            self._update_node_map(parent_item, first)
+            return
+        _, old_first = self._deferred_rows.get(id(parent_item), (None, first))
+        self._deferred_rows[id(parent_item)] = (parent_item, min(first, old_first))
+
+    @contextlib.contextmanager
+    def _defer_node_map(self):
+        """Update _node_map once after a batch of row changes instead of after each of them."""
+        if self._deferred_rows is not None:
+            yield
+            return
+        self._deferred_rows = {}
+        try:
+            yield
+        finally:
+            deferred_rows, self._deferred_rows = self._deferred_rows, None
+            for parent_item, first in deferred_rows.values():
+                self._update_node_map(parent_item, first)
+
+    @QtCore.Slot(QtCore.QModelIndex, int, int, QtCore.QModelIndex, int)
+    def _slot_rows_moved(self, source_parent, first, last, dest_parent, dest_row):
+        if source_parent == dest_parent:
+            self._slot_rows_changed(source_parent, min(first, dest_row), last)
+        else:
+            self._check_counts.pop(id(self._get_item(source_parent)), None)
+            self._check_counts.pop(id(self._get_item(dest_parent)), None)
+            self._slot_rows_changed(source_parent, first, last)
+            self._slot_rows_changed(dest_parent, dest_row, dest_row)
+
+    def _get_item(self, index):
+        if index is not None and index.isValid():
+            return index.internalPointer()
+        return self.root_item
+
+    def _update_node_map(self, parent_item, start=0):
+        """Record the parent and the row of the children of parent_item, start from the given row."""
+        children = get_obj_value(parent_item, "children")
+        if children is None or is_lazy_children(children):
+            return
+        node_map = self._node_map
+        if parent_item is self.root_item:
+            for row in range(start, len(children)):
+                node_map[id(children[row])] = row
+            return
+        for row in range(start, len(children)):
+            node = node_map.get(id(children[row]))
+            if node.__class__ is list and node[0] is parent_item:
+                node[1] = row
+            else:
+                node_map[id(children[row])] = [parent_item, row]
+
+    def _get_node(self, data_obj):
+        """Return the recorded (parent_item, row) of data_obj, None if it isn't recorded."""
+        node = self._node_map.get(id(data_obj))
+        if node.__class__ is int:
+            return self.root_item, node
+        return node
+
+    def _row_of(self, data_obj, parent_item, row):
+        """Return the row of data_obj under parent_item, fallback to a scan if the cached row is outdated."""
+        children = get_obj_value(parent_item, "children")
+        if row >= len(children) or children[row] is not data_obj:
+            # 列表在 model 之外被修改过，重新记录
+            row = children.index(data_obj)
+            self._update_node_map(parent_item)
+        return row
+
+    def _locate(self, data_obj):
+        """
+        Find the parent and the row of data_obj by identity, in O(1) with _node_map.
+        :return: (parent_item, row), (None, None) if data_obj is not in the model.
+        """
+        node = self._get_node(data_obj)
+        if node is not None:
+            parent_item, row = node
+            children = get_obj_value(parent_item, "children")
+            if row < len(children) and children[row] is data_obj:
+                return parent_item, row
+        # 没有被记录过的行，把已加载的整棵树记录一次
+        self._update_node_map(self.root_item)
+        for parent_item in self._iter_subtree(self.root_item["children"]):
+            self._update_node_map(parent_item)
+        node = self._get_node(data_obj)
+        if node is not None:
+            parent_item, row = node
+            if get_obj_value(parent_item, "children")[row] is data_obj:
+                return parent_item, row
+        return None, None
+
+    def _index_of_item(self, data_obj, column=0):
+        if data_obj is self.root_item:
+            return QtCore.QModelIndex()
+        _, row = self._locate(data_obj)
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, data_obj)
+
+    def get_parent(self, data_obj):
+        """Return the parent row object of data_obj, None for the top level rows."""
+        parent_item, _ = self._get_node(data_obj) or (None, None)
+        if parent_item is self.root_item:
+            return None
+        return parent_item
+
+    def set_fetch_batch_size(self, size):
+        """Set how many rows are pulled from a streaming data source per fetch."""
+        self.fetch_batch_size = max(1, int(size))
+
+    def set_fetch_interval(self, msec):
+        """Set the interval of the timer which keeps pulling a streaming data source."""
+        self.timer.setInterval(msec)
+
+    def set_auto_fetch(self, flag):
+        """
+        Whether the timer should keep pulling a streaming data source until it is exhausted.
+        If False, rows are only fetched when the view asks for them through canFetchMore/fetchMore.
+        """
+        self.auto_fetch = flag
+        if not flag:
+            self.timer.stop()
+        elif self.canFetchMore(QtCore.QModelIndex()) or self._lazy_children:
+            self.timer.start()
 
     def set_data_list(self, data_list):
-        if hasattr(data_list, "next"):
+        """
+        Set the rows of the model.
+        data_list can be a list, or any iterator/generator. An iterator is consumed in batches
+        of fetch_batch_size rows, each batch is inserted without resetting the model.
+        If the iterator yields list or tuple, each of them is treated as a chunk of rows.
+        A list is kept as it is: append and remove change it, but reorder_rows puts the rows in a new list
+        and leaves the order of the given list alone.
+        """
+        self.timer.stop()
+        self.data_generator = None
+        self._pending_rows = []
+        self._reset_appends()
+        if isinstance(data_list, Iterator):
             self.beginResetModel()
             self.root_item["children"] = []
             self.endResetModel()
             self.data_generator = data_list
             self.origin_count = 0
-            self.timer.start()
+            # fill the first screen right away, stream the rest
+            self.fetchMore()
+            if self.auto_fetch and self.canFetchMore(QtCore.QModelIndex()):
+                self.timer.start()
         else:
             self.beginResetModel()
             self.root_item["children"] = data_list if data_list is not None else []
             self.endResetModel()
-            self.data_generator = None
 
     def clear(self):
+        self.timer.stop()
+        self.data_generator = None
+        self._pending_rows = []
+        self._reset_appends()
         self.beginResetModel()
         self.root_item["children"] = []
         self.endResetModel()
@@ -80,31 +770,263 @@ class MTableModel(QtCore.QAbstractItemModel):
     def get_data_list(self):
         return self.root_item["children"]
 
+    def set_append_delay(self, msec):
+        """
+        Keep the rows given to append for msec milliseconds and insert them all at once,
+        so the rows streaming in within one frame cost a single insertion.
+        :param msec: int, 0 to insert them on the next event loop turn, None to insert each row right away.
+        """
+        self.append_delay = msec
+        if msec is None:
+            self.flush_appends()
+
+    def flush_appends(self):
+        """Insert the rows kept by append now, see set_append_delay."""
+        self._append_timer.stop()
+        data_list, self._append_buffer = self._append_buffer, []
+        self.append_many(data_list)
+
+    def _reset_appends(self):
+        # 缓存的行属于旧的数据
+        self._append_timer.stop()
+        self._append_buffer = []
+
     def append(self, data_dict):
-        self.root_item["children"].append(data_dict)
-        self.fetchMore()
+        if self.append_delay is None:
+            self.append_many([data_dict])
+            return
+        self._append_buffer.append(data_dict)
+        if not self._append_timer.isActive():
+            self._append_timer.start(self.append_delay)
+
+    def append_many(self, data_list, parent_index=None):
+        """
+        Append rows at the end of the model, or of the given parent, with a single rowsInserted.
+        The rows kept by append are inserted first, see set_append_delay.
+        """
+        data_list = list(data_list)
+        if parent_index is None:
+            parent_index = QtCore.QModelIndex()
+        if self._append_buffer and not parent_index.isValid():
+            # 保持和之前缓存的行的先后顺序
+            data_list = self._append_buffer + data_list
+            self._append_buffer = []
+            self._append_timer.stop()
+        if not data_list:
+            return
+        children = get_obj_value(self._get_item(parent_index), "children")
+        start = len(children)
+        self.beginInsertRows(parent_index, start, start + len(data_list) - 1)
+        children.extend(data_list)
+        self.endInsertRows()
+
+    def update_data_list(self, data_list, key="id"):
+        """
+        Update the top level rows to data_list without resetting the model.
+        Rows are matched by the given key, only the difference is emitted:
+        rowsRemoved/rowsMoved/rowsInserted and dataChanged, grouped into contiguous ranges,
+        so the selection, the scroll position and the expanded state are kept.
+        A row equal to its new version keeps the old object,
+        a changed row with children is removed and inserted again.
+        :param data_list: list of the new rows
+        :param key: the attr identifying a row
+        :return: None
+        """
+        self.timer.stop()
+        self.data_generator = None
+        self._pending_rows = []
+        self._reset_appends()
+        data_list = list(data_list)
+        new_map = {}
+        for data_obj in data_list:
+            data_key = get_obj_value(data_obj, key)
+            if data_key in new_map:
+                raise ValueError("Duplicate key {!r} in data_list".format(data_key))
+            new_map[data_key] = data_obj
+
+        with self._defer_node_map():
+            self._apply_data_list_diff(data_list, new_map, key)
+
+    def _apply_data_list_diff(self, data_list, new_map, key):
+        parent_index = QtCore.QModelIndex()
+        children = self.root_item["children"]
+        # 1. 删除：新数据里没有的、重复的、以及有 children 且变化了的行
+        kept_map = {}
+        remove_rows = []
+        for row, old_obj in enumerate(children):
+            data_key = get_obj_value(old_obj, key)
+            new_obj = new_map.get(data_key, _MISSING)
+            if (
+                new_obj is _MISSING
+                or data_key in kept_map
+                or (old_obj != new_obj and (_has_children(old_obj) or _has_children(new_obj)))
+            ):
+                remove_rows.append(row)
+            else:
+                kept_map[data_key] = old_obj
+        self._remove_rows(parent_index, remove_rows)
+
+        # 2. 移动：把保留下来的行排成新数据中的顺序，最长递增子序列里的行不动，连续的一段一起移动
+        target_row_map = {}
+        for data_key in new_map:
+            if data_key in kept_map:
+                target_row_map[id(kept_map[data_key])] = len(target_row_map)
+        for first, last, dest_row in _plan_row_moves([target_row_map[id(old_obj)] for old_obj in children]):
+            self.beginMoveRows(parent_index, first, last, parent_index, dest_row)
+            _move_slice(children, first, last, dest_row)
+            self.endMoveRows()
+
+        # 3. 插入：新增的行，连续的一段一起插入
+        row = 0
+        while row < len(data_list):
+            if get_obj_value(data_list[row], key) in kept_map:
+                row += 1
+                continue
+            first = row
+            while row < len(data_list) and get_obj_value(data_list[row], key) not in kept_map:
+                row += 1
+            self.beginInsertRows(parent_index, first, row - 1)
+            children[first:first] = data_list[first:row]
+            self.endInsertRows()
+
+        # 4. 更新：内容变化了的行换成新对象
+        replaced_map = {}
+        changed_rows = []
+        for row, new_obj in enumerate(data_list):
+            old_obj = children[row]
+            if old_obj is new_obj or old_obj == new_obj:
+                continue
+            children[row] = new_obj
+            replaced_map[id(old_obj)] = new_obj
+            changed_rows.append(row)
+            self._node_map.pop(id(old_obj), None)
+            self._check_counts.pop(id(old_obj), None)
+            self.invalidate_rows([old_obj])
+            self._node_map[id(new_obj)] = row
+            self._remove_key_index([old_obj])
+            self._add_key_index([new_obj])
+        if replaced_map:
+            for persistent_index in self.persistentIndexList():
+                new_obj = replaced_map.get(id(persistent_index.internalPointer()))
+                if new_obj is not None and not persistent_index.parent().isValid():
+                    self.changePersistentIndex(
+                        persistent_index,
+                        self.createIndex(persistent_index.row(), persistent_index.column(), new_obj),
+                    )
+        last_column = max(self.columnCount() - 1, 0)
+        for first, last in _group_ranges(changed_rows):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
+    def _remove_rows(self, parent_index, rows):
+        """Remove the given rows under parent_index, one beginRemoveRows for each contiguous range."""
+        children = get_obj_value(self._get_item(parent_index), "children")
+        for first, last in reversed(_group_ranges(rows)):
+            self.beginRemoveRows(parent_index, first, last)
+            del children[first : last + 1]
+            self.endRemoveRows()
 
     def remove(self, data_dict):
-        row = self.root_item["children"].index(data_dict)
-        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
-        self.root_item["children"].remove(data_dict)
-        self.endRemoveRows()
+        self.remove_rows([data_dict])
+
+    def remove_rows(self, rows):
+        """
+        Remove many rows at once, one beginRemoveRows for each contiguous range.
+        :param rows: list of top level row number, or row object at any level, found by identity,
+                     else by equality in the top level rows like list.remove.
+        :return: None
+        :raise IndexError: a row number is out of range, nothing is removed.
+        """
+        group_map = {}
+        row_count = self.rowCount()
+        for row in rows:
+            if isinstance(row, int):
+                # 先检查完所有的行再开始删除，负数不当成从末尾数
+                if not 0 <= row < row_count:
+                    raise IndexError("The row {} to remove is out of range".format(row))
+                parent_item = self.root_item
+            else:
+                data_obj = row
+                parent_item, row = self._locate(data_obj)
+                if parent_item is None:
+                    # 不是模型里的对象，和以前一样按相等查找顶层的行
+                    parent_item = self.root_item
+                    children = self.get_data_list()
+                    if data_obj not in children:
+                        raise ValueError("The row to remove is not in the model")
+                    row = children.index(data_obj)
+            group_map.setdefault(id(parent_item), (parent_item, []))[1].append(row)
+        with self._defer_node_map():
+            for parent_item, row_list in group_map.values():
+                parent_index = self._index_of_item(parent_item)
+                if parent_item is self.root_item or parent_index.isValid():
+                    self._remove_rows(parent_index, row_list)
+
+    def get_key_array(self, key, key_func):
+        """
+        Return a NumPy float array of key_func applied to the value of key of each top level row,
+        NaN where it returns None, to sort by this column with NumPy.
+        :param key: the attr of the rows
+        :param key_func: callable receive a value, return a number or None, like numeric_sort_key
+        :return: None without numpy, or if some rows have children, they can't be sorted as one array.
+        """
+        data_list = self.root_item["children"]
+        if np is None or any(map(_has_children, data_list)):
+            return None
+        return make_key_array(map(_make_value_getter(key), data_list), key_func)
+
+    def get_child_counts(self, parent_index=None):
+        """Return the list of the rowCount under each child of parent_index, without making their indexes."""
+        children = get_obj_value(self._get_item(parent_index), "children")
+        if children is None or is_lazy_children(children):
+            return []
+        result = []
+        for data_obj in children:
+            sub_children = get_obj_value(data_obj, "children")
+            result.append(0 if sub_children is None or is_lazy_children(sub_children) else len(sub_children))
+        return result
+
+    def reorder_rows(self, order, parent_index=None):
+        """
+        Put the children of parent_index in a new order with a single layoutChanged, like sorting them.
+        The persistent indexes, so the selection and the current index, follow their rows.
+        :param order: list of row number, the new row n is the old row order[n]
+        :param parent_index: QModelIndex, None for the top level rows
+        :return: None
+        """
+        if parent_index is None:
+            parent_index = QtCore.QModelIndex()
+        parent_item = self._get_item(parent_index)
+        children = get_obj_value(parent_item, "children")
+        if children is None or is_lazy_children(children) or sorted(order) != list(range(len(children))):
+            raise ValueError("order is not a permutation of the rows of the parent")
+        new_rows = [0] * len(order)
+        for new_row, old_row in enumerate(order):
+            new_rows[old_row] = new_row
+        self.layoutAboutToBeChanged.emit()
+        if parent_index.isValid():
+            children[:] = [children[row] for row in order]
+        else:
+            # 顶层换一个新的 list，set_data_list 传进来的 list 保持原来的顺序
+            self.root_item["children"] = [children[row] for row in order]
+        old_index_list = []
+        new_index_list = []
+        for persistent_index in self.persistentIndexList():
+            if persistent_index.parent() == parent_index:
+                old_index_list.append(persistent_index)
+                new_index_list.append(
+                    self.createIndex(
+                        new_rows[persistent_index.row()], persistent_index.column(), persistent_index.internalPointer()
+                    )
+                )
+        self.changePersistentIndexList(old_index_list, new_index_list)
+        self._update_node_map(parent_item)
+        self.layoutChanged.emit()
 
     def flags(self, index):
         result = QtCore.QAbstractItemModel.flags(self, index)
         if not index.isValid():
             return QtCore.Qt.ItemIsEnabled
-        if self.header_list[index.column()].get("checkable", False):
-            result |= QtCore.Qt.ItemIsUserCheckable
-        if self.header_list[index.column()].get("selectable", False):
-            result |= QtCore.Qt.ItemIsEditable
-        if self.header_list[index.column()].get("editable", False):
-            result |= QtCore.Qt.ItemIsEditable
-        if self.header_list[index.column()].get("draggable", False):
-            result |= QtCore.Qt.ItemIsDragEnabled
-        if self.header_list[index.column()].get("droppable", False):
-            result |= QtCore.Qt.ItemIsDropEnabled
-        return QtCore.Qt.ItemFlags(result)
+        return get_header_flags(self.header_list[index.column()], result)
 
     def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
         if orientation == QtCore.Qt.Vertical:
@@ -116,16 +1038,28 @@ class MTableModel(QtCore.QAbstractItemModel):
         return None
 
     def index(self, row, column, parent_index=None):
-        if parent_index and parent_index.isValid():
+        # QSortFilterProxyModel 排序时每次比较都会调用两次，要尽量快
+        if parent_index is not None and parent_index.isValid():
             parent_item = parent_index.internalPointer()
+            children_list = get_obj_value(parent_item, "children")
         else:
             parent_item = self.root_item
-
-        children_list = get_obj_value(parent_item, "children")
-        if children_list and len(children_list) > row:
+            children_list = parent_item["children"]
+        if (
+            children_list
+            and (children_list.__class__ is list or not is_lazy_children(children_list))
+            and len(children_list) > row
+        ):
             child_item = children_list[row]
             if child_item:
-                set_obj_value(child_item, "_parent", parent_item)
+                node = self._node_map.get(id(child_item))
+                if parent_item is self.root_item:
+                    if node != row:
+                        self._node_map[id(child_item)] = row
+                elif node.__class__ is not list or node[0] is not parent_item:
+                    self._node_map[id(child_item)] = [parent_item, row]
+                elif node[1] != row:
+                    node[1] = row
                 return self.createIndex(row, column, child_item)
         return QtCore.QModelIndex()
 
@@ -133,17 +1067,16 @@ class MTableModel(QtCore.QAbstractItemModel):
         if not index.isValid():
             return QtCore.QModelIndex()
 
-        child_item = index.internalPointer()
-        parent_item = get_obj_value(child_item, "_parent")
-
-        if parent_item is None:
+        node = self._node_map.get(id(index.internalPointer()))
+        if node.__class__ is not list:
             return QtCore.QModelIndex()
 
-        grand_item = get_obj_value(parent_item, "_parent")
-        if grand_item is None:
+        parent_item = node[0]
+        parent_node = self._get_node(parent_item)
+        if parent_node is None:
             return QtCore.QModelIndex()
-        parent_list = get_obj_value(grand_item, "children")
-        return self.createIndex(parent_list.index(parent_item), 0, parent_item)
+        grand_item, row = parent_node
+        return self.createIndex(self._row_of(parent_item, grand_item, row), 0, parent_item)
 
     def rowCount(self, parent_index=None):
         if parent_index and parent_index.isValid():
@@ -151,7 +1084,7 @@ class MTableModel(QtCore.QAbstractItemModel):
         else:
             parent_item = self.root_item
         children_obj = get_obj_value(parent_item, "children")
-        if hasattr(children_obj, "next") or (children_obj is None):
+        if children_obj is None or is_lazy_children(children_obj):
             return 0
         else:
             return len(children_obj)
@@ -164,61 +1097,204 @@ class MTableModel(QtCore.QAbstractItemModel):
         children_obj = get_obj_value(parent_data, "children")
         if children_obj is None:
             return False
-        if hasattr(children_obj, "next"):
+        if is_lazy_children(children_obj) or id(parent_data) in self._lazy_children:
             return True
         else:
-            return len(children_obj)
+            return bool(children_obj)
 
     def columnCount(self, parent_index=None):
         return len(self.header_list)
 
     def canFetchMore(self, index):
-        try:
-            if self.data_generator:
-                data = self.data_generator.next()
-                self.root_item["children"].append(data)
-                return True
-            return False
-        except StopIteration:
-            if self.timer.isActive():
-                self.timer.stop()
-            return False
+        if index is not None and index.isValid():
+            item = index.internalPointer()
+            return id(item) in self._lazy_children or is_lazy_children(get_obj_value(item, "children"))
+        return self.data_generator is not None or bool(self._pending_rows)
 
     def fetchMore(self, index=None):
-        self.beginResetModel()
-        self.endResetModel()
+        if index is not None and index.isValid():
+            self._fetch_children(index)
+            return
+        batch, self._pending_rows, exhausted = self._pull_batch(self.data_generator, self._pending_rows)
+        if exhausted:
+            self.data_generator = None
+        if not self.canFetchMore(QtCore.QModelIndex()) and not self._lazy_children:
+            self.timer.stop()
+        self.origin_count += len(batch)
+        self.append_many(batch)
+
+    def _get_check_counts(self, data_obj, key):
+        """Return [checked count, partially checked count] of the children of data_obj, counted once."""
+        node_counts = self._check_counts.setdefault(id(data_obj), {})
+        counts = node_counts.get(key)
+        if counts is None:
+            states = [_check_state_int(get_obj_value(sub_obj, key)) for sub_obj in get_obj_value(data_obj, "children")]
+            counts = node_counts[key] = [states.count(2), states.count(1)]
+        return counts
+
+    def _set_check_state(self, index, key, value):
+        """
+        Set the check state of index, all its descendants and its ancestors.
+        Descendants are updated in one pass with one dataChanged per parent,
+        ancestors are updated from the checked-child counters in O(depth).
+        """
+        self._setting_check_state = True
+        try:
+            self._update_check_state(index, key, value)
+        finally:
+            self._setting_check_state = False
+
+    def _update_check_state(self, index, key, value):
+        column = index.column()
+        data_obj = index.internalPointer()
+        # 先拿到所有祖先的计数，之后只做增量更新
+        ancestor_list = []
+        parent_index = index.parent()
+        while parent_index.isValid():
+            parent_obj = parent_index.internalPointer()
+            self._get_check_counts(parent_obj, key)
+            ancestor_list.append((self.createIndex(parent_index.row(), column, parent_obj), parent_obj))
+            parent_index = parent_index.parent()
+
+        old_state = _check_state_int(get_obj_value(data_obj, key))
+        state = _check_state_int(value)
+        set_obj_value(data_obj, key, value)
+        self.dataChanged.emit(index, index)
+        # 半选不往下传
+        if state != 1:
+            self._set_subtree_check_state(index, key, value, state)
+
+        state_type = type(value)
+        for parent_index, parent_obj in ancestor_list:
+            if old_state == state:
+                break
+            counts = self._check_counts[id(parent_obj)][key]
+            if old_state:
+                counts[2 - old_state] -= 1
+            if state:
+                counts[2 - state] += 1
+            if counts[0] == len(get_obj_value(parent_obj, "children")):
+                parent_state = 2
+            elif counts[0] or counts[1]:
+                parent_state = 1
+            else:
+                parent_state = 0
+            old_state = _check_state_int(get_obj_value(parent_obj, key))
+            state = parent_state
+            if old_state != state:
+                set_obj_value(parent_obj, key, state_type(state))
+                self.dataChanged.emit(parent_index, parent_index)
+
+    def _set_subtree_check_state(self, index, key, value, state):
+        column = index.column()
+        node_map = self._node_map
+        check_counts = self._check_counts
+        stack = [index.internalPointer()]
+        while stack:
+            node = stack.pop()
+            children = get_obj_value(node, "children")
+            if not children or is_lazy_children(children):
+                continue
+            # 子节点从来没有通过 index() 给出去过，就没有 view 持有它们的 index，不用发 dataChanged
+            exposed = False
+            for row, sub_obj in enumerate(children):
+                if sub_obj.__class__ is dict:
+                    sub_obj[key] = value
+                    sub_children = sub_obj.get("children")
+                else:
+                    set_obj_value(sub_obj, key, value)
+                    sub_children = get_obj_value(sub_obj, "children")
+                if not exposed and id(sub_obj) in node_map:
+                    exposed = True
+                if sub_children:
+                    # 子孙节点的 index 要能找到 parent
+                    node_map[id(sub_obj)] = [node, row]
+                    stack.append(sub_obj)
+            check_counts.setdefault(id(node), {})[key] = [len(children) if state else 0, 0]
+            if not exposed:
+                continue
+            last = len(children) - 1
+            node_map[id(children[0])] = [node, 0]
+            node_map[id(children[last])] = [node, last]
+            self.dataChanged.emit(
+                self.createIndex(0, column, children[0]),
+                self.createIndex(last, column, children[last]),
+            )
+
+    def _pull_batch(self, source, batch):
+        """
+        Pull rows from source until there are fetch_batch_size rows in batch.
+        If source yields list or tuple, each of them is treated as a chunk of rows.
+        :return: (rows to insert, the rest of a big chunk for the next fetch, whether source is exhausted)
+        """
+        exhausted = source is None
+        while not exhausted and len(batch) < self.fetch_batch_size:
+            try:
+                data = next(source)
+            except StopIteration:
+                exhausted = True
+                break
+            if isinstance(data, (list, tuple)):
+                batch.extend(data)
+            else:
+                batch.append(data)
+        return batch[: self.fetch_batch_size], batch[self.fetch_batch_size :], exhausted
+
+    def _fetch_children(self, parent_index):
+        """Load the next batch of a node whose children is an iterator or a callable."""
+        item = parent_index.internalPointer()
+        lazy = self._lazy_children.get(id(item))
+        if lazy is None:
+            children = get_obj_value(item, "children")
+            if not is_lazy_children(children):
+                return
+            if not isinstance(children, Iterator):
+                children = children()
+                if not isinstance(children, Iterator):
+                    # the callable returns all the children at once, take it as one chunk
+                    children = iter([list(children or [])])
+            set_obj_value(item, "children", [])
+            lazy = self._lazy_children[id(item)] = [QtCore.QPersistentModelIndex(parent_index), children, []]
+        batch, lazy[2], exhausted = self._pull_batch(lazy[1], lazy[2])
+        if exhausted and not lazy[2]:
+            self._lazy_children.pop(id(item), None)
+        elif self.auto_fetch:
+            self.timer.start()
+        self.append_many(batch, parent_index)
+
+    @QtCore.Slot()
+    def _slot_fetch_timeout(self):
+        if self.canFetchMore(QtCore.QModelIndex()):
+            self.fetchMore()
+            return
+        for parent_index, _, _ in list(self._lazy_children.values()):
+            if parent_index.isValid():
+                self._fetch_children(QtCore.QModelIndex(parent_index))
+                return
+        self._lazy_children.clear()
+        self.timer.stop()
 
     def data(self, index, role=QtCore.Qt.DisplayRole):
         if not index.isValid():
             return None
-
-        attr_dict = self.header_list[index.column()]  # 获取该列字段的配置
-        data_obj = index.internalPointer()
-        attr = attr_dict.get("key")
-        if role in SETTING_MAP.keys():
-            role_key = SETTING_MAP[role].get("config")  # role 配置的关键字
-            formatter_from_config = attr_dict.get(role_key)  # header中该role的配置
-            if not formatter_from_config and role not in [
-                QtCore.Qt.DisplayRole,
-                QtCore.Qt.EditRole,
-                QtCore.Qt.ToolTipRole,
-            ]:
-                # 如果header中没有配置该role，而且也不是 DisplayRole/EditRole，直接返回None
+        role_getters = self._role_getters[index.column()]
+        getter = role_getters.get(role)
+        if getter is None:
+            if role.__class__ is int:
                 return None
-            else:
-                value = apply_formatter(
-                    formatter_from_config,
-                    get_obj_value(data_obj, attr),
-                    data_obj
-                )
-            formatter_from_model = SETTING_MAP[role].get("formatter", None)  # role 配置的转换函数
-            result = apply_formatter(formatter_from_model, value)
-            return result
+            # 从 Python 里用枚举调用的情况
+            role = int(role)
+            getter = role_getters.get(role)
+            if getter is None:
+                return None
+        if self._value_cache is None:
+            return getter(index.internalPointer())
+        return self._cached_value(index.internalPointer(), index.column(), role, getter)
 
-        if role == QtCore.Qt.CheckStateRole and attr_dict.get("checkable", False):
-            state = get_obj_value(data_obj, attr + "_checked")
-            return QtCore.Qt.Unchecked if state is None else state
-        return None
+    def item_data(self, data_obj, column, role=QtCore.Qt.DisplayRole):
+        """Return what data() gives for the row object data_obj in column, it doesn't need to be in the model."""
+        getter = self._role_getters[column].get(int(role))
+        return None if getter is None else getter(data_obj)
 
     def setData(self, index, value, role=QtCore.Qt.EditRole):
         if index.isValid() and role in [QtCore.Qt.CheckStateRole, QtCore.Qt.EditRole]:
@@ -226,34 +1302,13 @@ class MTableModel(QtCore.QAbstractItemModel):
             key = attr_dict.get("key")
             data_obj = index.internalPointer()
             if role == QtCore.Qt.CheckStateRole and attr_dict.get("checkable", False):
-                key += "_checked"
-                # 更新自己
-                set_obj_value(data_obj, key, value)
-                self.dataChanged.emit(index, index)
-
-                # 更新它的children
-                for row, sub_obj in enumerate(get_obj_value(data_obj, "children", [])):
-                    set_obj_value(sub_obj, key, value)
-                    sub_index = self.index(row, index.column(), index)
-                    self.dataChanged.emit(sub_index, sub_index)
-
-                # 更新它的parent
-                parent_index = index.parent()
-                if parent_index.isValid():
-                    parent_obj = parent_index.internalPointer()
-                    new_parent_value = value
-                    old_parent_value = get_obj_value(parent_obj, key)
-                    parent = get_obj_value(data_obj, "_parent")
-                    parent_children = get_obj_value(parent, "children", [])
-                    for sibling_obj in parent_children:
-                        if value != get_obj_value(sibling_obj, key):
-                            new_parent_value = 1
-                            break
-                    if new_parent_value != old_parent_value:
-                        set_obj_value(parent_obj, key, new_parent_value)
-                        self.dataChanged.emit(parent_index, parent_index)
+                self._set_check_state(index, key + "_checked", value)
             else:
+                if key == self._key_attr:
+                    self._remove_key_index([data_obj])
                 set_obj_value(data_obj, key, value)
+                if key == self._key_attr:
+                    self._add_key_index([data_obj])
                 # 采用 self.dataChanged.emit方式在houdini16里面会报错
                 # TypeError: dataChanged(QModelIndex,QModelIndex,QVector<int>) only accepts 3 arguments, 3 given!
                 # 所以临时使用旧式信号的发射方式
@@ -264,52 +1319,1266 @@ class MTableModel(QtCore.QAbstractItemModel):
             return False
 
 
+# 后台搜索结果里每一行的状态
+_ROW_REJECTED = 0
+_ROW_ACCEPTED = 1
+_ROW_UNKNOWN = 2
+# 递归筛选时每一行的状态: 自己匹配，或者有匹配的子孙；自己匹配的行不需要知道子孙
+_MATCH_SELF = 1
+_MATCH_DESCENDANT = 2
+# 分段重新筛选时还没有计算的行，筛选到它时再计算
+_MATCH_UNKNOWN = 4
+
+# 分段执行的任务每处理这么多行检查一次时间
+_SLICE_ROWS = 256
+# 分段排序先把每这么多行排好，再逐段归并
+_SORT_RUN_SIZE = 4096
+# 分段搜索超过这个时间(秒)还没完成时，先显示已经找到的行
+_PARTIAL_RESULT_DELAY = 0.3
+# 可以用 NumPy 排序的 sort_key，它们的 key 都是数字或 None
+_ARRAY_SORT_KEYS = ("numeric", "date")
+
+
+class _MSearchSignals(QtCore.QObject):
+    """Signals emitted from the search worker thread, a child of MSortFilterModel."""
+
+    sig_done = QtCore.Signal(int, object)
+
+
+class _MSearchRunnable(QtCore.QRunnable):
+    """Match the search pattern against a snapshot of the search texts in a worker thread."""
+
+    def __init__(self, signals, generation, text_lists, search_reg, candidate_mask, cancel_event):
+        super(_MSearchRunnable, self).__init__()
+        self.setAutoDelete(True)
+        self.signals = signals
+        self.generation = generation
+        self.text_lists = text_lists
+        self.search_reg = search_reg
+        self.candidate_mask = candidate_mask
+        self.cancel_event = cancel_event
+
+    def _match(self):
+        search = self.search_reg.search
+        candidate_mask = self.candidate_mask
+        row_count = len(self.text_lists[0]) if self.text_lists else 0
+        mask = bytearray(row_count)
+        for row in range(row_count):
+            if row % 4096 == 0 and self.cancel_event.is_set():
+                return None
+            if candidate_mask is not None and candidate_mask[row] == _ROW_REJECTED:
+                continue
+            for text_list in self.text_lists:
+                text = text_list[row]
+                if text is _MISSING:
+                    mask[row] = _ROW_UNKNOWN
+                elif text is not None and search(text) is not None:
+                    mask[row] = _ROW_ACCEPTED
+                    break
+        return mask
+
+    def run(self):
+        try:
+            self.signals.sig_done.emit(self.generation, self._match())
+        except RuntimeError:
+            # MSortFilterModel 已经被删除
+            pass
+        finally:
+            self.signals = None
+            self.text_lists = None
+
+
 class MSortFilterModel(QtCore.QSortFilterProxyModel):
+    sig_search_finished = QtCore.Signal()
+    sig_facet_changed = QtCore.Signal()
+
     def __init__(self, parent=None):
         super(MSortFilterModel, self).__init__(parent)
-        if hasattr(self, "setRecursiveFilteringEnabled"):
-            self.setRecursiveFilteringEnabled(True)
+        # 递归筛选: 有匹配的子孙的行也显示。不打开 Qt 自己的递归筛选，它会为祖先重复检查子树，
+        # 这里每个筛选条件下每一行只计算一次 _MATCH_XXX: {父节点的 internalId: bytearray}
+        self.recursive_filtering = True
+        self._subtree_matches = None
+        # 源模型变化让某个祖先的显示状态变了，Qt 处理完这次变化以后要重新筛选
+        self._subtree_changed = False
         self.header_list = []
         self.search_reg = None
         # self.search_reg.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
         # self.search_reg.setPatternSyntax(QtCore.QRegExp.Wildcard)
+        self._searchable_columns = []
+        self._filter_regs = []
+        # 搜索文本索引: {父节点的 internalId: {column: [每一行格式化并转小写后的文本]}}
+        # 按需计算，不需要每次搜索都去跑 formatter
+        self._search_texts = {}
+        # 逐步输入搜索时的结果栈: [(pattern, {父节点的 internalId: 匹配的行号 set})]
+        # 后一个模式都是前一个的细化，只需要在前一个的结果里继续筛选；退格时直接复用
+        self._search_history = []
+        self._search_replay_keys = set()
+        # 顶层行数不少于这个值时，在线程池里搜索，None 表示总是在 GUI 线程搜索
+        self.async_filter_threshold = None
+        self.thread_pool = QtCore.QThreadPool.globalInstance()
+        # 后台搜索的结果，每个顶层行一个 _ROW_XXX 状态
+        self._search_mask = None
+        self._search_mask_pattern = None
+        self._search_generation = 0
+        self._search_cancel_event = None
+        self._search_pending_pattern = None
+        self._search_restart = False
+        self._search_signals = _MSearchSignals(self)
+        self._search_signals.sig_done.connect(self._slot_async_search_done)
+        # 排序 key 缓存: {column: {(source row, internalId): key}}，每个单元格只计算一次
+        self._sort_key_configs = []
+        self._sort_keys = {}
+        self._collator = None
+        for signal_name in ("sortCaseSensitivityChanged", "sortLocaleAwareChanged", "sortRoleChanged"):
+            if hasattr(self, signal_name):
+                getattr(self, signal_name).connect(self.invalidate_sort_keys)
+        # 分面筛选: header_list 里 default_filter 的列，倒排索引在第一次使用时建立
+        self._facet_keys = []
+        self._facet_index = None
+        self._facet_mask = None
+        # 模糊搜索: 顶层行的 trigram 索引在第一次模糊搜索时建立
+        self.fuzzy_search = False
+        self.fuzzy_threshold = DEFAULT_FUZZY_THRESHOLD
+        self.sort_by_score = False
+        self._search_pattern = None
+        self._fuzzy_pattern = None
+        self._trigram_index = None
+        self._fuzzy_matches = None
+        # 按分数排序之前的 (sortColumn, sortOrder)，不按分数排序时是 None
+        self._score_sort_saved = None
+        # 分段执行: 搜索和排序由零间隔的 QTimer 每次在 GUI 线程执行 time_slice 毫秒，None 表示一次完成
+        self.time_slice = None
+        # 名字 -> generator，每次 next 处理一小段
+        self._slice_jobs = OrderedDict()
+        self._slice_timer = QtCore.QTimer(self)
+        self._slice_timer.setInterval(0)
+        self._slice_timer.timeout.connect(self._slot_run_slice)
+        # 源模型每次变化加一，分段排序用它判断自己的快照是否过期
+        self._source_version = 0
+        # 分段排序算好的顶层行的名次: 每个源模型顶层行一个，key 相同的行名次相同；lessThan 比较它们，不再计算 key
+        # 排序时的 key 名次是偶数，之后新出现的 key 用二分查找放在两个名次之间的奇数上
+        self._rank_column = -1
+        self._sort_ranks = None
+        # 排序时出现过的 key，从小到大不重复，第 n 个的名次是 2n
+        self._rank_keys = []
+        # 用 NumPy 给 numeric 和 date 列的行排名次
+        self.numpy_sort = False
 
     def set_header_list(self, header_list):
         self.header_list = header_list
         for head in self.header_list:
             head.update({"reg": None})
+        self._searchable_columns = [
+            column for column, data_dict in enumerate(self.header_list) if data_dict.get("searchable", False)
+        ]
+        self._filter_regs = []
+        self._sort_key_configs = []
+        for data_dict in self.header_list:
+            sort_key = data_dict.get("sort_key")
+            if not (sort_key is None or callable(sort_key) or sort_key == "locale" or sort_key in SORT_KEY_MAP):
+                raise ValueError("Unknown sort_key {!r} of column {!r}".format(sort_key, data_dict.get("key")))
+            self._sort_key_configs.append(sort_key)
+        self.invalidate_search_index()
+        self.invalidate_sort_keys()
+        self.set_facet_keys(
+            [data_dict.get("key") for data_dict in self.header_list if data_dict.get("default_filter", False)]
+        )
+
+    def setSourceModel(self, source_model):
+        old_model = self.sourceModel()
+        if old_model is not source_model:
+            if old_model is not None:
+                for signal, slot in self._get_source_connections(old_model):
+                    signal.disconnect(slot)
+                for signal in self._get_source_change_signals(old_model):
+                    signal.disconnect(self._slot_refilter_ancestors)
+            # 先于 QSortFilterProxyModel 自己连接，保证它重新筛选之前索引已经更新
+            if source_model is not None:
+                for signal, slot in self._get_source_connections(source_model):
+                    signal.connect(slot)
+        self._cancel_search()
+        self._slice_jobs.clear()
+        self.invalidate_search_index()
+        self.invalidate_sort_keys()
+        self._facet_index = None
+        self._facet_mask = None
+        super(MSortFilterModel, self).setSourceModel(source_model)
+        if source_model is not None and source_model is not old_model:
+            # 在 QSortFilterProxyModel 之后连接，它处理完变化的行以后再处理祖先
+            for signal in self._get_source_change_signals(source_model):
+                signal.connect(self._slot_refilter_ancestors)
+
+    def _get_source_connections(self, source_model):
+        return [
+            (source_model.dataChanged, self._slot_source_data_changed),
+            (source_model.rowsInserted, self._slot_source_rows_inserted),
+            (source_model.rowsRemoved, self._slot_source_rows_removed),
+            (source_model.rowsMoved, self._slot_source_rows_moved),
+            (source_model.modelReset, self._slot_source_reset),
+            (source_model.layoutChanged, self._slot_source_reset),
+        ]
+
+    @staticmethod
+    def _get_source_change_signals(source_model):
+        return [source_model.dataChanged, source_model.rowsInserted, source_model.rowsRemoved, source_model.rowsMoved]
+
+    def set_facet_keys(self, keys):
+        """
+        Set the keys filtered by facets, by default the columns with default_filter in header_list.
+        The facet index is built from sourceModel().get_data_list() when it is used the first time.
+        """
+        self._facet_keys = list(keys or [])
+        self._facet_index = None
+        if self._facet_mask is not None:
+            self._facet_mask = None
+            self._drop_search_history()
+            self._refilter()
+        self.sig_facet_changed.emit()
+
+    def get_facet_keys(self):
+        return list(self._facet_keys)
+
+    def get_facet_index(self):
+        """Return the MFacetIndex of the top level source rows, None if there is no facet key."""
+        if self._facet_index is None and self._facet_keys and self.sourceModel() is not None:
+            self._facet_index = MFacetIndex(self._facet_keys)
+            self._facet_index.rebuild(self.sourceModel().get_data_list())
+        return self._facet_index
+
+    def set_facet_values(self, key, values):
+        """
+        Only show the top level rows whose key is one of values,
+        the rows must match the selected values of every key.
+        :param key: a facet key
+        :param values: list of values, empty to remove the filter of this key
+        """
+        self._check_facet_key(key)
+        self.get_facet_index().set_selected(key, values)
+        self._facet_mask = self._facet_index.get_accepted_mask()
+        self._drop_search_history()
+        self._refilter()
+        self.sig_facet_changed.emit()
+
+    def get_facet_values(self, key):
+        facet_index = self.get_facet_index()
+        return facet_index.get_selected(key) if facet_index else []
+
+    def get_facet_counts(self, key):
+        """Return an OrderedDict of each value of key to its row count with the selection of the other keys."""
+        self._check_facet_key(key)
+        return self.get_facet_index().get_counts(key)
+
+    def _check_facet_key(self, key):
+        if key not in self._facet_keys:
+            raise ValueError("{!r} is not a facet key, see set_facet_keys".format(key))
+
+    def _is_facet_indexed(self, source_parent):
+        """Return True if the rows under source_parent are in the facet index."""
+        return self._facet_index is not None and not source_parent.isValid()
+
+    def _drop_search_history(self):
+        """
+        The facets are checked before the search, so the rows they rejected were never searched
+        and are missing from the accepted rows of the search history.
+        """
+        self._search_history = []
+        self._search_replay_keys = set()
+
+    def _refresh_facet_mask(self):
+        self._facet_mask = self._facet_index.get_accepted_mask()
+        self.sig_facet_changed.emit()
+
+    def invalidate_search_index(self):
+        """
+        Drop the search text index, it is rebuilt on the next filtering.
+        Call it when the rows of the source model are changed without dataChanged.
+        """
+        self._search_texts = {}
+        self._search_history = []
+        self._search_mask = None
+        self._search_mask_pattern = None
+        self._trigram_index = None
+        self._fuzzy_matches = None
+        self._subtree_matches = None
+        self._source_version += 1
+        if self.is_searching():
+            self._search_restart = True
+
+    def invalidate_sort_keys(self):
+        """
+        Drop the cached sort keys, they are computed again on the next sorting.
+        Call it when the rows of the source model are changed without dataChanged.
+        """
+        self._sort_keys = {}
+        self._collator = None
+        self._sort_ranks = None
+
+    def _get_collator(self):
+        if self._collator is None:
+            self._collator = QtCore.QCollator()
+            self._collator.setCaseSensitivity(self.sortCaseSensitivity())
+        return self._collator
+
+    def _compute_sort_key(self, source_index):
+        """
+        Return the sort key of a source cell, always a tuple starting with 0 for empty values,
+        so the keys of one column can be compared with each other.
+        """
+        return self._make_sort_key(source_index.column(), functools.partial(self.sourceModel().data, source_index))
+
+    def _compute_item_sort_key(self, column, data_obj):
+        """Return the sort key of a row object of the source model, which doesn't need to be in the model yet."""
+        source_model = self.sourceModel()
+        return self._make_sort_key(column, lambda role: source_model.item_data(data_obj, column, role))
+
+    def _make_sort_key(self, column, get_data):
+        """Return the sort key of a cell of column, get_data receives a role and returns the data of the cell."""
+        sort_key = self._sort_key_configs[column] if column < len(self._sort_key_configs) else None
+        if sort_key is None:
+            # 和 QSortFilterProxyModel 默认的比较方式一致，只是缓存了结果
+            value = get_data(self.sortRole())
+            if value is None:
+                return (0,)
+            if isinstance(value, (int, float)):
+                return (1, value)
+            text = str(value)
+            if self.isSortLocaleAware():
+                return (2, self._get_collator().sortKey(text))
+            if self.sortCaseSensitivity() == QtCore.Qt.CaseInsensitive:
+                text = text.casefold()
+            return (2, text)
+        value = get_data(QtCore.Qt.EditRole)
+        if value is None:
+            return (0,)
+        if sort_key == "locale":
+            key = self._get_collator().sortKey(str(value))
+        elif callable(sort_key):
+            key = sort_key(value)
+        else:
+            key = SORT_KEY_MAP[sort_key](value)
+        return (0,) if key is None else (1, key)
+
+    def lessThan(self, source_left, source_right):
+        if self._score_sort_saved is not None:
+            # 按模糊搜索的分数排序，不管哪一列、哪个方向，分数高的总在前面
+            descending = self.sortOrder() == QtCore.Qt.DescendingOrder
+            left_score = self._get_fuzzy_score(source_left.row(), source_left.parent())
+            right_score = self._get_fuzzy_score(source_right.row(), source_right.parent())
+            if left_score != right_score:
+                return (left_score > right_score) != descending
+            return (source_left.row() < source_right.row()) != descending
+        sort_ranks = self._sort_ranks
+        if sort_ranks is not None and source_left.column() == self._rank_column:
+            # 只有平铺的顶层行有名次
+            left_rank = sort_ranks[source_left.row()]
+            right_rank = sort_ranks[source_right.row()]
+            if left_rank != right_rank or not left_rank % 2:
+                return left_rank < right_rank
+            # 两行的 key 都是排序以后才出现的，落在同两个名次之间，再比较 key
+        sort_keys = self._sort_keys.get(source_left.column())
+        if sort_keys is None:
+            sort_keys = self._sort_keys[source_left.column()] = {}
+        # row + internalId 在同一列里唯一确定一个 index
+        left_id = (source_left.row(), source_left.internalId())
+        left_key = sort_keys.get(left_id)
+        if left_key is None:
+            left_key = sort_keys[left_id] = self._compute_sort_key(source_left)
+        right_id = (source_right.row(), source_right.internalId())
+        right_key = sort_keys.get(right_id)
+        if right_key is None:
+            right_key = sort_keys[right_id] = self._compute_sort_key(source_right)
+        return left_key < right_key
+
+    def _get_search_text(self, source_row, column, source_parent):
+        """Return the formatted lowercase display text of a source cell, from the index if it is there."""
+        parent_key = source_parent.internalId() if source_parent.isValid() else None
+        column_texts = self._search_texts.get(parent_key)
+        if column_texts is None:
+            column_texts = self._search_texts[parent_key] = {}
+        text_list = column_texts.get(column)
+        if text_list is None or source_row >= len(text_list):
+            text_list = column_texts[column] = [_MISSING] * self.sourceModel().rowCount(source_parent)
+        text = text_list[source_row]
+        if text is _MISSING:
+            source_model = self.sourceModel()
+            value = source_model.data(source_model.index(source_row, column, source_parent))
+            text = text_list[source_row] = None if value is None else str(value).lower()
+        return text
+
+    def _get_search_text_list(self, column):
+        """Return the complete search text list of a top level column, filling the missing texts."""
+        source_parent = QtCore.QModelIndex()
+        row_count = self.sourceModel().rowCount()
+        column_texts = self._search_texts.setdefault(None, {})
+        text_list = column_texts.get(column)
+        if text_list is None or len(text_list) != row_count:
+            text_list = column_texts[column] = [_MISSING] * row_count
+        if _MISSING in text_list:
+            for row, text in enumerate(text_list):
+                if text is _MISSING:
+                    self._get_search_text(row, column, source_parent)
+        return text_list
+
+    def _get_row_search_text(self, source_row, source_parent):
+        """Return the search texts of the searchable columns of a source row joined by spaces."""
+        texts = [self._get_search_text(source_row, column, source_parent) for column in self._searchable_columns]
+        return " ".join(text for text in texts if text)
+
+    def get_trigram_index(self):
+        """Return the MTrigramIndex of the top level source rows, built from the search texts the first time."""
+        if self._trigram_index is None:
+            text_lists = [self._get_search_text_list(column) for column in self._searchable_columns]
+            self._trigram_index = MTrigramIndex()
+            self._trigram_index.rebuild([" ".join(text for text in texts if text) for texts in zip(*text_lists)])
+        return self._trigram_index
+
+    def _update_trigram_index(self, source_parent, first, last, method):
+        if self._trigram_index is None or source_parent.isValid():
+            return
+        self._fuzzy_matches = None
+        if method == "remove":
+            self._trigram_index.remove_rows(first, last)
+            return
+        texts = [self._get_row_search_text(row, source_parent) for row in range(first, last + 1)]
+        if method == "insert":
+            self._trigram_index.insert_rows(first, texts)
+        else:
+            self._trigram_index.update_rows(first, texts)
+
+    @staticmethod
+    def _parent_key(source_parent):
+        return source_parent.internalId() if source_parent.isValid() else None
+
+    def _get_changed_search_mask(self, source_parent):
+        """
+        Called when the rows under source_parent changed, return the background search result to update,
+        None if it has nothing to do with these rows.
+        """
+        self._source_version += 1
+        if self.is_searching():
+            # 正在搜索的快照已经过期
+            self._search_restart = True
+        if source_parent.isValid():
+            return None
+        return self._search_mask
+
+    @QtCore.Slot(QtCore.QModelIndex, QtCore.QModelIndex)
+    def _slot_source_data_changed(self, top_left, bottom_right, roles=None):
+        self._search_history = []
+        if not top_left.isValid() or not bottom_right.isValid():
+            self.invalidate_search_index()
+            self.invalidate_sort_keys()
+            return
+        search_mask = self._get_changed_search_mask(top_left.parent())
+        if search_mask is not None:
+            for row in range(top_left.row(), min(bottom_right.row() + 1, len(search_mask))):
+                search_mask[row] = _ROW_UNKNOWN
+        if self._sort_ranks is not None and top_left.column() <= self._rank_column <= bottom_right.column():
+            ranks = self._rank_source_rows(top_left.parent(), top_left.row(), bottom_right.row())
+            if ranks is None:
+                self._sort_ranks = None
+            else:
+                self._sort_ranks[top_left.row() : bottom_right.row() + 1] = ranks
+        for column in range(top_left.column(), bottom_right.column() + 1):
+            sort_keys = self._sort_keys.get(column)
+            if sort_keys:
+                for row in range(top_left.row(), bottom_right.row() + 1):
+                    sort_keys.pop((row, top_left.sibling(row, column).internalId()), None)
+        if self._is_facet_indexed(top_left.parent()) and self._facet_index.update_rows(
+            self.sourceModel().get_data_list(), top_left.row(), bottom_right.row()
+        ):
+            self._refresh_facet_mask()
+        column_texts = self._search_texts.get(self._parent_key(top_left.parent()), {})
+        for column in range(top_left.column(), bottom_right.column() + 1):
+            text_list = column_texts.get(column)
+            if text_list is not None:
+                for row in range(top_left.row(), min(bottom_right.row() + 1, len(text_list))):
+                    text_list[row] = _MISSING
+        if any(top_left.column() <= column <= bottom_right.column() for column in self._searchable_columns):
+            self._update_trigram_index(top_left.parent(), top_left.row(), bottom_right.row(), "update")
+        self._update_subtree_matches(top_left.parent(), top_left.row(), bottom_right.row(), "update")
+
+    @QtCore.Slot(QtCore.QModelIndex, int, int)
+    def _slot_source_rows_inserted(self, source_parent, first, last):
+        self._search_history = []
+        count = last - first + 1
+        for text_list in self._search_texts.get(self._parent_key(source_parent), {}).values():
+            text_list[first:first] = [_MISSING] * count
+        search_mask = self._get_changed_search_mask(source_parent)
+        if search_mask is not None:
+            search_mask[first:first] = bytearray([_ROW_UNKNOWN]) * count
+        if self.sourceModel().rowCount(source_parent) != last + 1:
+            # 不是追加在最后，后面行的行号变了；名次跟着行走，不用重新排
+            self._sort_keys = {}
+        if self._sort_ranks is not None:
+            ranks = self._rank_source_rows(source_parent, first, last)
+            if ranks is None:
+                self._sort_ranks = None
+            else:
+                self._sort_ranks[first:first] = ranks
+        if self._is_facet_indexed(source_parent):
+            self._facet_index.insert_rows(self.sourceModel().get_data_list(), first, last)
+            self._refresh_facet_mask()
+        self._update_trigram_index(source_parent, first, last, "insert")
+        self._update_subtree_matches(source_parent, first, last, "insert")
+
+    @QtCore.Slot(QtCore.QModelIndex, int, int)
+    def _slot_source_rows_removed(self, source_parent, first, last):
+        self._search_history = []
+        for text_list in self._search_texts.get(self._parent_key(source_parent), {}).values():
+            del text_list[first : last + 1]
+        search_mask = self._get_changed_search_mask(source_parent)
+        if search_mask is not None:
+            del search_mask[first : last + 1]
+        self._sort_keys = {}
+        if self._sort_ranks is not None and not source_parent.isValid():
+            del self._sort_ranks[first : last + 1]
+        if self._is_facet_indexed(source_parent):
+            self._facet_index.remove_rows(first, last)
+            self._refresh_facet_mask()
+        self._update_trigram_index(source_parent, first, last, "remove")
+        self._update_subtree_matches(source_parent, first, last, "remove")
+
+    @QtCore.Slot(QtCore.QModelIndex, int, int, QtCore.QModelIndex, int)
+    def _slot_source_rows_moved(self, source_parent, first, last, dest_parent, dest_row):
+        self._search_history = []
+        self._sort_keys = {}
+        if self._sort_ranks is not None:
+            if source_parent.isValid() or dest_parent.isValid():
+                self._sort_ranks = None
+            else:
+                _move_slice(self._sort_ranks, first, last, dest_row)
+        if self._is_facet_indexed(source_parent) or self._is_facet_indexed(dest_parent):
+            self._facet_index.rebuild(self.sourceModel().get_data_list())
+            self._refresh_facet_mask()
+        source_key = self._parent_key(source_parent)
+        dest_key = self._parent_key(dest_parent)
+        self._fuzzy_matches = None
+        if self._subtree_matches is not None:
+            flags = self._subtree_matches.get(source_key)
+            if source_key != dest_key:
+                # 两边的祖先都可能变化
+                self._subtree_matches = None
+                self._subtree_changed = True
+            elif flags is not None:
+                _move_slice(flags, first, last, dest_row)
+        if source_key != dest_key:
+            self._search_texts.pop(source_key, None)
+            self._search_texts.pop(dest_key, None)
+            if self._get_changed_search_mask(source_parent) is not None or not dest_parent.isValid():
+                # 顶层行数变了，之后回到在 GUI 线程搜索
+                self._search_mask = None
+                self._trigram_index = None
+            return
+        for text_list in self._search_texts.get(source_key, {}).values():
+            _move_slice(text_list, first, last, dest_row)
+        if self._trigram_index is not None and not source_parent.isValid():
+            self._trigram_index.move_rows(first, last, dest_row)
+        search_mask = self._get_changed_search_mask(source_parent)
+        if search_mask is not None:
+            _move_slice(search_mask, first, last, dest_row)
+
+    @QtCore.Slot()
+    def _slot_source_reset(self):
+        # QSortFilterProxyModel 会重新筛选所有的行
+        self.invalidate_search_index()
+        self.invalidate_sort_keys()
+        if self._facet_index is not None:
+            self._facet_index.rebuild(self.sourceModel().get_data_list())
+            self._refresh_facet_mask()
+        if self.search_reg is not None and (self._use_async_search() or self.time_slice is not None):
+            # 新的数据先全部隐藏，等后台搜索完成后一次性显示
+            self._search_mask = bytearray(self.sourceModel().rowCount())
+            if not self.is_searching():
+                self._start_search(self.search_reg.pattern)
+
+    def index_for_key(self, key_value, column=0):
+        """
+        Return the index in this model of the source row whose key is key_value,
+        invalid if it is not found or filtered out. The source model needs set_key_index.
+        """
+        return self.mapFromSource(self.sourceModel().index_for_key(key_value, column))
+
+    def row_for_key(self, key_value):
+        """Return the row in this model of the source row whose key is key_value, -1 if not shown."""
+        return self.index_for_key(key_value).row()
+
+    def setRecursiveFilteringEnabled(self, enabled):
+        """Also show the rows having a descendant accepted by the filters, True by default."""
+        self.recursive_filtering = enabled
+        self._refilter()
+
+    def isRecursiveFilteringEnabled(self):
+        return self.recursive_filtering
 
     def filterAcceptsRow(self, source_row, source_parent):
-        # 如果search 栏有内容 先匹配 search 栏的内容
-        if self.search_reg:
-            for index, data_dict in enumerate(self.header_list):
-                if data_dict.get("searchable", False):
-                    model_index = self.sourceModel().index(source_row, index, source_parent)
-                    value = self.sourceModel().data(model_index)
-                    if value is not None and self.search_reg.search(str(value)) is not None:
-                        # 搜索匹配上了
-                        break
+        if not self.recursive_filtering:
+            return self._filter_accepts_self(source_row, source_parent)
+        matches = self._subtree_matches
+        if matches is None:
+            flags = None
+        else:
+            # 每一行都会调用，不经过 _parent_key
+            flags = matches.get(source_parent.internalId() if source_parent.isValid() else None)
+        if flags is None or source_row >= len(flags):
+            if not self._is_filtering():
+                return True
+            flags = self._compute_subtree_matches(source_parent)
+        state = flags[source_row]
+        if state == _MATCH_UNKNOWN:
+            state = self._compute_subtree_matches(source_parent, (source_row,))[source_row]
+        return state != 0
+
+    def _is_filtering(self):
+        return bool(
+            self._facet_mask is not None or self._fuzzy_pattern is not None or self.search_reg or self._filter_regs
+        )
+
+    def _compute_subtree_matches(self, source_parent, rows=None):
+        """
+        Compute the _MATCH_XXX flags of the rows under source_parent bottom-up in one pass, each row is tested once:
+        the children of a row not matching itself are computed first to know if it has a matching descendant,
+        the ones of a row matching itself are left until they are filtered.
+        :param source_parent: QModelIndex of the source model
+        :param rows: the rows to compute again, all the rows if None
+        :return: bytearray of the flags of the rows under source_parent
+        """
+        source_model = self.sourceModel()
+        # 源模型能一次给出每一行的子节点数时，不用为每一行创建 index
+        get_child_counts = getattr(source_model, "get_child_counts", None)
+        if self._subtree_matches is None:
+            self._subtree_matches = {}
+        matches = self._subtree_matches
+        if rows is None:
+            flags = bytearray(source_model.rowCount(source_parent))
+            rows = range(len(flags))
+            child_counts = get_child_counts and get_child_counts(source_parent)
+        else:
+            # 只有几行变化时，逐行取子节点数
+            flags = matches[self._parent_key(source_parent)]
+            child_counts = None
+        # 用栈代替递归，很深的树也不会超出递归深度
+        stack = [(source_parent, flags, iter(rows), child_counts)]
+        while stack:
+            parent_index, flags, row_iter, child_counts = stack[-1]
+            for row in row_iter:
+                if self._filter_accepts_self(row, parent_index):
+                    flags[row] = _MATCH_SELF
+                    continue
+                if child_counts is None:
+                    child_index = source_model.index(row, 0, parent_index)
+                    child_count = source_model.rowCount(child_index)
+                else:
+                    child_count = child_counts[row]
+                    child_index = source_model.index(row, 0, parent_index) if child_count else None
+                if child_count:
+                    # 先算子节点，回到这一层时再决定这一行
+                    stack.append(
+                        (
+                            child_index,
+                            bytearray(child_count),
+                            iter(range(child_count)),
+                            get_child_counts and get_child_counts(child_index),
+                        )
+                    )
+                    break
+                flags[row] = 0
             else:
-                # 全部搜索完毕，没有一个匹配，直接返回 False
+                stack.pop()
+                matches[self._parent_key(parent_index)] = flags
+                if stack:
+                    stack[-1][1][parent_index.row()] = _MATCH_DESCENDANT if any(flags) else 0
+        return flags
+
+    def _update_subtree_matches(self, source_parent, first, last, method):
+        """
+        Rows first to last under source_parent are just inserted, removed or changed, update their flags
+        and the _MATCH_DESCENDANT of the ancestors, see _slot_refilter_ancestors.
+        :param method: "insert", "remove" or "update"
+        """
+        matches = self._subtree_matches
+        flags = None if matches is None else matches.get(self._parent_key(source_parent))
+        if flags is None:
+            # 这一层还没有计算过：祖先自己匹配时不用管它，节点原来没有子节点时祖先的状态可能因为它变化
+            if matches is None or not source_parent.isValid():
+                return
+            upper_flags = matches.get(self._parent_key(source_parent.parent()))
+            row = source_parent.row()
+            if upper_flags is None or row >= len(upper_flags) or upper_flags[row] & (_MATCH_SELF | _MATCH_UNKNOWN):
+                return
+            flags = self._compute_subtree_matches(source_parent)
+        elif method == "remove":
+            del flags[first : last + 1]
+        else:
+            if method == "insert":
+                flags[first:first] = bytearray(last - first + 1)
+            self._compute_subtree_matches(source_parent, range(first, min(last + 1, len(flags))))
+        while source_parent.isValid():
+            grand_parent = source_parent.parent()
+            upper_flags = matches.get(self._parent_key(grand_parent))
+            row = source_parent.row()
+            if upper_flags is None or row >= len(upper_flags) or upper_flags[row] & (_MATCH_SELF | _MATCH_UNKNOWN):
+                return
+            state = _MATCH_DESCENDANT if any(flags) else 0
+            if upper_flags[row] == state:
+                return
+            upper_flags[row] = state
+            self._subtree_changed = True
+            source_parent, flags = grand_parent, upper_flags
+
+    @QtCore.Slot()
+    def _slot_refilter_ancestors(self):
+        """Called after QSortFilterProxyModel handled a source change, show or hide the ancestors it changed."""
+        if not self._subtree_changed:
+            return
+        self._subtree_changed = False
+        # 只重新筛选已有的映射，算好的 _MATCH_XXX 保留
+        getattr(self, "invalidateRowsFilter", self.invalidateFilter)()
+
+    def _filter_accepts_self(self, source_row, source_parent):
+        """Return True if the row itself is accepted by the facets, the search and the filters."""
+        # 分面筛选只需要查一下结果
+        facet_mask = self._facet_mask
+        if (
+            facet_mask is not None
+            and not source_parent.isValid()
+            and (source_row >= len(facet_mask) or facet_mask[source_row] != "1")
+        ):
+            return False
+
+        # 如果search 栏有内容 先匹配 search 栏的内容
+        if self._fuzzy_pattern is not None:
+            if not self._filter_fuzzy(source_row, source_parent):
                 return False
+        elif self.search_reg and not self._filter_search(source_row, source_parent):
+            return False
 
         # 再去匹配 filter 组合
-        for index, data_dict in enumerate(self.header_list):
-            model_index = self.sourceModel().index(source_row, index, source_parent)
-            value = self.sourceModel().data(model_index)
-            reg_exp = data_dict.get("reg", None)
-            if reg_exp and value is not None and not reg_exp.search(str(value)):
+        for column, reg_exp in self._filter_regs:
+            text = self._get_search_text(source_row, column, source_parent)
+            if text is not None and not reg_exp.search(text):
                 # 不符合筛选，直接返回 False
                 return False
 
         return True
 
+    def _match_search(self, source_row, source_parent, search_reg=None):
+        search_reg = search_reg or self.search_reg
+        for column in self._searchable_columns:
+            text = self._get_search_text(source_row, column, source_parent)
+            if text is not None and search_reg.search(text) is not None:
+                # 搜索匹配上了
+                return True
+        # 全部搜索完毕，没有一个匹配
+        return False
+
+    def _filter_search(self, source_row, source_parent):
+        """Match the search pattern, only testing the rows accepted by the previous pattern it refines."""
+        search_mask = self._search_mask
+        if search_mask is not None and not source_parent.isValid() and source_row < len(search_mask):
+            state = search_mask[source_row]
+            if state == _ROW_UNKNOWN:
+                state = search_mask[source_row] = self._match_search(source_row, source_parent)
+            return state == _ROW_ACCEPTED
+        if not self._search_history:
+            return self._match_search(source_row, source_parent)
+        parent_key = self._parent_key(source_parent)
+        accepted_map = self._search_history[-1][1]
+        if parent_key in self._search_replay_keys:
+            # 这个模式之前已经筛选过
+            return source_row in accepted_map[parent_key]
+        accepted = accepted_map.get(parent_key)
+        if accepted is None:
+            accepted = accepted_map[parent_key] = set()
+        if len(self._search_history) > 1:
+            candidates = self._search_history[-2][1].get(parent_key)
+            if candidates is not None and source_row not in candidates:
+                return False
+        if self._match_search(source_row, source_parent):
+            accepted.add(source_row)
+            return True
+        return False
+
     def set_search_pattern(self, pattern):
+        """
+        Filter the rows by pattern, a regular expression matched case insensitively against the searchable columns.
+        With async_filter_threshold set and at least that many top level rows, the matching runs in a worker thread,
+        with time_slice set it runs in slices on the GUI thread, see set_time_slice.
+        The current rows are kept until the result is applied all at once and sig_search_finished is emitted.
+        """
+        self._cancel_search()
+        self._search_pattern = pattern
+        self._fuzzy_pattern = None
+        self._fuzzy_matches = None
+        if pattern and self.fuzzy_search:
+            self._search_mask = None
+            self._search_mask_pattern = None
+            self._search_history = []
+            self.search_reg = None
+            self._fuzzy_pattern = MTrigramPattern(pattern, self.fuzzy_threshold)
+            self._invalidate_search()
+            return
+        if pattern and (self._use_async_search() or self.time_slice is not None):
+            self._start_search(pattern)
+            return
+        self._search_mask = None
+        self._search_mask_pattern = None
         if pattern:
             self.search_reg = re.compile(pattern, re.IGNORECASE)
+            self._push_search_history(pattern)
         else:
             self.search_reg = None
-        self.invalidateFilter()
+            self._search_history = []
+        self._invalidate_search()
+
+    def set_fuzzy_search(self, enabled, threshold=DEFAULT_FUZZY_THRESHOLD, sort_by_score=False):
+        """
+        Match the search pattern fuzzily instead of as a regular expression: a row matches if its searchable texts
+        contain at least threshold of the trigrams of the pattern, so typos still find it.
+        The top level rows are looked up in a trigram index updated with the source model.
+        :param enabled: bool
+        :param threshold: the minimum similarity from 0 to 1
+        :param sort_by_score: rank the rows by similarity while a pattern is set, the best first
+        """
+        self.fuzzy_search = enabled
+        self.fuzzy_threshold = threshold
+        self.sort_by_score = sort_by_score
+        self.set_search_pattern(self._search_pattern)
+
+    def get_fuzzy_matches(self, limit=None):
+        """
+        Return the list of (source row, similarity) of the top level rows matching the fuzzy pattern, the best first.
+        :param limit: only return the limit best rows
+        """
+        if self._fuzzy_pattern is None:
+            return []
+        return self._get_fuzzy_matches().ranked(limit)
+
+    def _get_fuzzy_matches(self):
+        if self._fuzzy_matches is None:
+            self._fuzzy_matches = self.get_trigram_index().search(self._fuzzy_pattern)
+        return self._fuzzy_matches
+
+    def _filter_fuzzy(self, source_row, source_parent):
+        fuzzy_matches = self._fuzzy_matches
+        if fuzzy_matches is None or source_parent.isValid() or source_row >= len(self._trigram_index):
+            return bool(self._get_fuzzy_score(source_row, source_parent))
+        return fuzzy_matches.contains(source_row)
+
+    def _get_fuzzy_score(self, source_row, source_parent):
+        fuzzy_matches = None if source_parent.isValid() else self._get_fuzzy_matches()
+        if fuzzy_matches is None or source_row >= len(self._trigram_index):
+            # 子节点不在索引里，直接计算
+            return self._fuzzy_pattern.similarity(self._get_row_search_text(source_row, source_parent))
+        return fuzzy_matches.get_score(source_row)
+
+    def _invalidate_search(self):
+        """Filter the rows again after the search pattern changed, ranked by score for a fuzzy pattern if asked."""
+        self._subtree_matches = None
+        if self._fuzzy_pattern is not None and self.sort_by_score:
+            if self._score_sort_saved is None:
+                self._score_sort_saved = (self.sortColumn(), self.sortOrder())
+                if self.sortColumn() < 0:
+                    # 先筛选，只排序匹配的行
+                    self.invalidateFilter()
+                    self.sort(0)
+                    return
+            # lessThan 已经按分数比较，重新筛选并排序
+            self.invalidate()
+            return
+        if self._score_sort_saved is not None:
+            column, order = self._score_sort_saved
+            self._score_sort_saved = None
+            if column == self.sortColumn() and order == self.sortOrder():
+                self.invalidate()
+                return
+            self.sort(column, order)
+        self._refilter()
+
+    def _refilter(self):
+        """
+        Filter all the rows again after the filter changed. With time_slice the match states of the top level rows
+        are computed a slice at a time first, see set_time_slice.
+        """
+        self._subtree_matches = None
+        self._slice_jobs.pop("refilter", None)
+        if self._use_sliced_refilter():
+            # 还没有计算的行保持原来的显示状态，Qt 筛选到它们时再计算
+            self._subtree_matches = {None: bytearray([_MATCH_UNKNOWN]) * self.sourceModel().rowCount()}
+            self._start_slice_job("refilter", self._iter_refilter())
+            return
+        self._invalidate_rows_filter()
+
+    def _invalidate_rows_filter(self):
+        if self.sortColumn() < 0:
+            # 筛选一次改变很多交错的行，不排序时整体重建映射比逐段增删行快很多
+            self.invalidate()
+        else:
+            self.invalidateFilter()
+
+    def _use_sliced_refilter(self):
+        """Return True if the match states are computed a slice at a time before filtering, see _iter_refilter."""
+        return (
+            self.time_slice is not None
+            and self.recursive_filtering
+            and self._is_filtering()
+            and self.sourceModel() is not None
+        )
+
+    def _iter_refilter(self):
+        """Compute the _MATCH_XXX flags of the top level source rows a slice at a time, then filter them at once."""
+        flags = self._subtree_matches[None]
+        source_parent = QtCore.QModelIndex()
+        first = flags.find(_MATCH_UNKNOWN)
+        while first >= 0:
+            last = min(first + _SLICE_ROWS, len(flags))
+            self._compute_subtree_matches(
+                source_parent, [row for row in range(first, last) if flags[row] == _MATCH_UNKNOWN]
+            )
+            yield
+            if self._subtree_matches is None:
+                # 源模型整体变化，剩下的行筛选时再计算
+                break
+            if self._subtree_matches.get(None) is not flags:
+                # 筛选条件又变了，由新的任务完成
+                return
+            first = flags.find(_MATCH_UNKNOWN, last)
+        self._invalidate_rows_filter()
+
+    def _iter_pending_refilter(self):
+        """Run the refilter job just started by the search job inside it, the search ends after the rows are filtered."""
+        job = self._slice_jobs.pop("refilter", None)
+        if job is not None:
+            yield from job
+
+    def set_async_filter_threshold(self, row_count):
+        """
+        Search in a worker thread when the source model has at least row_count top level rows.
+        :param row_count: int, None to always search in the GUI thread.
+        """
+        self.async_filter_threshold = row_count
+
+    def set_time_slice(self, milliseconds):
+        """
+        Run the searches, the filtering and the sorting on the GUI thread a few milliseconds at a time
+        from a zero interval timer, so the events are processed in between, for hosts where the work can't go
+        to a worker thread. A newer search or sorting cancels the pending one, a search still running after
+        a moment shows the rows found so far.
+        Only the Python work is sliced: the sorting computes the sort keys of the top level rows and ranks them,
+        then sorts the proxy once with lessThan comparing the ranks; the filtering computes the match state
+        of each top level row, then filters the rows again at once. Qt maps the rows in one go at the end.
+        :param milliseconds: int, None to run them at once.
+        """
+        self.time_slice = milliseconds
+        if milliseconds is None and self._slice_jobs:
+            # 剩下的任务马上完成
+            self._run_slice_jobs(wait_turns=False)
+
+    def is_searching(self):
+        """Return True if a background or a sliced search is running."""
+        return self._search_cancel_event is not None or "search" in self._slice_jobs
+
+    def is_sorting(self):
+        """Return True if the sort keys are being ranked a slice at a time, see set_time_slice."""
+        return "sort" in self._slice_jobs
+
+    def is_refiltering(self):
+        """Return True if the rows are being filtered again a slice at a time after the filters changed."""
+        return "refilter" in self._slice_jobs
+
+    def _start_slice_job(self, name, job):
+        """Run the generator job a step at a time from the timer, it replaces the pending job of the same name."""
+        self._slice_jobs[name] = job
+        self._slice_timer.start()
+
+    @QtCore.Slot()
+    def _slot_run_slice(self):
+        self._run_slice_jobs(wait_turns=True)
+
+    def _run_slice_jobs(self, wait_turns):
+        """
+        Run the pending jobs until time_slice is used up, or all of them without time_slice.
+        A job yields True to wait for the next event loop turn, unless wait_turns is False.
+        """
+        budget = float("inf") if self.time_slice is None else self.time_slice / 1000.0
+        deadline = time.perf_counter() + budget
+        while self._slice_jobs and time.perf_counter() < deadline:
+            name, job = next(iter(self._slice_jobs.items()))
+            try:
+                if next(job) and wait_turns:
+                    break
+            except StopIteration:
+                # 任务结束时可能已经换成了重新开始的任务
+                if self._slice_jobs.get(name) is job:
+                    del self._slice_jobs[name]
+        if self._slice_jobs:
+            self._slice_timer.start()
+        else:
+            self._slice_timer.stop()
+
+    def set_numpy_sort(self, enabled):
+        """
+        Sort the columns whose sort_key is "numeric" or "date" with NumPy: the keys of the column are pulled
+        into an array (by the source model in one pass if it has get_key_array, like MColumnarTableModel)
+        and ranked with a stable sort, then the proxy is sorted once with lessThan comparing the ranks.
+        The header clicks of the views sort through it the same way. Nothing changes without numpy.
+        :param enabled: bool
+        """
+        self.numpy_sort = enabled
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self._slice_jobs.pop("sort", None)
+        if not self._use_rank_sort(column):
+            self._sort_ranks = None
+            super(MSortFilterModel, self).sort(column, order)
+            return
+        self._start_slice_job("sort", self._iter_rank_sort(column, order))
+        if self.time_slice is None:
+            self._run_slice_jobs(wait_turns=True)
+
+    def _use_rank_sort(self, column):
+        """Return True if the top level rows are ranked before sorting column, see set_time_slice and set_numpy_sort."""
+        if column < 0 or self._score_sort_saved is not None or self.sourceModel() is None:
+            return False
+        return self.time_slice is not None or self._get_array_sort_key(column) is not None
+
+    def _get_array_sort_key(self, column):
+        """Return the sort key function of column if it is sorted with NumPy, else None."""
+        if not self.numpy_sort or np is None or column >= len(self.header_list):
+            return None
+        sort_key = self.header_list[column].get("sort_key")
+        if sort_key not in _ARRAY_SORT_KEYS or "edit" in self.header_list[column]:
+            return None
+        return SORT_KEY_MAP[sort_key]
+
+    def _iter_rank_sort(self, column, order):
+        """
+        Compute the sort keys of the top level source rows and rank them a slice at a time,
+        then sort the proxy once, lessThan compares the ranks instead of the keys.
+        Rows with the same key get the same rank, the stable sorting of Qt keeps them in the source order.
+        """
+        source_model = self.sourceModel()
+        version = self._source_version
+        row_count = source_model.rowCount()
+        key_func = self._get_array_sort_key(column)
+        key_array = None
+        if key_func is not None and hasattr(source_model, "get_key_array"):
+            key_array = source_model.get_key_array(self.header_list[column].get("key"), key_func)
+        if key_array is None:
+            keys = []
+            data_list = source_model.get_data_list() if hasattr(source_model, "item_data") else None
+            for first in range(0, row_count, _SLICE_ROWS):
+                last = min(first + _SLICE_ROWS, row_count)
+                if data_list is not None:
+                    # 直接读行对象，不为每一行创建 QModelIndex
+                    if any(map(_has_children, data_list[first:last])):
+                        break
+                    keys.extend(self._compute_item_sort_key(column, data_obj) for data_obj in data_list[first:last])
+                elif any(source_model.hasChildren(source_model.index(row, 0)) for row in range(first, last)):
+                    break
+                else:
+                    keys.extend(self._compute_sort_key(source_model.index(row, column)) for row in range(first, last))
+                yield
+                if self._restart_rank_sort(version, column, order):
+                    return
+            if len(keys) != row_count:
+                # 树形数据交给 QSortFilterProxyModel 逐层排序
+                self._slice_jobs.pop("sort", None)
+                self._sort_ranks = None
+                super(MSortFilterModel, self).sort(column, order)
+                return
+            if key_func is not None:
+                # numeric 和 date 的 key 是 (0,) 或 (1, 数字)
+                key_array = make_key_array(keys, lambda key: key[1] if key[0] else None)
+        if key_array is not None:
+            ranks = [rank * 2 for rank in rank_key_array(key_array)]
+            is_empty = np.isnan(key_array)
+            # numeric 和 date 的 key 是 (0,) 或 (1, 数字)，和 rank_key_array 一样空值在最前
+            rank_keys = [(0,)] if is_empty.any() else []
+            rank_keys.extend((1, key) for key in np.unique(key_array[~is_empty]).tolist())
+        else:
+            # 先分段排好，再归并；sorted 和 heapq.merge 都是稳定的
+            runs = []
+            for first in range(0, row_count, _SORT_RUN_SIZE):
+                runs.append(sorted(range(first, min(first + _SORT_RUN_SIZE, row_count)), key=keys.__getitem__))
+                yield
+                if self._restart_rank_sort(version, column, order):
+                    return
+            merged_rows = heapq.merge(*runs, key=keys.__getitem__)
+            ranks = [0] * row_count
+            rank_keys = []
+            for rows in iter(lambda: list(itertools.islice(merged_rows, _SORT_RUN_SIZE)), []):
+                for row in rows:
+                    key = keys[row]
+                    if not rank_keys or key != rank_keys[-1]:
+                        rank_keys.append(key)
+                    ranks[row] = 2 * len(rank_keys) - 2
+                yield
+                if self._restart_rank_sort(version, column, order):
+                    return
+        self._slice_jobs.pop("sort", None)
+        self._rank_column = column
+        self._sort_ranks = ranks
+        self._rank_keys = rank_keys
+        super(MSortFilterModel, self).sort(column, order)
+
+    def _rank_source_rows(self, source_parent, first, last):
+        """
+        Return the ranks of the source rows first to last added or changed after the sorting, found with a binary
+        search over the ranked keys: a ranked key keeps its rank, a new key gets the odd rank between its neighbours.
+        Return None if they are not flat top level rows, they are compared by their keys then.
+        """
+        if source_parent.isValid():
+            return None
+        source_model = self.sourceModel()
+        rank_keys = self._rank_keys
+        ranks = []
+        for row in range(first, last + 1):
+            if source_model.hasChildren(source_model.index(row, 0)):
+                return None
+            key = self._compute_sort_key(source_model.index(row, self._rank_column))
+            position = bisect.bisect_left(rank_keys, key)
+            if position < len(rank_keys) and rank_keys[position] == key:
+                ranks.append(2 * position)
+            else:
+                ranks.append(2 * position - 1)
+        return ranks
+
+    def _restart_rank_sort(self, version, column, order):
+        """Start the sorting again if the source model changed since version, return True if so."""
+        if version == self._source_version:
+            return False
+        self._start_slice_job("sort", self._iter_rank_sort(column, order))
+        return True
+
+    def _use_async_search(self):
+        source_model = self.sourceModel()
+        return (
+            self.async_filter_threshold is not None
+            and source_model is not None
+            and source_model.rowCount() >= self.async_filter_threshold
+        )
+
+    def _start_search(self, pattern):
+        """Start searching pattern in a worker thread, or in slices if it is not large enough for a thread."""
+        if self._use_async_search():
+            self._start_async_search(pattern)
+            return
+        self._search_pending_pattern = pattern
+        self._search_restart = False
+        self._start_slice_job("search", self._iter_sliced_search(pattern))
+
+    def _get_candidate_mask(self, pattern):
+        """Return the last search result if pattern refines its pattern, only the rows it accepted can match."""
+        if (
+            self._search_mask is not None
+            and self._search_mask_pattern is not None
+            and _is_search_refinement(self._search_mask_pattern, pattern)
+        ):
+            return bytes(self._search_mask)
+        return None
+
+    def _iter_sliced_search(self, pattern):
+        """Match pattern against the top level source rows a slice at a time, see set_time_slice."""
+        search_reg = re.compile(pattern, re.IGNORECASE)
+        candidate_mask = self._get_candidate_mask(pattern)
+        source_parent = QtCore.QModelIndex()
+        row_count = self.sourceModel().rowCount()
+        # 还没有搜索的行筛选到时再计算
+        search_mask = bytearray([_ROW_UNKNOWN]) * row_count
+        start_time = time.perf_counter()
+        partial_shown = False
+        for first in range(0, row_count, _SLICE_ROWS):
+            last = min(first + _SLICE_ROWS, row_count)
+            for row in range(first, last):
+                if candidate_mask is None or candidate_mask[row] != _ROW_REJECTED:
+                    search_mask[row] = self._match_search(row, source_parent, search_reg)
+                else:
+                    search_mask[row] = _ROW_REJECTED
+            yield
+            if self._search_restart:
+                # 搜索期间数据变了，重新开始
+                self._start_search(pattern)
+                return
+            if (
+                not partial_shown
+                and time.perf_counter() - start_time > _PARTIAL_RESULT_DELAY
+                and _ROW_ACCEPTED in search_mask
+            ):
+                # 还没有搜索的行先隐藏
+                partial_shown = True
+                self._apply_search_mask(pattern, search_mask[:last] + bytearray(row_count - last), complete=False)
+                yield from self._iter_pending_refilter()
+        self._apply_search_mask(pattern, search_mask)
+        # 剩下的筛选在搜索任务里分段完成，之后才算搜索结束
+        yield from self._iter_pending_refilter()
+        self._slice_jobs.pop("search", None)
+        self._search_pending_pattern = None
+        self.sig_search_finished.emit()
+
+    def _start_async_search(self, pattern):
+        search_reg = re.compile(pattern, re.IGNORECASE)
+        # 在 GUI 线程里补全搜索文本，formatter 只能在这里调用；工作线程只拿到快照
+        text_lists = [list(self._get_search_text_list(column)) for column in self._searchable_columns]
+        # 新模式是上次结果的细化时，只匹配上次接受的行
+        candidate_mask = self._get_candidate_mask(pattern)
+        self._search_generation += 1
+        self._search_cancel_event = threading.Event()
+        self._search_pending_pattern = pattern
+        self._search_restart = False
+        self.thread_pool.start(
+            _MSearchRunnable(
+                self._search_signals,
+                self._search_generation,
+                text_lists,
+                search_reg,
+                candidate_mask,
+                self._search_cancel_event,
+            )
+        )
+
+    def _cancel_search(self):
+        self._search_generation += 1
+        if self._search_cancel_event is not None:
+            self._search_cancel_event.set()
+            self._search_cancel_event = None
+        self._slice_jobs.pop("search", None)
+        self._search_pending_pattern = None
+        self._search_restart = False
+
+    @QtCore.Slot(int, object)
+    def _slot_async_search_done(self, generation, search_mask):
+        if generation != self._search_generation:
+            return
+        pattern = self._search_pending_pattern
+        self._search_cancel_event = None
+        self._search_pending_pattern = None
+        if self._search_restart or search_mask is None:
+            # 搜索期间数据变了，用新的快照重新搜索
+            self._start_search(pattern)
+            return
+        self._apply_search_mask(pattern, search_mask)
+        self.sig_search_finished.emit()
+
+    def _apply_search_mask(self, pattern, search_mask, complete=True):
+        """Show the result of a background or sliced search, an incomplete one can't be refined."""
+        self.search_reg = re.compile(pattern, re.IGNORECASE)
+        self._search_history = []
+        self._search_mask = search_mask
+        self._search_mask_pattern = pattern if complete else None
+        self._refilter()
+
+    def _push_search_history(self, pattern):
+        history = self._search_history
+        # 丢掉新模式不是其细化的结果，比如退格以后
+        while history and not _is_search_refinement(history[-1][0], pattern):
+            history.pop()
+        if history and history[-1][0] == pattern:
+            # 每个父节点的结果在上次筛选时已经完整
+            self._search_replay_keys = set(history[-1][1])
+        else:
+            history.append((pattern, {}))
+            self._search_replay_keys = set()
 
     def set_filter_attr_pattern(self, attr, pattern):
         for data_dict in self.header_list:
@@ -319,4 +2588,7 @@ class MSortFilterModel(QtCore.QSortFilterProxyModel):
                 else:
                     data_dict["reg"] = None
                 break
-        self.invalidateFilter()
+        self._filter_regs = [
+            (column, data_dict["reg"]) for column, data_dict in enumerate(self.header_list) if data_dict.get("reg")
+        ]
+        self._refilter()
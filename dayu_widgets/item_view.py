@@ -7,7 +7,6 @@ from qtpy import QtWidgets
 from dayu_widgets import dayu_theme
 from dayu_widgets import utils
 from dayu_widgets.header_view import MHeaderView
-from dayu_widgets.item_model import MTableModel
 from dayu_widgets.menu import MMenu
 from dayu_widgets.qt import MPixmap
 from dayu_widgets.qt import get_scale_factor
@@ -17,33 +16,37 @@ HEADER_SORT_MAP = {"asc": QtCore.Qt.AscendingOrder, "desc": QtCore.Qt.Descending
 
 
 def draw_empty_content(view, text=None, pix_map=None):
-    pix_map = pix_map or MPixmap("empty.svg")
-    text = text or view.tr("No Data")
     painter = QtGui.QPainter(view)
+    _paint_empty_content(
+        painter, view.width(), view.height(), text or view.tr("No Data"), pix_map or MPixmap("empty.svg")
+    )
+    painter.end()
+
+
+def _paint_empty_content(painter, width, height, text, pix_map):
     font_metrics = painter.fontMetrics()
     painter.setPen(QtGui.QPen(QtGui.QColor(dayu_theme.secondary_text_color)))
     content_height = pix_map.height() + font_metrics.height()
     padding = 10
     proper_min_size = min(
-        view.height() - padding * 2,
-        view.width() - padding * 2,
+        height - padding * 2,
+        width - padding * 2,
         content_height
     )
     if proper_min_size < content_height:
-        height = proper_min_size - font_metrics.height()
-        pix_map = pix_map.scaledToHeight(height, QtCore.Qt.SmoothTransformation)
+        pix_map_height = proper_min_size - font_metrics.height()
+        pix_map = pix_map.scaledToHeight(pix_map_height, QtCore.Qt.SmoothTransformation)
         content_height = proper_min_size
     painter.drawText(
-        view.width() / 2 - font_metrics.width(text) / 2,
-        view.height() / 2 + content_height / 2 - font_metrics.height() / 2,
+        width / 2 - font_metrics.width(text) / 2,
+        height / 2 + content_height / 2 - font_metrics.height() / 2,
         text,
     )
     painter.drawPixmap(
-        view.width() / 2 - pix_map.width() / 2,
-        view.height() / 2 - content_height / 2,
+        width / 2 - pix_map.width() / 2,
+        height / 2 - content_height / 2,
         pix_map,
     )
-    painter.end()
 
 
 class MOptionDelegate(QtWidgets.QStyledItemDelegate):
@@ -65,7 +68,7 @@ class MOptionDelegate(QtWidgets.QStyledItemDelegate):
         self.editor.setWindowFlags(QtCore.Qt.FramelessWindowHint | QtCore.Qt.Window)
         model = utils.real_model(index)
         real_index = utils.real_index(index)
-        data_obj = real_index.internalPointer()
+        data_obj = utils.real_data_obj(real_index)
         attr = "{}_list".format(model.header_list[real_index.column()].get("key"))
 
         self.editor.set_data(utils.get_obj_value(data_obj, attr, []))
@@ -148,19 +151,13 @@ def enable_context_menu(self, enable):
 def slot_context_menu(self, point):
     proxy_index = self.indexAt(point)
     if proxy_index.isValid():
-        need_map = isinstance(self.model(), QtCore.QSortFilterProxyModel)
         selection = []
         selected = (
             self.selectionModel().selectedRows() or
             self.selectionModel().selectedIndexes()
         )
         for index in selected:
-            if need_map:
-                source_index = self.model().mapToSource(index)
-                data_obj = source_index.internalPointer()
-            else:
-                data_obj = index.internalPointer()
-            selection.append(data_obj)
+            selection.append(utils.real_data_obj(index))
         event = utils.ItemViewMenuEvent(view=self, selection=selection, extra={})
         self.sig_context_menu.emit(event)
     else:
@@ -168,6 +165,82 @@ def slot_context_menu(self, point):
         self.sig_context_menu.emit(event)
 
 
+@QtCore.Slot()
+def update_empty_state(self):
+    """
+    Check whether the view has no row to show, it is called again by the signals of its model,
+    so paintEvent doesn't look at the model. Rows hidden by a filter count as no row.
+    """
+    model = self.model()
+    watched_models = [] if model is None else [model]
+    if watched_models != self._empty_models:
+        for old_model in self._empty_models:
+            try:
+                for signal in _get_empty_signals(old_model):
+                    signal.disconnect(self.update_empty_state)
+            except (RuntimeError, TypeError):
+                # 旧的 model 已经被删除
+                pass
+        for new_model in watched_models:
+            for signal in _get_empty_signals(new_model):
+                signal.connect(self.update_empty_state)
+        self._empty_models = watched_models
+    is_empty = model is None or model.rowCount() == 0
+    if is_empty != self._is_empty:
+        self._is_empty = is_empty
+        if not is_empty:
+            self._empty_pixmap = None
+            self._empty_pixmap_key = None
+        self.viewport().update()
+
+
+def _get_empty_signals(model):
+    signals = [model.rowsInserted, model.rowsRemoved, model.modelReset, model.layoutChanged]
+    if isinstance(model, QtCore.QAbstractProxyModel):
+        # 换了源模型
+        signals.append(model.sourceModelChanged)
+    return signals
+
+
+def draw_empty_state(self):
+    """
+    Draw the preset picture and text on the viewport while the model has no data.
+    They are rendered once into a pixmap, again when the viewport size, the text, the image or the theme changes.
+    """
+    if not self._is_empty:
+        return
+    viewport = self.viewport()
+    ratio = viewport.devicePixelRatioF()
+    key = (
+        viewport.width(),
+        viewport.height(),
+        ratio,
+        self._no_data_text,
+        None if self._no_data_image is None else self._no_data_image.cacheKey(),
+        dayu_theme.secondary_text_color,
+        viewport.font().key(),
+    )
+    if key != self._empty_pixmap_key:
+        pixmap = QtGui.QPixmap(viewport.size() * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.setFont(viewport.font())
+        _paint_empty_content(
+            painter,
+            viewport.width(),
+            viewport.height(),
+            self._no_data_text,
+            self._no_data_image or MPixmap("empty.svg"),
+        )
+        painter.end()
+        self._empty_pixmap = pixmap
+        self._empty_pixmap_key = key
+    painter = QtGui.QPainter(viewport)
+    painter.drawPixmap(0, 0, self._empty_pixmap)
+    painter.end()
+
+
 def mouse_move_event(self, event):
     index = self.indexAt(event.pos())
     real_index = utils.real_index(index)
@@ -205,12 +278,19 @@ class MTableView(QtWidgets.QTableView):
     set_header_list = set_header_list
     enable_context_menu = enable_context_menu
     slot_context_menu = slot_context_menu
+    update_empty_state = update_empty_state
+    draw_empty_state = draw_empty_state
     sig_context_menu = QtCore.Signal(object)
 
     def __init__(self, size=None, show_row_count=False, parent=None):
         super(MTableView, self).__init__(parent)
         self._no_data_image = None
         self._no_data_text = self.tr("No Data")
+        # 缓存的空数据状态和画好的图片，见 update_empty_state 和 draw_empty_state
+        self._is_empty = True
+        self._empty_models = []
+        self._empty_pixmap = None
+        self._empty_pixmap_key = None
         size = size or dayu_theme.default_size
         ver_header_view = MHeaderView(QtCore.Qt.Vertical, parent=self, show_sort_indicator=False)
         ver_header_view.setDefaultSectionSize(size)
@@ -263,14 +343,13 @@ class MTableView(QtWidgets.QTableView):
         #     'edit': None
         # }
 
+    def setModel(self, model):
+        super(MTableView, self).setModel(model)
+        self.update_empty_state()
+
     def paintEvent(self, event):
         """Override paintEvent when there is no data to show, draw the preset picture and text."""
-        model = utils.real_model(self.model())
-        if model is None:
-            draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
-        elif isinstance(model, MTableModel):
-            if not model.get_data_list():
-                draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
+        self.draw_empty_state()
         return super(MTableView, self).paintEvent(event)
 
     def save_state(self, name):
@@ -297,26 +376,32 @@ class MTreeView(QtWidgets.QTreeView):
     set_header_list = set_header_list
     enable_context_menu = enable_context_menu
     slot_context_menu = slot_context_menu
+    update_empty_state = update_empty_state
+    draw_empty_state = draw_empty_state
     sig_context_menu = QtCore.Signal(object)
 
     def __init__(self, parent=None):
         super(MTreeView, self).__init__(parent)
         self._no_data_image = None
         self._no_data_text = self.tr("No Data")
+        # 缓存的空数据状态和画好的图片，见 update_empty_state 和 draw_empty_state
+        self._is_empty = True
+        self._empty_models = []
+        self._empty_pixmap = None
+        self._empty_pixmap_key = None
         self.header_list = []
         self.header_view = MHeaderView(QtCore.Qt.Horizontal)
         self.setHeader(self.header_view)
         self.setSortingEnabled(True)
         self.setAlternatingRowColors(True)
 
+    def setModel(self, model):
+        super(MTreeView, self).setModel(model)
+        self.update_empty_state()
+
     def paintEvent(self, event):
         """Override paintEvent when there is no data to show, draw the preset picture and text."""
-        model = utils.real_model(self.model())
-        if model is None:
-            draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
-        elif isinstance(model, MTableModel):
-            if not model.get_data_list():
-                draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
+        self.draw_empty_state()
         return super(MTreeView, self).paintEvent(event)
 
     def set_no_data_text(self, text):
@@ -327,12 +412,19 @@ class MBigView(QtWidgets.QListView):
     set_header_list = set_header_list
     enable_context_menu = enable_context_menu
     slot_context_menu = slot_context_menu
+    update_empty_state = update_empty_state
+    draw_empty_state = draw_empty_state
     sig_context_menu = QtCore.Signal(object)
 
     def __init__(self, parent=None):
         super(MBigView, self).__init__(parent)
         self._no_data_image = None
         self._no_data_text = self.tr("No Data")
+        # 缓存的空数据状态和画好的图片，见 update_empty_state 和 draw_empty_state
+        self._is_empty = True
+        self._empty_models = []
+        self._empty_pixmap = None
+        self._empty_pixmap_key = None
         self.header_list = []
         self.header_view = None
         self.setViewMode(QtWidgets.QListView.IconMode)
@@ -363,14 +455,13 @@ class MBigView(QtWidgets.QListView):
         else:
             super(MBigView, self).wheelEvent(event)
 
+    def setModel(self, model):
+        super(MBigView, self).setModel(model)
+        self.update_empty_state()
+
     def paintEvent(self, event):
         """Override paintEvent when there is no data to show, draw the preset picture and text."""
-        model = utils.real_model(self.model())
-        if model is None:
-            draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
-        elif isinstance(model, MTableModel):
-            if not model.get_data_list():
-                draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
+        self.draw_empty_state()
         return super(MBigView, self).paintEvent(event)
 
     def set_no_data_text(self, text):
@@ -381,12 +472,19 @@ class MListView(QtWidgets.QListView):
     set_header_list = set_header_list
     enable_context_menu = enable_context_menu
     slot_context_menu = slot_context_menu
+    update_empty_state = update_empty_state
+    draw_empty_state = draw_empty_state
     sig_context_menu = QtCore.Signal(object)
 
     def __init__(self, size=None, parent=None):
         super(MListView, self).__init__(parent)
         self._no_data_image = None
         self._no_data_text = self.tr("No Data")
+        # 缓存的空数据状态和画好的图片，见 update_empty_state 和 draw_empty_state
+        self._is_empty = True
+        self._empty_models = []
+        self._empty_pixmap = None
+        self._empty_pixmap_key = None
         self.setProperty("dayu_size", size or dayu_theme.default_size)
         self.header_list = []
         self.header_view = None
@@ -401,14 +499,13 @@ class MListView(QtWidgets.QListView):
         else:
             self.setModelColumn(0)
 
+    def setModel(self, model):
+        super(MListView, self).setModel(model)
+        self.update_empty_state()
+
     def paintEvent(self, event):
         """Override paintEvent when there is no data to show, draw the preset picture and text."""
-        model = utils.real_model(self.model())
-        if model is None:
-            draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
-        elif isinstance(model, MTableModel):
-            if not model.get_data_list():
-                draw_empty_content(self.viewport(), self._no_data_text, self._no_data_image)
+        self.draw_empty_state()
         return super(MListView, self).paintEvent(event)
 
     def set_no_data_text(self, text):
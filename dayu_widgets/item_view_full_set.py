@@ -4,12 +4,16 @@ from qtpy import QtWidgets
 
 # Import local modules
 from dayu_widgets.button_group import MToolButtonGroup
+from dayu_widgets.data_loader import MDataLoader
+from dayu_widgets.facet_filter import MFacetFilter
 from dayu_widgets.item_model import MSortFilterModel
 from dayu_widgets.item_model import MTableModel
 from dayu_widgets.item_view import MBigView
 from dayu_widgets.item_view import MTableView
 from dayu_widgets.line_edit import MLineEdit
+from dayu_widgets.loading import MLoadingWrapper
 from dayu_widgets.page import MPage
+from dayu_widgets.page_provider import MPageLoader
 from dayu_widgets.tool_button import MToolButton
 
 
@@ -21,14 +25,34 @@ class MItemViewFullSet(QtWidgets.QWidget):
     sig_current_column_changed = QtCore.Signal(QtCore.QModelIndex, QtCore.QModelIndex)
     sig_selection_changed = QtCore.Signal(QtCore.QItemSelection, QtCore.QItemSelection)
     sig_context_menu = QtCore.Signal(object)
+    sig_load_progress = QtCore.Signal(int)
+    sig_load_finished = QtCore.Signal()
+    SourceModelType = MTableModel
+    # 顶层行数不少于这个值时，搜索框的输入在后台线程里匹配，None 表示总是在 GUI 线程匹配
+    AsyncFilterThreshold = 50000
+    # append 的行缓存这么多毫秒（一帧）再一起插入，None 表示马上插入
+    AppendDelay = 16
 
     def __init__(self, table_view=True, big_view=False, parent=None):
         super(MItemViewFullSet, self).__init__(parent)
         self.sort_filter_model = MSortFilterModel()
-        self.source_model = MTableModel()
+        self.sort_filter_model.set_async_filter_threshold(self.AsyncFilterThreshold)
+        self.source_model = self.SourceModelType()
+        if hasattr(self.source_model, "set_append_delay"):
+            self.source_model.set_append_delay(self.AppendDelay)
         self.sort_filter_model.setSourceModel(self.source_model)
 
         self.stack_widget = QtWidgets.QStackedWidget()
+        self._loading_wrapper = MLoadingWrapper(self.stack_widget, loading=False)
+
+        self.data_loader = MDataLoader(parent=self)
+        self.data_loader.sig_rows_loaded.connect(self._slot_rows_loaded)
+        self.data_loader.sig_progress.connect(self.sig_load_progress)
+        self.data_loader.sig_finished.connect(self._slot_load_finished)
+
+        self.page_loader = MPageLoader(parent=self)
+        self.page_loader.sig_page_loaded.connect(self._slot_page_loaded)
+        self.page_loader.sig_loading_changed.connect(self._loading_wrapper.set_dayu_loading)
 
         self.view_button_grp = MToolButtonGroup(exclusive=True)
         data_group = []
@@ -37,6 +61,7 @@ class MItemViewFullSet(QtWidgets.QWidget):
             self.table_view.doubleClicked.connect(self.sig_double_clicked)
             self.table_view.pressed.connect(self.slot_left_clicked)
             self.table_view.setModel(self.sort_filter_model)
+            self.table_view.horizontalHeader().sortIndicatorChanged.connect(self._slot_sort_changed)
             self.stack_widget.addWidget(self.table_view)
             data_group.append({"svg": "table_view.svg", "checkable": True, "tooltip": "Table View"})
         if big_view:
@@ -72,19 +97,28 @@ class MItemViewFullSet(QtWidgets.QWidget):
         self.search_line_edit = MLineEdit().search().small()
         self.search_attr_button = MToolButton().icon_only().svg("down_fill.svg").small()
         self.search_line_edit.set_prefix_widget(self.search_attr_button)
-        self.search_line_edit.textChanged.connect(self.sort_filter_model.set_search_pattern)
+        self.search_line_edit.textChanged.connect(self._slot_search_changed)
         self.search_line_edit.setVisible(False)
 
         self.top_lay.addStretch()
         self.top_lay.addWidget(self.search_line_edit)
         self.tool_bar.setLayout(self.top_lay)
 
+        self.facet_filter = MFacetFilter()
+        self.facet_filter.setVisible(False)
+        self.facet_filter.set_model(self.sort_filter_model)
+        self._content_lay = QtWidgets.QHBoxLayout()
+        self._content_lay.setContentsMargins(0, 0, 0, 0)
+        self._content_lay.addWidget(self.facet_filter)
+        self._content_lay.addWidget(self._loading_wrapper, 1)
+
         self.page_set = MPage()
+        self.page_set.sig_page_changed.connect(self._slot_page_changed)
         self.main_lay = QtWidgets.QVBoxLayout()
         self.main_lay.setSpacing(5)
         self.main_lay.setContentsMargins(0, 0, 0, 0)
         self.main_lay.addWidget(self.tool_bar)
-        self.main_lay.addWidget(self.stack_widget)
+        self.main_lay.addLayout(self._content_lay)
         self.main_lay.addWidget(self.page_set)
         self.setLayout(self.main_lay)
 
@@ -131,10 +165,80 @@ class MItemViewFullSet(QtWidgets.QWidget):
 
     @QtCore.Slot()
     def setup_data(self, data_list):
+        """
+        Set the data of the views.
+        :param data_list: list of rows, or a data source callable returning an iterable of rows,
+                          which is loaded in a background thread, see MDataLoader.
+        :return: None
+        """
+        self.data_loader.cancel()
+        self.page_loader.set_provider(None)
         self.source_model.clear()
+        if callable(data_list):
+            self._loading_wrapper.set_dayu_loading(True)
+            self.set_record_count(0)
+            self.data_loader.load(data_list)
+            return
+        self._loading_wrapper.set_dayu_loading(False)
         if data_list:
             self.source_model.set_data_list(data_list)
-        self.set_record_count(len(data_list))
+        self.set_record_count(self.source_model.rowCount())
+
+    @QtCore.Slot(list)
+    def _slot_rows_loaded(self, data_list):
+        self._loading_wrapper.set_dayu_loading(False)
+        self.source_model.append_many(data_list)
+        self.set_record_count(self.source_model.rowCount())
+
+    @QtCore.Slot()
+    def _slot_load_finished(self):
+        self._loading_wrapper.set_dayu_loading(False)
+        self.sig_load_finished.emit()
+
+    def set_page_provider(self, provider):
+        """
+        Show the data of a page provider page by page, only the current page is kept in the model.
+        Paging, sorting and searching are done by the provider, see dayu_widgets.page_provider.
+        :param provider: object with fetch(offset, limit, sort, filter) -> (rows, total)
+        :return: None
+        """
+        self.data_loader.cancel()
+        self.source_model.clear()
+        self.sort_filter_model.set_search_pattern(None)
+        self.page_loader.set_provider(provider)
+        self.page_loader.filter = self.search_line_edit.text() or None
+        self.page_loader.set_page(1, self.page_set.field("page_size_selected"))
+
+    @QtCore.Slot(list, int)
+    def _slot_page_loaded(self, data_list, total):
+        self.source_model.set_data_list(data_list)
+        # 不用 set_total，它会跳回第一页。
+        # 总数变小时先改当前页，避免页码框被截断后发出旧的页码
+        field_list = [("total", total), ("current_page", self.page_loader.page)]
+        if total < self.page_set.field("total"):
+            field_list.reverse()
+        for name, value in field_list:
+            self.page_set.set_field(name, value)
+
+    @QtCore.Slot(int, int)
+    def _slot_page_changed(self, page_size, page):
+        if self.page_loader.provider is None:
+            return
+        if (page, page_size) != (self.page_loader.page, self.page_loader.page_size):
+            self.page_loader.set_page(page, page_size)
+
+    @QtCore.Slot(str)
+    def _slot_search_changed(self, text):
+        if self.page_loader.provider is None:
+            self.sort_filter_model.set_search_pattern(text)
+        else:
+            self.page_loader.set_filter(text)
+
+    @QtCore.Slot(int, QtCore.Qt.SortOrder)
+    def _slot_sort_changed(self, column, order):
+        if self.page_loader.provider is None or column >= len(self.source_model.header_list):
+            return
+        self.page_loader.set_sort(self.source_model.header_list[column].get("key"), order)
 
     @QtCore.Slot(int)
     def set_record_count(self, total):
@@ -147,3 +251,8 @@ class MItemViewFullSet(QtWidgets.QWidget):
         """Enable search line edit visible."""
         self.search_line_edit.setVisible(True)
         return self
+
+    def filterable(self):
+        """Enable facet filter panel visible, it shows the default_filter columns of header_list."""
+        self.facet_filter.setVisible(True)
+        return self
@@ -3,6 +3,7 @@ from qtpy import QtCore
 from qtpy import QtWidgets
 
 # Import local modules
+from dayu_widgets.data_loader import MDataLoader
 from dayu_widgets.item_model import MSortFilterModel
 from dayu_widgets.item_model import MTableModel
 from dayu_widgets.item_view import MBigView
@@ -10,16 +11,24 @@ from dayu_widgets.item_view import MListView
 from dayu_widgets.item_view import MTableView
 from dayu_widgets.item_view import MTreeView
 from dayu_widgets.line_edit import MLineEdit
+from dayu_widgets.loading import MLoadingWrapper
 from dayu_widgets.tool_button import MToolButton
 
 
 class MItemViewSet(QtWidgets.QWidget):
     sig_double_clicked = QtCore.Signal(QtCore.QModelIndex)
     sig_left_clicked = QtCore.Signal(QtCore.QModelIndex)
+    sig_load_progress = QtCore.Signal(int)
+    sig_load_finished = QtCore.Signal()
     TableViewType = MTableView
     BigViewType = MBigView
     TreeViewType = MTreeView
     ListViewType = MListView
+    SourceModelType = MTableModel
+    # 顶层行数不少于这个值时，搜索框的输入在后台线程里匹配，None 表示总是在 GUI 线程匹配
+    AsyncFilterThreshold = 50000
+    # append 的行缓存这么多毫秒（一帧）再一起插入，None 表示马上插入
+    AppendDelay = 16
 
     def __init__(self, view_type=None, parent=None):
         super(MItemViewSet, self).__init__(parent)
@@ -28,13 +37,22 @@ class MItemViewSet(QtWidgets.QWidget):
         self.main_lay.setContentsMargins(0, 0, 0, 0)
 
         self.sort_filter_model = MSortFilterModel()
-        self.source_model = MTableModel()
+        self.sort_filter_model.set_async_filter_threshold(self.AsyncFilterThreshold)
+        self.source_model = self.SourceModelType()
+        if hasattr(self.source_model, "set_append_delay"):
+            self.source_model.set_append_delay(self.AppendDelay)
         self.sort_filter_model.setSourceModel(self.source_model)
         view_class = view_type or MItemViewSet.TableViewType
         self.item_view = view_class()
         self.item_view.doubleClicked.connect(self.sig_double_clicked)
         self.item_view.pressed.connect(self.slot_left_clicked)
         self.item_view.setModel(self.sort_filter_model)
+        self._loading_wrapper = MLoadingWrapper(self.item_view, loading=False)
+
+        self.data_loader = MDataLoader(parent=self)
+        self.data_loader.sig_rows_loaded.connect(self._slot_rows_loaded)
+        self.data_loader.sig_progress.connect(self.sig_load_progress)
+        self.data_loader.sig_finished.connect(self._slot_load_finished)
 
         self._search_line_edit = MLineEdit().search().small()
         self._search_attr_button = MToolButton().icon_only().svg("down_fill.svg").small()
@@ -47,7 +65,7 @@ class MItemViewSet(QtWidgets.QWidget):
         self._search_lay.addWidget(self._search_line_edit)
 
         self.main_lay.addLayout(self._search_lay)
-        self.main_lay.addWidget(self.item_view)
+        self.main_lay.addWidget(self._loading_wrapper)
         self.setLayout(self.main_lay)
 
     @QtCore.Slot(QtCore.QModelIndex)
@@ -66,10 +84,32 @@ class MItemViewSet(QtWidgets.QWidget):
 
     @QtCore.Slot()
     def setup_data(self, data_list):
+        """
+        Set the data of the view.
+        :param data_list: list of rows, or a data source callable returning an iterable of rows,
+                          which is loaded in a background thread, see MDataLoader.
+        :return: None
+        """
+        self.data_loader.cancel()
         self.source_model.clear()
+        if callable(data_list):
+            self._loading_wrapper.set_dayu_loading(True)
+            self.data_loader.load(data_list)
+            return
+        self._loading_wrapper.set_dayu_loading(False)
         if data_list:
             self.source_model.set_data_list(data_list)
 
+    @QtCore.Slot(list)
+    def _slot_rows_loaded(self, data_list):
+        self._loading_wrapper.set_dayu_loading(False)
+        self.source_model.append_many(data_list)
+
+    @QtCore.Slot()
+    def _slot_load_finished(self):
+        self._loading_wrapper.set_dayu_loading(False)
+        self.sig_load_finished.emit()
+
     def get_data(self):
         return self.source_model.get_data_list()
 
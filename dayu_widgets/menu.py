@@ -21,6 +21,7 @@ except ImportError:
 from dayu_widgets.mixin import property_mixin
 from dayu_widgets.popup import MPopup
 from dayu_widgets.line_edit import MLineEdit
+from dayu_widgets.trigram_index import MTrigramPattern
 import dayu_widgets.utils as utils
 
 
@@ -568,6 +569,8 @@ class SearchableMenuBase(ScrollableMenuBase):
 
         self.setProperty("searchable", True)
         self.setProperty("search_re", "I")
+        # 为 True 时按 trigram 相似度模糊匹配，打错几个字母也能找到
+        self.setProperty("search_fuzzy", False)
 
     def search_key_event(self, call, event):
         key = event.key()
@@ -594,6 +597,9 @@ class SearchableMenuBase(ScrollableMenuBase):
             raise TypeError("`search_re` property should be a string type")
 
     def slot_search_change(self, text):
+        if text and self.property("search_fuzzy"):
+            self._update_search(MTrigramPattern(text))
+            return
         flags = 0
         for m in self.property("search_re") or "":
             flags |= getattr(re, m.upper(), 0)
@@ -606,11 +612,11 @@ class SearchableMenuBase(ScrollableMenuBase):
         for action in actions:
             menu = action.menu()
             if not menu:
-                is_match = bool(re.match(search_reg, action.text()))
+                is_match = bool(search_reg.match(action.text())) if search_reg else True
                 action.setVisible(is_match)
                 is_match and vis_list.append(action)
             else:
-                is_match = bool(re.match(search_reg, menu.title()))
+                is_match = bool(search_reg.match(menu.title())) if search_reg else True
                 self._update_search("" if is_match else search_reg, menu)
 
         if parent_menu:
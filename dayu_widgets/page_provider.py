@@ -0,0 +1,281 @@
+"""
+Paged data providers and MPageLoader.
+A page provider returns one page of rows at a time, so the views only hold the current page
+no matter how big the dataset is:
+
+    provider.fetch(offset, limit, sort=None, filter=None) -> (rows, total)
+
+sort is None or a tuple (key, QtCore.Qt.SortOrder), filter is None or a search text.
+fetch is called in a QThreadPool worker, it must not touch any widget.
+"""
+
+# Import built-in modules
+from collections import OrderedDict
+import contextlib
+import sqlite3
+import threading
+
+# Import third-party modules
+from qtpy import QtCore
+
+# Import local modules
+from dayu_widgets.utils import get_obj_value
+from dayu_widgets.utils import get_total_page
+
+
+class MListPageProvider(object):
+    """
+    A page provider over a list in memory, mainly as a stand-in for a database in tests and demos.
+    :param data_list: list of dict/object
+    :param search_keys: the keys searched by filter, case insensitive.
+    """
+
+    def __init__(self, data_list, search_keys=None):
+        super(MListPageProvider, self).__init__()
+        self.data_list = data_list
+        self.search_keys = search_keys or []
+        self._lock = threading.Lock()
+        # 只缓存最近一次排序/筛选的结果，翻页时不用重新计算
+        self._view_key = None
+        self._view = None
+
+    def _get_view(self, sort, filter):
+        if self._view_key == (sort, filter):
+            return self._view
+        result = self.data_list
+        if filter:
+            text = filter.lower()
+            result = [
+                data_obj
+                for data_obj in result
+                if any(text in str(get_obj_value(data_obj, key, "")).lower() for key in self.search_keys)
+            ]
+        if sort:
+            key, order = sort
+            result = sorted(
+                result,
+                key=lambda data_obj: (get_obj_value(data_obj, key) is None, get_obj_value(data_obj, key)),
+                reverse=order == QtCore.Qt.DescendingOrder,
+            )
+        self._view_key = (sort, filter)
+        self._view = result
+        return result
+
+    def fetch(self, offset, limit, sort=None, filter=None):
+        with self._lock:
+            view = self._get_view(sort, filter)
+            return view[offset : offset + limit], len(view)
+
+
+class MSqlitePageProvider(object):
+    """
+    A page provider reading one table of a SQLite database with LIMIT/OFFSET.
+    Each fetch opens its own connection and closes it, so the database must be a file, not ":memory:".
+    :param database: path of the database file
+    :param table: table name
+    :param search_keys: the columns searched by filter with LIKE, "%" and "_" in the filter match themselves.
+    """
+
+    def __init__(self, database, table, search_keys=None):
+        super(MSqlitePageProvider, self).__init__()
+        self.database = database
+        self.table = table
+        self.search_keys = search_keys or []
+        self._columns = None
+
+    def _connect(self):
+        # 每次 fetch 都在 QThreadPool 的线程里，连接用完就关掉，不留在线程上
+        connection = sqlite3.connect(self.database)
+        connection.row_factory = sqlite3.Row
+        return contextlib.closing(connection)
+
+    @staticmethod
+    def _escape_like(text):
+        return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    @staticmethod
+    def _quote(name):
+        return '"{}"'.format(name.replace('"', '""'))
+
+    def get_columns(self):
+        if self._columns is None:
+            with self._connect() as connection:
+                self._columns = self._get_columns(connection)
+        return self._columns
+
+    def _get_columns(self, connection):
+        if self._columns is None:
+            cursor = connection.execute("PRAGMA table_info({})".format(self._quote(self.table)))
+            self._columns = [row["name"] for row in cursor]
+        return self._columns
+
+    def fetch(self, offset, limit, sort=None, filter=None):
+        with self._connect() as connection:
+            return self._fetch(connection, offset, limit, sort, filter)
+
+    def _fetch(self, connection, offset, limit, sort, filter):
+        columns = self._get_columns(connection)
+        where = ""
+        params = []
+        if filter:
+            keys = [key for key in self.search_keys if key in columns]
+            if keys:
+                where = " WHERE " + " OR ".join("{} LIKE ? ESCAPE '\\'".format(self._quote(key)) for key in keys)
+                params = ["%{}%".format(self._escape_like(filter))] * len(keys)
+        order_by = ""
+        if sort and sort[0] in columns:
+            order_by = " ORDER BY {} {}".format(
+                self._quote(sort[0]), "DESC" if sort[1] == QtCore.Qt.DescendingOrder else "ASC"
+            )
+        table = self._quote(self.table)
+        total = connection.execute("SELECT COUNT(*) FROM {}{}".format(table, where), params).fetchone()[0]
+        cursor = connection.execute(
+            "SELECT * FROM {}{}{} LIMIT ? OFFSET ?".format(table, where, order_by), params + [limit, offset]
+        )
+        return [dict(row) for row in cursor], total
+
+
+class _MPageSignals(QtCore.QObject):
+    """Signals emitted from the worker thread, a child of MPageLoader."""
+
+    sig_done = QtCore.Signal(int, object, object, object)
+
+
+class _MPageRunnable(QtCore.QRunnable):
+    def __init__(self, signals, generation, provider, page_key):
+        super(_MPageRunnable, self).__init__()
+        self.setAutoDelete(True)
+        self.signals = signals
+        self.generation = generation
+        self.provider = provider
+        self.page_key = page_key
+
+    def run(self):
+        page, page_size, sort, filter = self.page_key
+        result = error = None
+        try:
+            try:
+                result = self.provider.fetch((page - 1) * page_size, page_size, sort, filter)
+            except Exception as fetch_error:
+                error = fetch_error
+            self.signals.sig_done.emit(self.generation, self.page_key, result, error)
+        except RuntimeError:
+            # MPageLoader 已经被删除
+            pass
+        finally:
+            self.signals = None
+            self.provider = None
+
+
+class MPageLoader(QtCore.QObject):
+    """
+    Drive a page provider: fetch the current page in a worker thread,
+    keep a LRU cache of the recent pages and prefetch the next page,
+    so flipping to a prefetched page does not wait for the provider at all.
+    """
+
+    sig_page_loaded = QtCore.Signal(list, int)
+    sig_loading_changed = QtCore.Signal(bool)
+    sig_error = QtCore.Signal(object)
+
+    def __init__(self, provider=None, cache_size=8, thread_pool=None, parent=None):
+        super(MPageLoader, self).__init__(parent)
+        self.provider = provider
+        self.cache_size = cache_size
+        self.thread_pool = thread_pool or QtCore.QThreadPool.globalInstance()
+        self.page = 1
+        self.page_size = 25
+        self.sort = None
+        self.filter = None
+        self.total = None
+        self._page_cache = OrderedDict()
+        self._running_keys = set()
+        self._waiting_key = None
+        # invalidate 以后加一，忽略之前发起的请求的结果，同一页的 page_key 可能一样
+        self._generation = 0
+        self._signals = _MPageSignals(self)
+        self._signals.sig_done.connect(self._slot_fetch_done)
+
+    def set_provider(self, provider):
+        """Set the provider and drop all cached pages. The current page is not reloaded."""
+        self.provider = provider
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop all cached pages, call it when the data behind the provider changed."""
+        self._page_cache.clear()
+        self._running_keys = set()
+        self._generation += 1
+        self._waiting_key = None
+        self.total = None
+
+    def cached_pages(self):
+        return list(self._page_cache.keys())
+
+    def _current_key(self):
+        return self.page, self.page_size, self.sort, self.filter
+
+    def set_page(self, page, page_size=None):
+        """Show the given page, from the cache if it is there, otherwise fetch it in a worker thread."""
+        self.page = max(page, 1)
+        if page_size:
+            self.page_size = page_size
+        self.reload()
+
+    def set_sort(self, key, order=QtCore.Qt.AscendingOrder):
+        self.sort = (key, order) if key else None
+        self.set_page(1)
+
+    def set_filter(self, filter):
+        self.filter = filter or None
+        self.set_page(1)
+
+    def reload(self):
+        if self.provider is None:
+            return
+        page_key = self._current_key()
+        result = self._page_cache.get(page_key)
+        if result is None:
+            self._waiting_key = page_key
+            self.sig_loading_changed.emit(True)
+            self._start_fetch(page_key)
+            return
+        self._waiting_key = None
+        self._page_cache.move_to_end(page_key)
+        self._show_page(result)
+
+    def _show_page(self, result):
+        rows, total = result
+        self.total = total
+        self.sig_loading_changed.emit(False)
+        self.sig_page_loaded.emit(list(rows), total)
+        # 用户看当前页的时候，预取下一页
+        if self.page < get_total_page(total, self.page_size):
+            next_key = (self.page + 1, self.page_size, self.sort, self.filter)
+            if next_key not in self._page_cache:
+                self._start_fetch(next_key)
+
+    def _start_fetch(self, page_key):
+        if page_key in self._running_keys:
+            return
+        self._running_keys.add(page_key)
+        self.thread_pool.start(_MPageRunnable(self._signals, self._generation, self.provider, page_key))
+
+    @QtCore.Slot(int, object, object, object)
+    def _slot_fetch_done(self, generation, page_key, result, error):
+        if generation != self._generation:
+            # invalidate 之前发起的请求
+            return
+        self._running_keys.discard(page_key)
+        if error is not None:
+            if page_key == self._waiting_key:
+                self._waiting_key = None
+                self.sig_loading_changed.emit(False)
+                self.sig_error.emit(error)
+            return
+        self._page_cache[page_key] = result
+        while len(self._page_cache) > self.cache_size:
+            self._page_cache.popitem(last=False)
+        if page_key == self._waiting_key:
+            self._waiting_key = None
+            self._show_page(result)
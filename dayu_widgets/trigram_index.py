@@ -0,0 +1,301 @@
+"""
+MTrigramIndex
+Trigram index of texts for fuzzy search, the matches are ranked by similarity.
+"""
+
+# Import built-in modules
+import functools
+import math
+import re
+
+# Import local modules
+from dayu_widgets.facet_index import bits_to_mask
+from dayu_widgets.facet_index import rows_to_bits
+
+
+DEFAULT_FUZZY_THRESHOLD = 0.3
+# 单词由字母和数字组成，下划线、空格、标点都是分隔符
+_WORD_REGEX = re.compile(r"[^\W_]+")
+# 包含的行数超过这个值的 trigram，缓存它的 bitset 并随数据增量更新
+_DENSE_POSTING_SIZE = 512
+
+
+def get_trigrams(text):
+    """
+    Return the frozenset of the trigrams of text, like pg_trgm each lowercase word is padded
+    with two spaces before and one after, so "rig" gives "  r", " ri", "rig" and "ig ".
+    """
+    return _get_words_trigrams(_get_words(text))
+
+
+def _get_words(text):
+    return tuple(_WORD_REGEX.findall(text.lower())) if text else ()
+
+
+def _get_words_trigrams(words):
+    if len(words) == 1:
+        return _get_word_trigrams(words[0])
+    return frozenset().union(*map(_get_word_trigrams, words))
+
+
+@functools.lru_cache(maxsize=65536)
+def _get_word_trigrams(word):
+    # 名字里的单词重复很多，缓存下来建立索引快很多
+    word = "  " + word + " "
+    return frozenset(word[i : i + 3] for i in range(len(word) - 2))
+
+
+def get_min_common(trigram_count, threshold):
+    """Return how many of the trigram_count trigrams of a query a text needs to reach threshold."""
+    return max(1, int(math.ceil(trigram_count * threshold - 1e-9)))
+
+
+class MTrigramPattern(object):
+    """
+    A fuzzy pattern, the similarity of a text is the part of the trigrams of the pattern found in it.
+    It has the match method of a compiled regular expression, so it can be used in place of one.
+    :param pattern: the text searched
+    :param threshold: the minimum similarity from 0 to 1 of a matching text
+    """
+
+    def __init__(self, pattern, threshold=DEFAULT_FUZZY_THRESHOLD):
+        super(MTrigramPattern, self).__init__()
+        self.pattern = pattern
+        self.threshold = threshold
+        self.trigrams = get_trigrams(pattern)
+
+    def similarity(self, text):
+        """Return the similarity of text from 0 to 1, 0 if the pattern has no trigram."""
+        if not self.trigrams or not text:
+            return 0.0
+        common = len(self.trigrams & get_trigrams(text))
+        if common < get_min_common(len(self.trigrams), self.threshold):
+            return 0.0
+        return common / float(len(self.trigrams))
+
+    def match(self, text):
+        """Return True if the similarity of text reaches the threshold."""
+        return self.similarity(text) > 0
+
+
+class MTrigramMatches(object):
+    """
+    The rows of a MTrigramIndex matching a query, the result of MTrigramIndex.search.
+    Rows are grouped by the count of trigrams they share with the query, each group is a "0"/"1" mask by row id,
+    so testing a row or getting its score doesn't walk the matches.
+    They follow the rows removed and moved in the index, search again after inserting rows,
+    it can give new ids to all the rows.
+    """
+
+    def __init__(self, trigram_index, levels, accepted_mask):
+        super(MTrigramMatches, self).__init__()
+        self._trigram_index = trigram_index
+        # 索引增删行时原地修改这个 list
+        self._row_ids = trigram_index._row_ids
+        # [(score, mask)]，从高分到低分
+        self._levels = levels
+        self._accepted_mask = accepted_mask
+
+    def __len__(self):
+        return self._accepted_mask.count("1")
+
+    def contains(self, row):
+        entry_id = self._row_ids[row]
+        return entry_id < len(self._accepted_mask) and self._accepted_mask[entry_id] == "1"
+
+    def get_score(self, row):
+        """Return the similarity of a row, 0 if it doesn't match."""
+        entry_id = self._row_ids[row]
+        if entry_id >= len(self._accepted_mask) or self._accepted_mask[entry_id] != "1":
+            return 0.0
+        for score, mask in self._levels:
+            if entry_id < len(mask) and mask[entry_id] == "1":
+                return score
+        return 0.0
+
+    def ranked(self, limit=None):
+        """
+        Return the list of (row, score) from the best score,
+        rows with the same score are in the order they were added to the index.
+        :param limit: only return the limit best rows
+        """
+        id_rows = self._trigram_index.get_id_rows()
+        result = []
+        for score, mask in self._levels:
+            entry_id = mask.find("1")
+            while entry_id != -1:
+                if limit is not None and len(result) >= limit:
+                    return result
+                result.append((id_rows[entry_id], score))
+                entry_id = mask.find("1", entry_id + 1)
+        return result
+
+
+class MTrigramIndex(object):
+    """
+    Map each trigram to the rows whose text contains it.
+    Each row has a stable id, so removing, inserting or moving rows only touches these rows,
+    the postings of the trigrams are sets of ids, the ones of many rows also keep a bitset by id.
+    A query adds the bitsets of its trigrams with bit-sliced counters, the count of every row
+    is computed in a few big int operations instead of a loop over the candidates.
+    """
+
+    def __init__(self):
+        super(MTrigramIndex, self).__init__()
+        self._row_ids = []
+        # 每个 id 的单词，删除和修改时用来找到它的 trigram
+        self._id_words = {}
+        self._postings = {}
+        self._dense_bits = {}
+        self._next_id = 0
+        # id -> row，行的位置变了以后按需重建
+        self._id_rows = None
+
+    def __len__(self):
+        return len(self._row_ids)
+
+    def rebuild(self, texts):
+        """Index the texts again, one text or None for each row."""
+        self.__init__()
+        self.insert_rows(0, texts)
+
+    def insert_rows(self, first, texts):
+        """Rows are just inserted at first, with one text or None for each."""
+        if self._next_id > 2 * len(self._row_ids):
+            # 删掉很多行以后 id 变得稀疏，bitset 也跟着变长，重新编号
+            self._renumber()
+        new_ids = list(range(self._next_id, self._next_id + len(texts)))
+        self._next_id += len(texts)
+        self._row_ids[first:first] = new_ids
+        self._add_entries(zip(new_ids, texts))
+        self._id_rows = None
+
+    def remove_rows(self, first, last):
+        """Rows first to last are just removed."""
+        for entry_id in self._row_ids[first : last + 1]:
+            self._remove_entry(entry_id)
+        del self._row_ids[first : last + 1]
+        self._id_rows = None
+
+    def move_rows(self, first, last, dest_row):
+        """Rows first to last are just moved before dest_row, the row numbers before the move."""
+        moved_ids = self._row_ids[first : last + 1]
+        del self._row_ids[first : last + 1]
+        if dest_row > last:
+            dest_row -= len(moved_ids)
+        self._row_ids[dest_row:dest_row] = moved_ids
+        self._id_rows = None
+
+    def update_rows(self, first, texts):
+        """The texts of the rows from first are just changed."""
+        changed_entries = []
+        for row, text in enumerate(texts, first):
+            entry_id = self._row_ids[row]
+            if _get_words(text) != self._id_words[entry_id]:
+                self._remove_entry(entry_id)
+                changed_entries.append((entry_id, text))
+        self._add_entries(changed_entries)
+
+    def _renumber(self):
+        """Give the rows the ids 0 to n - 1 again in their order."""
+        id_map = {entry_id: new_id for new_id, entry_id in enumerate(self._row_ids)}
+        self._id_words = {id_map[entry_id]: words for entry_id, words in self._id_words.items()}
+        self._postings = {
+            trigram: {id_map[entry_id] for entry_id in posting} for trigram, posting in self._postings.items()
+        }
+        # 大的 bitset 在下次搜索时重新生成
+        self._dense_bits = {}
+        self._row_ids[:] = range(len(self._row_ids))
+        self._next_id = len(self._row_ids)
+        self._id_rows = None
+
+    def get_id_rows(self):
+        """Return the dict of each row id to its row."""
+        if self._id_rows is None:
+            self._id_rows = {entry_id: row for row, entry_id in enumerate(self._row_ids)}
+        return self._id_rows
+
+    def _add_entries(self, entries):
+        # 先按单词分组，每个 trigram 的新 id 用 set 的 union 一次加入，比逐个 add 快很多
+        word_ids = {}
+        id_words = self._id_words
+        for entry_id, text in entries:
+            words = id_words[entry_id] = _get_words(text)
+            for word in words:
+                ids = word_ids.get(word)
+                if ids is None:
+                    word_ids[word] = [entry_id]
+                else:
+                    ids.append(entry_id)
+        trigram_words = {}
+        for word in word_ids:
+            for trigram in _get_word_trigrams(word):
+                trigram_words.setdefault(trigram, []).append(word_ids[word])
+        postings = self._postings
+        dense_bits = self._dense_bits
+        for trigram, id_lists in trigram_words.items():
+            posting = postings.get(trigram)
+            if posting is None:
+                postings[trigram] = set().union(*id_lists)
+                continue
+            if trigram in dense_bits:
+                dense_bits[trigram] |= rows_to_bits(set().union(*id_lists) - posting)
+            posting.update(*id_lists)
+
+    def _remove_entry(self, entry_id):
+        postings = self._postings
+        dense_bits = self._dense_bits
+        for trigram in _get_words_trigrams(self._id_words.pop(entry_id)):
+            posting = postings[trigram]
+            posting.discard(entry_id)
+            if not posting:
+                del postings[trigram]
+                dense_bits.pop(trigram, None)
+            elif trigram in dense_bits:
+                dense_bits[trigram] &= ~(1 << entry_id)
+
+    def _get_bits(self, trigram):
+        posting = self._postings.get(trigram)
+        if not posting:
+            return 0
+        bits = self._dense_bits.get(trigram)
+        if bits is None:
+            bits = rows_to_bits(posting)
+            if len(posting) > _DENSE_POSTING_SIZE:
+                self._dense_bits[trigram] = bits
+        return bits
+
+    def search(self, pattern, threshold=DEFAULT_FUZZY_THRESHOLD):
+        """
+        Return the MTrigramMatches of the rows sharing at least threshold of the trigrams of pattern.
+        :param pattern: the text searched, or a MTrigramPattern
+        :param threshold: the minimum similarity from 0 to 1, ignored for a MTrigramPattern
+        """
+        if not isinstance(pattern, MTrigramPattern):
+            pattern = MTrigramPattern(pattern, threshold)
+        trigram_count = len(pattern.trigrams)
+        if not trigram_count:
+            return MTrigramMatches(self, [], "")
+        # 按位切片的计数器: planes[i] 是每一行计数的第 i 位
+        planes = []
+        for trigram in pattern.trigrams:
+            carry = self._get_bits(trigram)
+            for level, plane in enumerate(planes):
+                if not carry:
+                    break
+                planes[level], carry = plane ^ carry, plane & carry
+            if carry:
+                planes.append(carry)
+        levels = []
+        accepted = 0
+        for common in range(trigram_count, get_min_common(trigram_count, pattern.threshold) - 1, -1):
+            if common >> len(planes):
+                continue
+            # 计数正好等于 common 的行
+            bits = -1
+            for level, plane in enumerate(planes):
+                bits &= plane if common >> level & 1 else ~plane
+            if bits:
+                levels.append((common / float(trigram_count), bits_to_mask(bits)))
+                accepted |= bits
+        return MTrigramMatches(self, levels, bits_to_mask(accepted) if accepted else "")
@@ -8,6 +8,7 @@ import datetime as dt
 from functools import singledispatch
 import math
 import os
+import re
 
 # Import third-party modules
 from qtpy import QtCore
@@ -176,6 +177,20 @@ def real_index(index):
     return index
 
 
+def real_data_obj(index):
+    """
+    Get the row object behind a source index or proxy index.
+    For the models without an object behind the index, like MColumnarTableModel, it is model.get_row(row).
+    """
+    index = real_index(index)
+    data_obj = index.internalPointer()
+    if data_obj is None and index.isValid():
+        get_row = getattr(index.model(), "get_row", None)
+        if get_row is not None:
+            data_obj = get_row(index.row())
+    return data_obj
+
+
 def get_obj_value(data_obj, attr, default=None):
     """Get dict's key or object's attribute with given attr"""
     if isinstance(data_obj, dict):
@@ -346,6 +361,62 @@ def _(input_none):
     return icon_formatter("confirm_fill.svg")
 
 
+_DIGITS_REGEX = re.compile(r"(\d+)")
+
+
+def natural_sort_key(value):
+    """
+    Used for the sort_key of header_list, compare the numbers in a text by their value,
+    so "shot_2" sorts before "shot_10". Case insensitive.
+    :param value: any value, compared as str
+    :return: tuple
+    """
+    parts = _DIGITS_REGEX.split(str(value).casefold())
+    # 奇数位是数字，偶数位是文本，两个 key 对应位置的类型总是一样的
+    return tuple(int(part) if index % 2 else part for index, part in enumerate(parts))
+
+
+def numeric_sort_key(value):
+    """
+    Used for the sort_key of header_list, compare numbers and numeric text like "1,024.5" by value.
+    :param value: number or str
+    :return: float, None if the value is not a number
+    """
+    if isinstance(value, str):
+        value = value.strip().replace(",", "")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    # NaN 和谁比较都是 False，会打乱排序
+    return None if math.isnan(number) else number
+
+
+def date_sort_key(value):
+    """
+    Used for the sort_key of header_list, compare datetime, date, QDateTime, QDate, ISO 8601 text
+    and timestamp by time.
+    :param value: any date value
+    :return: float timestamp, None if the value is not a date
+    """
+    if isinstance(value, QtCore.QDateTime):
+        return value.toMSecsSinceEpoch() / 1000.0 if value.isValid() else None
+    if isinstance(value, QtCore.QDate):
+        value = value.toString(QtCore.Qt.ISODate)
+    try:
+        if isinstance(value, str):
+            value = dt.datetime.fromisoformat(value.strip())
+        if isinstance(value, dt.datetime):
+            return value.timestamp()
+        if isinstance(value, dt.date):
+            return dt.datetime(value.year, value.month, value.day).timestamp()
+    except (ValueError, OverflowError, OSError):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
 def overflow_format(num, overflow):
     """
     Give a integer, return a string.
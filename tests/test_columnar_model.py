@@ -0,0 +1,188 @@
+"""Test MColumnarTableModel"""
+
+# Import third-party modules
+import pytest
+from qtpy import QtCore
+
+
+np = pytest.importorskip("numpy")
+
+# Import local modules
+from dayu_widgets import utils  # noqa: E402
+from dayu_widgets.columnar_model import MColumnarTableModel  # noqa: E402
+from dayu_widgets.item_model import MSortFilterModel  # noqa: E402
+from dayu_widgets.item_model import MTableModel  # noqa: E402
+from dayu_widgets.item_model import rank_key_array  # noqa: E402
+from dayu_widgets.item_view import MTableView  # noqa: E402
+from dayu_widgets.utils import numeric_sort_key  # noqa: E402
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name", "checkable": True, "searchable": True},
+    {"label": "Frames", "key": "frames", "display": lambda x, y: "{} f".format(x), "editable": True},
+    {"label": "Status", "key": "status", "color": lambda x, y: "#ff0000" if y["frames"] > 10 else "#00ff00"},
+]
+
+
+def _make_model(data_list):
+    model = MColumnarTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list(data_list)
+    return model
+
+
+def test_columnar_model_from_rows():
+    """Test rows are stored in typed and dictionary encoded columns."""
+    data_list = [{"name": "shot_{}".format(i), "frames": i * 5, "status": "done" if i % 2 else "wip"} for i in range(4)]
+    model = _make_model(data_list)
+    assert model.rowCount() == 4
+    assert model.columnCount() == 3
+    assert model.columns["frames"].array.dtype.kind == "i"
+    assert model.columns["status"].categories == ["wip", "done"]
+    assert model.data(model.index(1, 0)) == "shot_1"
+    assert model.data(model.index(3, 1)) == "15 f"
+    assert model.data(model.index(3, 2), QtCore.Qt.ForegroundRole).name() == "#ff0000"
+    assert model.data(model.index(0, 0), QtCore.Qt.CheckStateRole) == QtCore.Qt.Unchecked
+    assert model.index(0, 0).internalPointer() is None
+    assert model.get_row(2).to_dict() == {"name": "shot_2", "frames": 10, "name_checked": None, "status": "wip"}
+    assert len(model.get_data_list()) == 4
+
+
+def test_columnar_model_edit_and_append():
+    """Test setData and append_many keep the columns consistent."""
+    model = _make_model({"name": ["a", "b"], "frames": np.array([1, 2]), "status": ["wip", "wip"]})
+    assert model.setData(model.index(0, 0), QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+    assert model.data(model.index(0, 0), QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked
+    assert model.setData(model.index(1, 1), "unknown")
+    assert model.data(model.index(1, 1)) == "unknown f"
+    assert model.data(model.index(0, 1)) == "1 f"
+
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.append_many([{"name": "c", "frames": 3, "status": "done"}, {"name": "d", "frames": None}])
+    assert inserted == [(2, 3)]
+    assert [row["name"] for row in model.get_data_list()] == ["a", "b", "c", "d"]
+    assert model.get_value(3, "status") is None
+
+
+def test_columnar_model_drop_in(qtbot):
+    """Test the fields outside header_list are kept and the row objects are reachable from the indexes."""
+    header_list = HEADER_LIST + [
+        {"label": "Owner", "key": "frames_owner", "display": lambda x, y: "{} ({})".format(y["frames"], y.get("owner"))},
+        {"label": "Step", "key": "step", "selectable": True},
+    ]
+    model = MColumnarTableModel()
+    model.set_header_list(header_list)
+    model.set_data_list([{"name": "a", "frames": 3, "owner": "tom", "step": "anim", "step_list": ["anim", "comp"]}])
+    model.append({"name": "b", "frames": 4, "owner": "ann", "priority": 2})
+    assert model.data(model.index(0, 3)) == "3 (tom)"
+    assert model.data(model.index(1, 3)) == "4 (ann)"
+    assert model.get_value(1, "priority") == 2
+    assert model.get_value(0, "priority") is None
+
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(header_list)
+    view = MTableView()
+    qtbot.addWidget(view)
+    view.setModel(proxy_model)
+    view.set_header_list(header_list)
+    data_obj = utils.real_data_obj(proxy_model.index(0, 4))
+    assert data_obj.get("step_list") == ["anim", "comp"]
+
+    view.header_view._slot_set_select(0, QtCore.Qt.Checked)
+    assert [model.data(model.index(row, 0), QtCore.Qt.CheckStateRole) for row in range(2)] == [QtCore.Qt.Checked] * 2
+    view.header_view._slot_set_select(0, None)
+    assert model.data(model.index(1, 0), QtCore.Qt.CheckStateRole) == QtCore.Qt.Unchecked
+
+    event_list = []
+    view.sig_context_menu.connect(event_list.append)
+    view.selectRow(1)
+    view.slot_context_menu(view.visualRect(proxy_model.index(1, 0)).center())
+    assert [row["name"] for row in event_list[0].selection] == ["b"]
+
+
+def test_columnar_model_under_sort_filter_model():
+    """Test MSortFilterModel searches and sorts a columnar model."""
+    model = _make_model({"name": ["shot_b", "asset", "shot_a"], "frames": [3, 2, 1], "status": ["a", "b", "c"]})
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(HEADER_LIST)
+    proxy_model.set_search_pattern("shot")
+    assert proxy_model.rowCount() == 2
+    proxy_model.sort(0, QtCore.Qt.AscendingOrder)
+    assert proxy_model.data(proxy_model.index(0, 0)) == "shot_a"
+
+
+def test_rank_key_array():
+    """Test rank_key_array ranks the same way as the sort keys, with empty values first and the same keys tied."""
+    key_array = np.array([3.0, np.nan, 1.0, 3.0, 2.0, np.nan, 1.0, 3.0, 0.5, -np.inf])
+
+    def _python_key(row):
+        key = key_array[row]
+        return (0,) if np.isnan(key) else (1, key)
+
+    ranks = rank_key_array(key_array)
+    assert ranks == [5, 0, 3, 5, 4, 0, 3, 5, 2, 1]
+    for left in range(len(key_array)):
+        for right in range(len(key_array)):
+            assert (ranks[left] < ranks[right]) == (_python_key(left) < _python_key(right))
+    assert rank_key_array(np.array([], dtype=float)) == []
+
+
+@pytest.mark.parametrize("source", ["columnar", "table"])
+def test_numpy_sort(qtbot, source):
+    """Test the numeric columns are ranked with NumPy, then the proxy sorts them without touching the source model."""
+    header_list = [
+        {"label": "Name", "key": "name", "searchable": True},
+        {"label": "Frames", "key": "frames", "sort_key": "numeric"},
+        {"label": "Size", "key": "size", "sort_key": "numeric"},
+    ]
+    frames = [30, None, 10, 30, 20, 10]
+    sizes = ["1,024", "12", "n/a", "3.5", "12", "0"]
+    data_list = [
+        {"name": "shot_{}".format(row), "frames": frame, "size": size}
+        for row, (frame, size) in enumerate(zip(frames, sizes))
+    ]
+    model = MColumnarTableModel() if source == "columnar" else MTableModel()
+    model.set_header_list(header_list)
+    model.set_data_list(data_list)
+    if source == "columnar":
+        assert np.array_equal(model.get_key_array("size", numeric_sort_key), [1024, 12, np.nan, 3.5, 12, 0], True)
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(header_list)
+    proxy_model.set_numpy_sort(True)
+    current_index = QtCore.QPersistentModelIndex(proxy_model.index(3, 0))
+    source_changes = []
+    model.layoutChanged.connect(lambda *args: source_changes.append(args))
+
+    def _names():
+        return [proxy_model.index(row, 0).data() for row in range(proxy_model.rowCount())]
+
+    # 相同的 key 保持源模型的顺序
+    proxy_model.sort(1, QtCore.Qt.DescendingOrder)
+    assert proxy_model.sortColumn() == 1
+    assert proxy_model.sortOrder() == QtCore.Qt.DescendingOrder
+    assert not proxy_model.is_sorting()
+    assert _names() == ["shot_0", "shot_3", "shot_4", "shot_2", "shot_5", "shot_1"]
+    assert current_index.row() == 1
+    assert current_index.data() == "shot_3"
+    # 和 QSortFilterProxyModel 一样，相同的 key 保持上一次排序的顺序
+    proxy_model.sort(2, QtCore.Qt.AscendingOrder)
+    assert _names() == ["shot_2", "shot_5", "shot_3", "shot_4", "shot_1", "shot_0"]
+    proxy_model.set_search_pattern("shot_[0-4]")
+    assert _names() == ["shot_2", "shot_3", "shot_4", "shot_1", "shot_0"]
+    # 不是数字的列还是由 QSortFilterProxyModel 比较 key
+    proxy_model.sort(0, QtCore.Qt.DescendingOrder)
+    assert proxy_model.sortColumn() == 0
+    assert proxy_model.index(0, 0).data() == "shot_4"
+
+    proxy_model.set_search_pattern("")
+    proxy_model.sort(-1)
+    assert _names() == ["shot_{}".format(row) for row in range(6)]
+    assert current_index.data() == "shot_3"
+    # 源模型和传入的列表都不变
+    assert source_changes == []
+    assert [model.index(row, 0).data() for row in range(6)] == ["shot_{}".format(row) for row in range(6)]
+    assert [data_dict["name"] for data_dict in data_list] == ["shot_{}".format(row) for row in range(6)]
@@ -0,0 +1,64 @@
+"""Test MDataLoader and the background loading of MItemViewSet"""
+
+# Import built-in modules
+import threading
+
+# Import third-party modules
+from qtpy import QtCore
+
+# Import local modules
+from dayu_widgets.data_loader import MDataLoader
+from dayu_widgets.item_view_set import MItemViewSet
+
+
+HEADER_LIST = [{"label": "Name", "key": "name"}]
+
+
+def test_data_loader_batches(qtbot):
+    """Test the rows are loaded in a worker thread and emitted in the GUI thread."""
+    loader = MDataLoader(batch_size=100)
+    thread_list = []
+    row_list = []
+
+    def _data_source():
+        thread_list.append(threading.current_thread())
+        for i in range(1000):
+            yield {"name": "row_{}".format(i)}
+
+    def _slot_rows_loaded(rows):
+        assert QtCore.QThread.currentThread() is loader.thread()
+        row_list.extend(rows)
+
+    loader.sig_rows_loaded.connect(_slot_rows_loaded)
+    with qtbot.waitSignal(loader.sig_finished, timeout=5000):
+        loader.load(_data_source)
+    assert len(row_list) == 1000
+    assert thread_list[0] is not threading.main_thread()
+    assert not loader.is_loading()
+
+
+def test_data_loader_cancel(qtbot):
+    """Test a new setup_data drops the rows of the running load."""
+    widget = MItemViewSet()
+    widget.set_header_list(HEADER_LIST)
+    qtbot.addWidget(widget)
+    release = threading.Event()
+
+    def _slow_source():
+        release.wait(5)
+        return [{"name": "old"}] * 500
+
+    def _new_source():
+        return ({"name": "new_{}".format(i)} for i in range(300))
+
+    widget.setup_data(_slow_source)
+    assert widget._loading_wrapper.get_dayu_loading()
+    with qtbot.waitSignal(widget.sig_load_finished, timeout=5000):
+        widget.setup_data(_new_source)
+        release.set()
+    qtbot.wait(50)
+    assert widget.source_model.rowCount() == 300
+    assert not widget._loading_wrapper.get_dayu_loading()
+
+    widget.setup_data([{"name": "a"}, {"name": "b"}])
+    assert widget.source_model.rowCount() == 2
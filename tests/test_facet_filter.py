@@ -0,0 +1,57 @@
+"""
+Test MFacetFilter
+"""
+
+# Import local modules
+from dayu_widgets.facet_filter import MFacetFilter
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+def _check_box_texts(facet_filter, key):
+    check_box_lay = facet_filter._group_map[key][1]
+    return [check_box_lay.itemAt(row).widget().text() for row in range(check_box_lay.count())]
+
+
+def test_facet_filter_panel(qtbot):
+    """Test the check boxes show the live counts and filter the model."""
+    model = MTableModel()
+    model.set_header_list(
+        [
+            {"label": "Name", "key": "name"},
+            {"label": "Status", "key": "status", "default_filter": True},
+            {"label": "Dept", "key": "dept", "default_filter": True},
+        ]
+    )
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    model.set_data_list(
+        [
+            {"name": "a", "status": "wip", "dept": "anim"},
+            {"name": "b", "status": "done", "dept": "anim"},
+            {"name": "c", "status": "wip", "dept": "comp"},
+        ]
+    )
+    facet_filter = MFacetFilter(proxy_model)
+    qtbot.addWidget(facet_filter)
+    facet_filter.show()
+    assert facet_filter._group_map["status"][0].text() == "Status"
+    assert _check_box_texts(facet_filter, "status") == ["done (1)", "wip (2)"]
+    assert _check_box_texts(facet_filter, "dept") == ["anim (2)", "comp (1)"]
+
+    facet_filter._group_map["status"][2]["wip"].setChecked(True)
+    assert proxy_model.get_facet_values("status") == ["wip"]
+    assert proxy_model.rowCount() == 2
+    assert _check_box_texts(facet_filter, "dept") == ["anim (1)", "comp (1)"]
+    facet_filter._group_map["dept"][2]["comp"].setChecked(True)
+    assert proxy_model.rowCount() == 1
+    assert _check_box_texts(facet_filter, "status") == ["done (0)", "wip (1)"]
+    assert not facet_filter._group_map["status"][2]["done"].isEnabled()
+
+    model.append({"name": "d", "status": "review", "dept": "comp"})
+    assert _check_box_texts(facet_filter, "status") == ["done (0)", "review (1)", "wip (1)"]
+
+    facet_filter.clear()
+    assert proxy_model.rowCount() == 4
+    assert not facet_filter._group_map["status"][2]["wip"].isChecked()
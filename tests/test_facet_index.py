@@ -0,0 +1,90 @@
+"""
+Test MFacetIndex
+"""
+
+# Import local modules
+from dayu_widgets.facet_index import MFacetIndex
+from dayu_widgets.facet_index import bits_to_mask
+from dayu_widgets.facet_index import rows_to_bits
+
+
+def _make_rows():
+    return [
+        {"status": "wip", "dept": "anim", "tags": ["hero"]},
+        {"status": "done", "dept": "anim", "tags": []},
+        {"status": "wip", "dept": "comp", "tags": ["hero", "fx"]},
+        {"status": "review", "dept": "comp", "tags": ["fx"]},
+        {"status": "wip", "dept": "light", "tags": None},
+    ]
+
+
+def _accepted_rows(facet_index):
+    mask = facet_index.get_accepted_mask()
+    if mask is None:
+        return list(range(facet_index.row_count))
+    return [row for row, bit in enumerate(mask) if bit == "1"]
+
+
+def test_bits():
+    """Test the conversion between row numbers, bitset and mask text."""
+    assert rows_to_bits([]) == 0
+    assert rows_to_bits([0, 3, 9]) == 0b1000001001
+    assert bits_to_mask(0b1000001001) == "1001000001"
+    assert bits_to_mask(0) == "0"
+
+
+def test_facet_index_counts():
+    """Test the selection is OR inside a key and AND between keys, the counts ignore the own key."""
+    facet_index = MFacetIndex(["status", "dept", "tags"])
+    facet_index.rebuild(_make_rows())
+    assert facet_index.get_accepted_mask() is None
+    assert facet_index.get_counts("status") == {"done": 1, "review": 1, "wip": 3}
+    assert facet_index.get_counts("tags") == {None: 1, "fx": 2, "hero": 2}
+
+    facet_index.set_selected("status", ["wip"])
+    assert _accepted_rows(facet_index) == [0, 2, 4]
+    assert facet_index.get_counts("status") == {"done": 1, "review": 1, "wip": 3}
+    assert facet_index.get_counts("dept") == {"anim": 1, "comp": 1, "light": 1}
+
+    facet_index.set_selected("dept", ["comp", "light"])
+    assert _accepted_rows(facet_index) == [2, 4]
+    assert facet_index.get_counts("status") == {"done": 0, "review": 1, "wip": 2}
+    facet_index.set_selected("tags", ["fx"])
+    assert _accepted_rows(facet_index) == [2]
+    facet_index.set_selected("status", [])
+    assert _accepted_rows(facet_index) == [2, 3]
+
+
+def test_facet_index_update():
+    """Test the incremental updates give the same result as a rebuild."""
+    data_list = _make_rows()
+    facet_index = MFacetIndex(["status", "dept"])
+    facet_index.rebuild(data_list)
+    facet_index.set_selected("status", ["wip"])
+
+    data_list[1:1] = [{"status": "wip", "dept": "fx"}, {"status": "omit", "dept": "fx"}]
+    facet_index.insert_rows(data_list, 1, 2)
+    assert _accepted_rows(facet_index) == [0, 1, 4, 6]
+    data_list.append({"status": "wip", "dept": "anim"})
+    facet_index.insert_rows(data_list, 7, 7)
+    assert _accepted_rows(facet_index) == [0, 1, 4, 6, 7]
+
+    del data_list[0:2]
+    facet_index.remove_rows(0, 1)
+    assert _accepted_rows(facet_index) == [2, 4, 5]
+    assert "fx" in facet_index.get_counts("dept")
+    del data_list[0]
+    facet_index.remove_rows(0, 0)
+    assert "fx" not in facet_index.get_counts("dept")
+
+    data_list[0]["status"] = "wip"
+    data_list[1]["status"] = "done"
+    assert facet_index.update_rows(data_list, 0, 1)
+    assert not facet_index.update_rows(data_list, 0, 1)
+    assert _accepted_rows(facet_index) == [0, 3, 4]
+
+    rebuilt_index = MFacetIndex(["status", "dept"])
+    rebuilt_index.rebuild(data_list)
+    rebuilt_index.set_selected("status", ["wip"])
+    for key in ("status", "dept"):
+        assert facet_index.get_counts(key) == rebuilt_index.get_counts(key)
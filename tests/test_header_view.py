@@ -0,0 +1,122 @@
+"""
+Test MHeaderView
+"""
+
+# Import third-party modules
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+# Import local modules
+from dayu_widgets.item_model import MTableModel
+from dayu_widgets.item_view import MTableView
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name"},
+    {"label": "Status", "key": "status"},
+]
+
+
+class _CountingDelegate(QtWidgets.QStyledItemDelegate):
+    def __init__(self, parent=None):
+        super(_CountingDelegate, self).__init__(parent)
+        self.cells = []
+
+    def sizeHint(self, option, index):
+        self.cells.append((index.row(), index.column()))
+        return super(_CountingDelegate, self).sizeHint(option, index)
+
+
+def _make_view(qtbot, data_list):
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list(data_list)
+    view = MTableView()
+    qtbot.addWidget(view)
+    view.setModel(model)
+    view.set_header_list(HEADER_LIST)
+    view.resize(400, 300)
+    view.show()
+    return view, model
+
+
+def test_fit_sections_like_resize_to_contents(qtbot):
+    """Test all the rows of a small table are measured, giving the sizes of ResizeToContents."""
+    view, _ = _make_view(qtbot, [{"name": "shot_{}".format("x" * i), "status": "wip"} for i in range(30)])
+    view.header_view.resizeSections(QtWidgets.QHeaderView.ResizeToContents)
+    expected_list = [view.header_view.sectionSize(column) for column in range(2)]
+    for column in range(2):
+        view.header_view.resizeSection(column, 20)
+    view.header_view.fit_sections()
+    assert [view.header_view.sectionSize(column) for column in range(2)] == expected_list
+
+    QtWidgets.QTableView.resizeRowsToContents(view)
+    expected_height = view.rowHeight(10)
+    view.verticalHeader().resizeSection(10, 50)
+    view.verticalHeader().fit_sections()
+    assert view.rowHeight(10) == expected_height
+    # Qt 的方法保持原样，量所有的行
+    view.header_view.resizeSection(0, 20)
+    view.resizeColumnsToContents()
+    assert view.header_view.sectionSize(0) == expected_list[0]
+
+
+def test_fit_sections_sampled(qtbot):
+    """Test a big table only measures the sampled rows once, until their data changes."""
+    data_list = [{"name": "shot_{}".format(i), "status": "wip"} for i in range(10000)]
+    data_list[-1]["name"] = "the_last_shot_with_a_much_longer_name"
+    view, model = _make_view(qtbot, data_list)
+    delegate = _CountingDelegate(view)
+    view.setItemDelegate(delegate)
+    header_view = view.header_view
+    header_view.set_fit_sample_size(10)
+    header_view.fit_sections()
+    name_rows = [row for row, column in delegate.cells if column == 0]
+    # 开头和结尾各 20 行、10 个随机的行和可见的行
+    assert len(name_rows) < 100
+    assert 9999 in name_rows
+    assert header_view.sectionSize(0) == header_view._measure_column(view, 0)
+    assert header_view.sectionSize(0) > header_view.sectionSize(1)
+
+    del delegate.cells[:]
+    header_view.fit_sections()
+    assert delegate.cells == []
+    model.setData(model.index(3, 1), "approved")
+    header_view.fit_sections()
+    assert delegate.cells
+    assert set(column for row, column in delegate.cells) == {1}
+
+    header_view.set_fit_max_size(60)
+    header_view.fit_sections()
+    assert header_view.sectionSize(0) == 60
+
+    del delegate.cells[:]
+    view.verticalHeader().set_fit_sample_size(10)
+    view.verticalHeader().resizeSection(0, 80)
+    view.verticalHeader().resizeSection(9000, 80)
+    view.verticalHeader().fit_sections()
+    assert 0 < len(delegate.cells) < 200
+    # 量过的行各自调整，其他的行不动
+    measured_rows = set(row for row, column in delegate.cells)
+    ver_header_view = view.verticalHeader()
+    assert view.rowHeight(0) == max(ver_header_view._measure_row(view, 0), ver_header_view.minimumSectionSize())
+    assert 9000 in measured_rows or view.rowHeight(9000) == 80
+    model.append({"name": "new", "status": "wip"})
+    assert header_view._fit_size_cache == {}
+    assert view.verticalHeader()._fit_size_cache == {}
+
+
+def test_fit_sections_after_set_model(qtbot):
+    """Test a new model drops the measured sizes and the old model is disconnected."""
+    view, old_model = _make_view(qtbot, [{"name": "a", "status": "wip"}])
+    view.header_view.fit_sections()
+    assert view.header_view._fit_size_cache
+    new_model = MTableModel()
+    new_model.set_header_list(HEADER_LIST)
+    view.setModel(new_model)
+    assert view.header_view._fit_size_cache == {}
+    view.header_view._fit_size_cache[0] = 10
+    old_model.dataChanged.emit(old_model.index(0, 0), old_model.index(0, 0))
+    assert view.header_view._fit_size_cache == {0: 10}
+    new_model.dataChanged.emit(QtCore.QModelIndex(), QtCore.QModelIndex())
+    assert view.header_view._fit_size_cache == {}
@@ -0,0 +1,1081 @@
+"""Test MTableModel and MSortFilterModel"""
+
+# Import built-in modules
+import gc
+import weakref
+
+# Import third-party modules
+import pytest
+from qtpy import QtCore
+
+# Import local modules
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+
+
+HEADER_LIST = [
+    {"label": "Name", "key": "name", "searchable": True},
+    {"label": "Age", "key": "age"},
+]
+
+
+def _make_rows(count):
+    return [{"name": "row_{}".format(i), "age": i} for i in range(count)]
+
+
+def _make_model(data_list=None):
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    if data_list is not None:
+        model.set_data_list(data_list)
+    return model
+
+
+def test_set_data_list_with_list():
+    """Test MTableModel keeps the given list as its data."""
+    data_list = _make_rows(5)
+    model = _make_model(data_list)
+    assert model.rowCount() == 5
+    assert model.get_data_list() is data_list
+    assert model.data(model.index(3, 0)) == "row_3"
+
+
+def test_append_many_inserts_without_reset(qtbot):
+    """Test append_many emits one rowsInserted and no modelReset."""
+    model = _make_model(_make_rows(2))
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.modelReset.connect(lambda: inserted.append("reset"))
+    model.append_many(_make_rows(3))
+    model.append({"name": "last", "age": 99})
+    assert inserted == [(2, 4), (5, 5)]
+    assert model.rowCount() == 6
+
+
+def test_streaming_generator(qtbot):
+    """Test a generator is pulled in batches without resetting the model."""
+    model = _make_model()
+    model.set_fetch_batch_size(10)
+    model.set_data_list(row for row in _make_rows(35))
+    # the first screen is available right away
+    assert model.rowCount() == 10
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    assert model.canFetchMore(QtCore.QModelIndex())
+    qtbot.waitUntil(lambda: not model.canFetchMore(QtCore.QModelIndex()))
+    assert model.rowCount() == 35
+    assert resets == []
+    assert not model.timer.isActive()
+
+
+def test_streaming_chunks_by_view_request():
+    """Test a chunked iterator is only pulled through fetchMore when auto fetch is off."""
+    model = _make_model()
+    model.set_auto_fetch(False)
+    model.set_fetch_batch_size(4)
+    rows = _make_rows(10)
+    model.set_data_list(iter([rows[:3], rows[3:9], rows[9:]]))
+    assert model.rowCount() == 4
+    model.fetchMore(QtCore.QModelIndex())
+    assert model.rowCount() == 8
+    model.fetchMore(QtCore.QModelIndex())
+    assert model.rowCount() == 10
+    assert not model.canFetchMore(QtCore.QModelIndex())
+    assert [row["age"] for row in model.get_data_list()] == list(range(10))
+
+
+class _Row(object):
+    def __init__(self, name, age):
+        super(_Row, self).__init__()
+        self.name = name
+        self.age = age
+
+
+def test_data_with_compiled_header_list(qtbot):
+    """Test data() gives the same result as applying the header config formatters."""
+    header_list = [
+        {
+            "label": "Name",
+            "key": "name",
+            "checkable": True,
+            "color": "#ffffff",
+            "alignment": "center",
+            "tooltip": lambda x, y: "tip: {}".format(x),
+        },
+        {
+            "label": "Age",
+            "key": "age",
+            "display": lambda x, y: "{} years".format(x),
+            "bg_color": {1: "#ff0000"},
+        },
+    ]
+    model = MTableModel()
+    model.set_header_list(header_list)
+    model.set_data_list([{"name": "xiaoming", "age": 1, "name_checked": QtCore.Qt.Checked}, _Row("xiaohua", 2)])
+
+    dict_name = model.index(0, 0)
+    obj_name = model.index(1, 0)
+    assert model.data(dict_name) == "xiaoming"
+    assert model.data(obj_name, int(QtCore.Qt.DisplayRole)) == "xiaohua"
+    assert model.data(obj_name, QtCore.Qt.ToolTipRole) == "tip: xiaohua"
+    assert model.data(dict_name, QtCore.Qt.ForegroundRole).name() == "#ffffff"
+    assert model.data(dict_name, QtCore.Qt.TextAlignmentRole) == QtCore.Qt.AlignCenter
+    assert model.data(dict_name, QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked
+    assert model.data(obj_name, QtCore.Qt.CheckStateRole) == QtCore.Qt.Unchecked
+    assert model.data(dict_name, QtCore.Qt.DecorationRole) is None
+
+    assert model.data(model.index(0, 1)) == "1 years"
+    assert model.data(model.index(1, 1)) == "2 years"
+    assert model.data(model.index(0, 1), QtCore.Qt.BackgroundRole).name() == "#ff0000"
+    assert not model.data(model.index(1, 1), QtCore.Qt.BackgroundRole).isValid()
+    assert model.data(model.index(1, 1), QtCore.Qt.CheckStateRole) is None
+
+
+def test_value_cache(qtbot):
+    """Test the formatters are only run once per cell while the value cache is enabled."""
+    call_list = []
+
+    def display(value, data_obj):
+        call_list.append(value)
+        return "{} years".format(value)
+
+    model = MTableModel()
+    model.set_header_list([{"label": "Age", "key": "age", "display": display, "editable": True}])
+    model.enable_value_cache(True, max_size=2)
+    data_list = [{"age": 1}, {"age": 2}, {"age": 3}]
+    model.set_data_list(data_list)
+
+    first_index = model.index(0, 0)
+    assert model.data(first_index) == "1 years"
+    assert model.data(first_index) == "1 years"
+    assert call_list == [1]
+    assert model.cache_stats()["hits"] == 1
+    assert model.cache_stats()["misses"] == 1
+
+    # setData invalidates the edited row
+    assert model.setData(first_index, 10)
+    assert model.data(first_index) == "10 years"
+    assert call_list == [1, 10]
+
+    # rows changed outside of the model
+    data_list[0]["age"] = 20
+    assert model.data(first_index) == "10 years"
+    model.invalidate_rows([data_list[0]])
+    assert model.data(first_index) == "20 years"
+
+    # the least recently used row is dropped
+    model.data(model.index(1, 0))
+    model.data(model.index(2, 0))
+    assert model.cache_stats()["size"] == 2
+    del call_list[:]
+    model.data(first_index)
+    assert call_list == [20]
+
+    model.remove(data_list[2])
+    model.set_data_list([])
+    assert model.cache_stats()["size"] == 0
+
+
+def _make_tree(folder_count, child_count):
+    return [
+        {"name": "folder_{}".format(i), "children": [{"name": "file_{}_{}".format(i, j)} for j in range(child_count)]}
+        for i in range(folder_count)
+    ]
+
+
+def test_parent_row_after_remove():
+    """Test parent() keeps giving the right row after rows are removed in front."""
+    data_list = _make_tree(5, 2)
+    model = _make_model(data_list)
+    child_index = model.index(1, 0, model.index(4, 0))
+    assert model.parent(child_index).row() == 4
+
+    model.remove(data_list[0])
+    child_index = model.index(1, 0, model.index(3, 0))
+    assert model.data(child_index) == "file_4_1"
+    assert model.parent(child_index).row() == 3
+    assert model.parent(child_index).internalPointer() is data_list[3]
+
+    # the list is changed outside of the model
+    data_list.insert(0, {"name": "new"})
+    assert model.parent(child_index).row() == 4
+
+
+class _Node(object):
+    def __init__(self, name, children=None):
+        super(_Node, self).__init__()
+        self.name = name
+        self.children = children or []
+
+
+def test_parent_link_does_not_touch_rows():
+    """Test the model keeps parent links itself and releases the rows after clear."""
+    child = _Node("child")
+    folder = _Node("folder", [child])
+    data_dict = {"name": "dict", "children": [{"name": "sub"}]}
+    model = _make_model([folder, data_dict])
+    child_index = model.index(0, 0, model.index(0, 0))
+    sub_index = model.index(0, 0, model.index(1, 0))
+    assert model.parent(child_index).internalPointer() is folder
+    assert model.parent(sub_index).row() == 1
+    assert model.get_parent(child) is folder
+    assert model.get_parent(folder) is None
+    assert not hasattr(child, "_parent")
+    assert "_parent" not in data_dict["children"][0]
+
+    folder_ref = weakref.ref(folder)
+    del folder, child, child_index, sub_index
+    gc.disable()
+    try:
+        model.clear()
+        assert folder_ref() is None
+    finally:
+        gc.enable()
+
+
+def test_lazy_children_loaded_on_expand(qtbot):
+    """Test children given as a callable or iterator are only loaded when the node is expanded."""
+    # Import local modules
+    from dayu_widgets.item_view import MTreeView
+
+    call_list = []
+
+    def load_shots():
+        call_list.append(True)
+        return ({"name": "shot_{}".format(i)} for i in range(25))
+
+    data_list = [
+        {"name": "seq_a", "children": load_shots},
+        {"name": "seq_b", "children": iter([{"name": "shot_x"}])},
+    ]
+    model = _make_model(data_list)
+    model.set_auto_fetch(False)
+    model.set_fetch_batch_size(10)
+    seq_a_index = model.index(0, 0)
+    assert model.hasChildren(seq_a_index)
+    assert model.rowCount(seq_a_index) == 0
+    assert model.canFetchMore(seq_a_index)
+    assert call_list == []
+
+    view = MTreeView()
+    qtbot.addWidget(view)
+    view.setModel(model)
+    view.show()
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((parent.row(), first, last)))
+    view.expand(seq_a_index)
+    assert call_list == [True]
+    assert inserted[0] == (0, 0, 9)
+    assert all(last - first < 10 for _, first, last in inserted)
+    assert model.data(model.index(3, 0, seq_a_index)) == "shot_3"
+    assert model.parent(model.index(3, 0, seq_a_index)).row() == 0
+
+    while model.canFetchMore(seq_a_index):
+        model.fetchMore(seq_a_index)
+    assert model.rowCount(seq_a_index) == 25
+    assert call_list == [True]
+    assert not model.canFetchMore(seq_a_index)
+    assert model.rowCount(model.index(1, 0)) == 0
+
+    model.set_auto_fetch(True)
+    model.fetchMore(model.index(1, 0))
+    assert model.rowCount(model.index(1, 0)) == 1
+
+
+def test_update_data_list_emits_minimal_changes(qtbot):
+    """Test update_data_list only emits the difference and keeps persistent indexes."""
+    model = _make_model([{"id": i, "name": "job_{}".format(i), "age": i} for i in range(8)])
+    selected = QtCore.QPersistentModelIndex(model.index(5, 0))
+    signal_list = []
+    model.modelReset.connect(lambda: signal_list.append("reset"))
+    model.rowsRemoved.connect(lambda parent, first, last: signal_list.append(("removed", first, last)))
+    model.rowsMoved.connect(lambda parent, first, last, dest, row: signal_list.append(("moved", first, last, row)))
+    model.rowsInserted.connect(lambda parent, first, last: signal_list.append(("inserted", first, last)))
+    model.dataChanged.connect(
+        lambda top_left, bottom_right, roles=None: signal_list.append(("changed", top_left.row(), bottom_right.row()))
+    )
+
+    new_list = [{"id": i, "name": "job_{}".format(i), "age": i} for i in (7, 0, 3, 4, 5, 6, 10, 11)]
+    new_list[3]["age"] = 40
+    new_list[4]["age"] = 50
+    model.update_data_list(new_list)
+
+    assert signal_list == [
+        ("removed", 1, 2),
+        ("moved", 5, 5, 0),
+        ("inserted", 6, 7),
+        ("changed", 3, 4),
+    ]
+    assert model.get_data_list() == new_list
+    assert model.get_data_list()[3] is new_list[3]
+    assert selected.row() == 4
+    assert model.data(QtCore.QModelIndex(selected)) == "job_5"
+    assert model.data(model.index(4, 1)) == 50
+
+    del signal_list[:]
+    model.update_data_list([dict(data_dict) for data_dict in new_list])
+    assert signal_list == []
+
+    # 反转顺序时只有最长递增子序列里的一行不动，其他行各移动一次
+    reversed_list = list(reversed(model.get_data_list()))
+    model.update_data_list(reversed_list)
+    assert len(signal_list) == 7
+    assert all(signal[0] == "moved" and signal[1] == signal[2] for signal in signal_list)
+    assert model.get_data_list() == reversed_list
+    assert selected.row() == 3
+    assert model.data(QtCore.QModelIndex(selected)) == "job_5"
+    assert [model._get_node(data_dict)[1] for data_dict in reversed_list] == list(range(8))
+
+
+def test_remove_rows_by_range(qtbot):
+    """Test remove_rows emits one rowsRemoved per contiguous range and finds objects by identity, then equality."""
+    data_list = _make_rows(10)
+    model = _make_model(list(data_list))
+    signal_list = []
+    model.rowsRemoved.connect(lambda parent, first, last: signal_list.append((first, last)))
+
+    model.remove_rows([data_list[2], 3, data_list[4], 8, 0])
+    assert signal_list == [(8, 8), (2, 4), (0, 0)]
+    assert model.get_data_list() == [data_list[i] for i in (1, 5, 6, 7, 9)]
+
+    del signal_list[:]
+    model.remove(data_list[9])
+    assert signal_list == [(4, 4)]
+    with pytest.raises(ValueError):
+        model.remove(data_list[9])
+    # 不是模型里的对象，按相等找到顶层的行
+    model.remove(dict(data_list[5]))
+    assert signal_list == [(4, 4), (1, 1)]
+    assert model.get_data_list() == [data_list[i] for i in (1, 6, 7)]
+    # 行号越界时什么都不删
+    for rows in ([0, -1], [1, 3]):
+        with pytest.raises(IndexError):
+            model.remove_rows(rows)
+    assert signal_list == [(4, 4), (1, 1)]
+    assert model.rowCount() == 3
+
+    tree = _make_tree(3, 4)
+    model.set_data_list(tree)
+    child = tree[1]["children"][2]
+    model.remove_rows([child, tree[1]["children"][0], tree[2]])
+    assert model.rowCount() == 2
+    assert model.rowCount(model.index(1, 0)) == 2
+    assert model.parent(model.index(1, 0, model.index(1, 0))).row() == 1
+    assert model.index(1, 0, model.index(1, 0)).internalPointer() is tree[1]["children"][1]
+
+
+def test_key_index(qtbot):
+    """Test the key index follows insert, remove, reset and setData, and maps through the proxy."""
+    model = _make_model([{"id": i, "name": "job_{}".format(i), "age": i} for i in range(10)])
+    model.set_key_index("id")
+    assert model.row_for_key(7) == 7
+    assert model.index_for_key(7, 1).data() == 7
+    assert model.row_for_key(100) == -1
+    assert not model.index_for_key(100).isValid()
+
+    model.remove_rows([2, 3])
+    assert model.row_for_key(7) == 5
+    assert model.row_for_key(2) == -1
+    model.append_many([{"id": 100, "name": "job_100", "age": 1}])
+    assert model.row_for_key(100) == 8
+
+    model.setData(model.index_for_key(100, 0), "new")
+    assert model.item_for_key(100)["name"] == "new"
+    model.set_key_index("name")
+    assert model.row_for_key("new") == 8
+    model.setData(model.index(8, 0), "renamed")
+    assert model.row_for_key("new") == -1
+    assert model.row_for_key("renamed") == 8
+
+    tree = _make_tree(3, 4)
+    model.set_data_list(tree)
+    assert model.row_for_key("file_1_2") == 2
+    assert model.index_for_key("file_1_2").parent().row() == 1
+
+    proxy_model = MSortFilterModel()
+    proxy_model.set_header_list(HEADER_LIST)
+    proxy_model.setSourceModel(model)
+    proxy_model.sort(0, QtCore.Qt.DescendingOrder)
+    assert proxy_model.row_for_key(tree[0]["name"]) == 2
+    assert proxy_model.index_for_key(tree[2]["name"]).data() == "folder_2"
+    proxy_model.set_search_pattern("folder_1")
+    assert proxy_model.row_for_key("folder_2") == -1
+
+
+def _make_check_tree(depth, width):
+    if depth == 0:
+        return None
+    return [{"name": "node", "children": _make_check_tree(depth - 1, width)} for _ in range(width)]
+
+
+def test_tristate_check_full_depth(qtbot):
+    """Test checking a node updates the whole subtree and every ancestor, one dataChanged per parent."""
+    model = MTableModel()
+    model.set_header_list([{"label": "Name", "key": "name", "checkable": True}])
+    tree = _make_check_tree(4, 3)
+    model.set_data_list(tree)
+    signal_list = []
+    model.dataChanged.connect(lambda top_left, bottom_right, roles=None: signal_list.append(top_left))
+
+    root_index = model.index(0, 0)
+    # 子节点没有给出过 index，只通知自己
+    assert model.setData(root_index, QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+    assert len(signal_list) == 1
+    assert tree[0]["children"][2]["children"][1]["children"][0]["name_checked"] == QtCore.Qt.Checked
+
+    # 像 view 一样访问过所有节点以后，每个父节点一个 dataChanged
+    def _walk(parent_index):
+        for row in range(model.rowCount(parent_index)):
+            _walk(model.index(row, 0, parent_index))
+
+    _walk(QtCore.QModelIndex())
+    del signal_list[:]
+    assert model.setData(root_index, QtCore.Qt.Unchecked, QtCore.Qt.CheckStateRole)
+    assert model.setData(root_index, QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+    # 自己 + 3 + 9 个有子节点的父节点
+    assert len(signal_list) == (1 + 1 + 3 + 9) * 2
+    assert all(top_left.parent().internalPointer() is not None for top_left in signal_list[1:14])
+    leaf_obj = tree[0]["children"][2]["children"][1]["children"][0]
+    assert leaf_obj["name_checked"] == QtCore.Qt.Checked
+
+    leaf_index = model.index(0, 0, model.index(1, 0, model.index(2, 0, root_index)))
+    assert leaf_index.internalPointer() is leaf_obj
+    del signal_list[:]
+    model.setData(leaf_index, QtCore.Qt.Unchecked, QtCore.Qt.CheckStateRole)
+    assert len(signal_list) == 4
+    for index in (leaf_index.parent().parent(), leaf_index.parent(), root_index):
+        assert model.data(index, QtCore.Qt.CheckStateRole) == QtCore.Qt.PartiallyChecked
+    assert model.data(model.index(1, 0), QtCore.Qt.CheckStateRole) == QtCore.Qt.Unchecked
+
+    model.setData(leaf_index, QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+    assert model.data(root_index, QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked
+
+    # 全部取消以后，祖先回到 Unchecked
+    model.setData(leaf_index.parent().parent(), QtCore.Qt.Unchecked, QtCore.Qt.CheckStateRole)
+    assert model.data(root_index, QtCore.Qt.CheckStateRole) == QtCore.Qt.PartiallyChecked
+    for row in (0, 1):
+        model.setData(model.index(row, 0, root_index), QtCore.Qt.Unchecked, QtCore.Qt.CheckStateRole)
+    assert model.data(root_index, QtCore.Qt.CheckStateRole) == QtCore.Qt.Unchecked
+
+    # 在 model 外面改了数据并发出 dataChanged，计数重新统计
+    parent_index = leaf_index.parent()
+    for row in (0, 1):
+        model.get_data_list()[0]["children"][2]["children"][1]["children"][row]["name_checked"] = QtCore.Qt.Checked
+    model.dataChanged.emit(model.index(0, 0, parent_index), model.index(1, 0, parent_index))
+    model.setData(model.index(2, 0, parent_index), QtCore.Qt.Checked, QtCore.Qt.CheckStateRole)
+    assert model.data(parent_index, QtCore.Qt.CheckStateRole) == QtCore.Qt.Checked
+
+
+def test_search_text_index(qtbot):
+    """Test the proxy searches a text index instead of running the formatters on every search."""
+    call_list = []
+
+    def _display(value, data_obj):
+        call_list.append(value)
+        return value.upper()
+
+    model = MTableModel()
+    model.set_header_list(
+        [{"label": "Name", "key": "name", "searchable": True, "display": _display}, {"label": "Age", "key": "age"}]
+    )
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    model.set_data_list([{"name": "job_{}".format(i), "age": i % 3} for i in range(100)])
+
+    proxy_model.set_search_pattern("JOB_1")
+    assert proxy_model.rowCount() == 11
+    assert len(call_list) == 100
+    del call_list[:]
+    proxy_model.set_search_pattern("job_2")
+    proxy_model.set_filter_attr_pattern("age", "1")
+    # job_22, job_25, job_28
+    assert proxy_model.rowCount() == 3
+    assert call_list == []
+
+    model.setData(model.index(5, 0), "job_250")
+    assert call_list == ["job_250"]
+    assert proxy_model.rowCount() == 3
+    model.setData(model.index(4, 0), "job_27")
+    assert proxy_model.rowCount() == 4
+
+    model.append_many([{"name": "job_200", "age": 1}, {"name": "other", "age": 1}])
+    assert proxy_model.rowCount() == 5
+    model.remove_rows([0, 4])
+    assert proxy_model.rowCount() == 4
+    assert sorted(proxy_model.index(row, 0).data() for row in range(4)) == ["JOB_200", "JOB_22", "JOB_25", "JOB_28"]
+
+    model.update_data_list(list(reversed(model.get_data_list())), key="name")
+    assert proxy_model.rowCount() == 4
+    assert proxy_model.index(0, 0).data() == "JOB_200"
+    model.set_data_list([{"name": "job_2", "age": 1}])
+    assert proxy_model.rowCount() == 1
+
+
+def test_search_narrowing(qtbot):
+    """Test a search pattern extending the previous one only tests the rows already accepted."""
+    model = MTableModel()
+    model.set_header_list([{"label": "Name", "key": "name", "searchable": True}])
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    model.set_data_list(
+        [{"name": "shot_{}".format(i)} for i in range(50)] + [{"name": "asset_{}".format(i)} for i in range(50)]
+    )
+    tested_list = []
+    match_search = proxy_model._match_search
+
+    def _match_search(source_row, source_parent):
+        tested_list.append(source_row)
+        return match_search(source_row, source_parent)
+
+    proxy_model._match_search = _match_search
+
+    def _search(pattern):
+        del tested_list[:]
+        proxy_model.set_search_pattern(pattern)
+        return proxy_model.rowCount()
+
+    assert _search("s") == 100
+    assert len(tested_list) == 100
+    assert _search("sh") == 50
+    assert len(tested_list) == 100
+    # 只在 "sh" 匹配的 50 行里筛选
+    assert _search("shot_1") == 11
+    assert len(tested_list) == 50
+    assert _search("SHOT_12") == 1
+    assert len(tested_list) == 11
+    # 退格直接复用之前的结果
+    assert _search("shot_1") == 11
+    assert tested_list == []
+    assert _search("sh") == 50
+    assert tested_list == []
+    # 不是细化的模式要全部重新匹配
+    assert _search("asset") == 50
+    assert len(tested_list) == 100
+    assert _search("sh.t") == 50
+    assert _search("sh.t_1") == 11
+    assert len(tested_list) == 100
+
+    # 数据变化以后不能再用之前的结果
+    _search("shot")
+    model.setData(model.index(60, 0), "shot_x")
+    assert _search("shot_") == 51
+    assert len(tested_list) == 100
+
+
+def test_subtree_matches(qtbot):
+    """Test a search in a tree tests each node once and shows the ancestors of the matching nodes."""
+    tree = [
+        {
+            "name": "seq_{}".format(i),
+            "children": [
+                {
+                    "name": "shot_{}_{}".format(i, j),
+                    "children": [{"name": "task_{}_{}_{}".format(i, j, k)} for k in range(3)],
+                }
+                for j in range(3)
+            ],
+        }
+        for i in range(3)
+    ]
+    model = MTableModel()
+    model.set_header_list([{"label": "Name", "key": "name", "searchable": True}])
+    model.set_data_list(tree)
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    tested_list = []
+    match_search = proxy_model._match_search
+
+    def _match_search(source_row, source_parent):
+        tested_list.append((source_row, source_parent.internalId()))
+        return match_search(source_row, source_parent)
+
+    proxy_model._match_search = _match_search
+
+    def _shown_names(parent_index=QtCore.QModelIndex()):
+        result = []
+        for row in range(proxy_model.rowCount(parent_index)):
+            index = proxy_model.index(row, 0, parent_index)
+            result.append(index.data())
+            result.extend(_shown_names(index))
+        return result
+
+    proxy_model.set_search_pattern("task_1_2_0")
+    assert _shown_names() == ["seq_1", "shot_1_2", "task_1_2_0"]
+    # 3 + 9 + 27 个节点各匹配一次
+    assert len(tested_list) == 39
+    assert len(set(tested_list)) == 39
+
+    # 自己匹配的节点，子节点展开时才计算
+    del tested_list[:]
+    proxy_model.set_search_pattern("shot_2_1")
+    assert proxy_model.rowCount() == 1
+    assert len(tested_list) == 3 + 9 + 24
+    assert _shown_names() == ["seq_2", "shot_2_1"]
+    assert len(tested_list) == 3 + 9 + 24 + 3
+
+    # 叶子节点的数据变化，祖先跟着显示或隐藏
+    proxy_model.set_search_pattern("task_1_2_0")
+    leaf_index = model.index(1, 0, model.index(0, 0, model.index(0, 0)))
+    model.setData(leaf_index, "task_1_2_0_copy")
+    assert _shown_names() == ["seq_0", "shot_0_0", "task_1_2_0_copy", "seq_1", "shot_1_2", "task_1_2_0"]
+    model.setData(leaf_index, "task_0_0_1")
+    assert _shown_names() == ["seq_1", "shot_1_2", "task_1_2_0"]
+    model.append_many([{"name": "task_1_2_0_new"}], model.index(2, 0, model.index(2, 0)))
+    assert _shown_names() == ["seq_1", "shot_1_2", "task_1_2_0", "seq_2", "shot_2_2", "task_1_2_0_new"]
+    model.remove_rows([tree[1]["children"][2]["children"][0]])
+    assert _shown_names() == ["seq_2", "shot_2_2", "task_1_2_0_new"]
+
+    # 没有子节点的隐藏节点加入匹配的子节点，它和祖先都显示出来
+    tree[0]["children"].append({"name": "shot_0_3", "children": []})
+    model.set_data_list(tree)
+    assert _shown_names() == ["seq_2", "shot_2_2", "task_1_2_0_new"]
+    model.append_many([{"name": "task_1_2_0_empty"}], model.index(3, 0, model.index(0, 0)))
+    assert _shown_names() == ["seq_0", "shot_0_3", "task_1_2_0_empty", "seq_2", "shot_2_2", "task_1_2_0_new"]
+
+    proxy_model.setRecursiveFilteringEnabled(False)
+    assert not proxy_model.isRecursiveFilteringEnabled()
+    assert _shown_names() == []
+    proxy_model.setRecursiveFilteringEnabled(True)
+    proxy_model.set_search_pattern("")
+    assert len(_shown_names()) == 39 + 2
+
+
+def test_async_search(qtbot):
+    """Test the search runs in a worker thread above the threshold and its result is applied at once."""
+    model = MTableModel()
+    model.set_header_list(
+        [{"label": "Name", "key": "name", "searchable": True}, {"label": "Status", "key": "status", "searchable": True}]
+    )
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    proxy_model.set_async_filter_threshold(100)
+    model.set_data_list([{"name": "shot_{}".format(i), "status": "wip"} for i in range(200)])
+
+    with qtbot.waitSignal(proxy_model.sig_search_finished):
+        proxy_model.set_search_pattern("shot_1")
+        # 结果出来之前保持原来的行
+        assert proxy_model.is_searching()
+        assert proxy_model.rowCount() == 200
+    assert not proxy_model.is_searching()
+    assert proxy_model.rowCount() == 111
+
+    # 只应用最后一次的结果
+    with qtbot.waitSignal(proxy_model.sig_search_finished):
+        proxy_model.set_search_pattern("shot_10")
+        proxy_model.set_search_pattern("SHOT_19")
+    assert proxy_model.rowCount() == 11
+    assert proxy_model.search_reg.pattern == "SHOT_19"
+
+    # 结果应用以后的改动在 GUI 线程里增量处理
+    model.append_many([{"name": "shot_19x", "status": "wip"}, {"name": "asset", "status": "wip"}])
+    assert proxy_model.rowCount() == 12
+    model.remove_rows([19])
+    assert proxy_model.rowCount() == 11
+    model.setData(model.index(0, 0), "shot_195")
+    assert proxy_model.rowCount() == 12
+
+    # 搜索期间数据变了，用新的数据重新搜索
+    with qtbot.waitSignal(proxy_model.sig_search_finished):
+        proxy_model.set_search_pattern("wip")
+        model.setData(model.index(1, 1), "done")
+    assert proxy_model.rowCount() == 200
+
+    with qtbot.waitSignal(proxy_model.sig_search_finished):
+        model.set_data_list([{"name": "shot_{}".format(i), "status": "done"} for i in range(150)])
+        assert proxy_model.rowCount() == 0
+    assert proxy_model.rowCount() == 0
+
+    proxy_model.set_search_pattern("")
+    assert not proxy_model.is_searching()
+    assert proxy_model.rowCount() == 150
+    # 少于阈值时直接在 GUI 线程搜索
+    model.set_data_list([{"name": "shot_{}".format(i), "status": "wip"} for i in range(50)])
+    proxy_model.set_search_pattern("shot_1")
+    assert not proxy_model.is_searching()
+    assert proxy_model.rowCount() == 11
+
+
+def test_time_slice(qtbot):
+    """Test the search, the filtering and the sorting run in slices from the event loop with time_slice."""
+    model = MTableModel()
+    model.set_header_list([{"label": "Name", "key": "name", "searchable": True}, {"label": "Frame", "key": "frame"}])
+    model.set_data_list([{"name": "shot_{}".format(i), "frame": (i * 7) % 100} for i in range(1000)])
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    proxy_model.set_time_slice(1)
+
+    with qtbot.waitSignal(proxy_model.sig_search_finished):
+        proxy_model.set_search_pattern("shot_1")
+        assert proxy_model.is_searching()
+        assert proxy_model.rowCount() == 1000
+    assert not proxy_model.is_searching()
+    assert proxy_model.rowCount() == 111
+
+    # 新的搜索取消之前的搜索，数据变化后重新开始
+    with qtbot.waitSignal(proxy_model.sig_search_finished):
+        proxy_model.set_search_pattern("shot_2")
+        proxy_model.set_search_pattern("shot_99")
+        model.append({"name": "shot_99x", "frame": 0})
+    assert proxy_model.rowCount() == 12
+    # 清空搜索不用计算什么，马上重新筛选；筛选条件变化时先分段计算每一行的状态，再一次重新筛选
+    proxy_model.set_search_pattern("")
+    assert not proxy_model.is_searching()
+    assert not proxy_model.is_refiltering()
+    assert proxy_model.rowCount() == 1001
+    proxy_model.set_filter_attr_pattern("frame", "^0$")
+    assert proxy_model.is_refiltering()
+    assert proxy_model.rowCount() == 1001
+    qtbot.waitUntil(lambda: not proxy_model.is_refiltering())
+    assert proxy_model.rowCount() == 11
+    proxy_model.set_filter_attr_pattern("frame", "")
+    assert proxy_model.rowCount() == 1001
+
+    # 分段计算 key 的名次，最后代理自己排序一次，源模型不变，当前行跟着移动
+    layout_changes = []
+    proxy_model.layoutChanged.connect(lambda *args: layout_changes.append(args))
+    current_index = QtCore.QPersistentModelIndex(proxy_model.index(10, 0))
+    proxy_model.sort(1, QtCore.Qt.DescendingOrder)
+    assert proxy_model.is_sorting()
+    assert proxy_model.sortColumn() == -1
+    qtbot.waitUntil(lambda: not proxy_model.is_sorting())
+    assert len(layout_changes) == 1
+    assert proxy_model.sortColumn() == 1
+    assert proxy_model.sortOrder() == QtCore.Qt.DescendingOrder
+    frame_list = [proxy_model.index(row, 1).data(QtCore.Qt.EditRole) for row in range(proxy_model.rowCount())]
+    assert frame_list == sorted(frame_list, reverse=True)
+    # 相同的 key 保持源模型的顺序
+    assert [proxy_model.index(row, 0).data() for row in range(3)] == ["shot_57", "shot_157", "shot_257"]
+    assert current_index.data() == "shot_10"
+    assert [data_dict["name"] for data_dict in model.get_data_list()[:2]] == ["shot_0", "shot_1"]
+    with qtbot.waitSignal(proxy_model.sig_search_finished):
+        proxy_model.set_search_pattern("shot_99")
+    assert [proxy_model.index(row, 0).data() for row in range(proxy_model.rowCount())] == [
+        "shot_99",
+        "shot_999",
+        "shot_998",
+        "shot_997",
+        "shot_996",
+        "shot_995",
+        "shot_994",
+        "shot_993",
+        "shot_992",
+        "shot_991",
+        "shot_990",
+        "shot_99x",
+    ]
+
+    # 关闭后马上完成剩下的任务
+    proxy_model.sort(0)
+    proxy_model.set_time_slice(None)
+    assert not proxy_model.is_sorting()
+    assert proxy_model.sortColumn() == 0
+    assert [proxy_model.index(row, 0).data() for row in range(3)] == ["shot_99", "shot_990", "shot_991"]
+
+
+def test_time_slice_keeps_rows(qtbot):
+    """Test the sliced sorting never touches the source rows, so a large selection is kept, sort(-1) goes back."""
+    data_list = [{"name": "shot_{}".format(i), "frame": (i * 7) % 100} for i in range(3000)]
+    model = MTableModel()
+    model.set_header_list([{"label": "Name", "key": "name"}, {"label": "Frame", "key": "frame"}])
+    model.set_data_list(data_list)
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    proxy_model.set_time_slice(1)
+    selection_model = QtCore.QItemSelectionModel(proxy_model)
+    selection_model.select(
+        QtCore.QItemSelection(proxy_model.index(0, 0), proxy_model.index(2999, 1)), QtCore.QItemSelectionModel.Select
+    )
+    current_index = QtCore.QPersistentModelIndex(proxy_model.index(20, 0))
+    source_changes = []
+    for signal in (model.rowsRemoved, model.rowsInserted, model.layoutChanged, model.modelReset):
+        signal.connect(lambda *args: source_changes.append(args))
+
+    proxy_model.sort(1)
+    qtbot.waitUntil(lambda: not proxy_model.is_sorting())
+    assert source_changes == []
+    assert model.get_data_list() is data_list
+    assert len(selection_model.selectedRows()) == 3000
+    assert current_index.data() == "shot_20"
+    frame_list = [proxy_model.index(row, 1).data(QtCore.Qt.EditRole) for row in range(3000)]
+    assert frame_list == sorted(frame_list)
+
+    proxy_model.sort(0, QtCore.Qt.DescendingOrder)
+    qtbot.waitUntil(lambda: not proxy_model.is_sorting())
+    proxy_model.sort(-1)
+    assert not proxy_model.is_sorting()
+    assert [proxy_model.index(row, 0).data() for row in range(3)] == ["shot_0", "shot_1", "shot_2"]
+    assert current_index.row() == 20
+    assert len(selection_model.selectedRows()) == 3000
+
+
+def test_append_delay(qtbot):
+    """Test the rows given to append within the delay are inserted together, in the order they came in."""
+    model = _make_model([{"name": "row_{}".format(i), "age": i} for i in range(3)])
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.set_append_delay(0)
+    for age in (6, 4, 5):
+        model.append({"name": "new_{}".format(age), "age": age})
+    assert model.rowCount() == 3
+    qtbot.waitUntil(lambda: model.rowCount() == 6)
+    assert inserted == [(3, 5)]
+    assert [data_dict["name"] for data_dict in model.get_data_list()[3:]] == ["new_6", "new_4", "new_5"]
+    # append_many 先插入缓存的行
+    model.append({"name": "new_7", "age": 7})
+    model.append_many([{"name": "new_8", "age": 8}])
+    assert inserted[-1] == (6, 7)
+    assert [data_dict["name"] for data_dict in model.get_data_list()[6:]] == ["new_7", "new_8"]
+    model.append({"name": "new_1", "age": 1})
+    model.flush_appends()
+    assert model.rowCount() == 9
+    # 缓存的行属于旧的数据
+    model.append({"name": "new_2", "age": 2})
+    model.set_data_list([{"name": "row_0", "age": 0}])
+    model.set_append_delay(None)
+    assert model.rowCount() == 1
+    model.append({"name": "new_3", "age": 3})
+    assert model.rowCount() == 2
+
+
+def test_sorted_insert_under_proxy(qtbot):
+    """Test the rows streaming into the source model are ranked with a binary search by a MSortFilterModel."""
+    model = _make_model([{"name": "row_{}".format(i), "age": (i * 37) % 100} for i in range(100)])
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(
+        [{"label": "Name", "key": "name", "searchable": True}, {"label": "Age", "key": "age", "sort_key": "numeric"}]
+    )
+    proxy_model.set_time_slice(5)
+    proxy_model.sort(1, QtCore.Qt.DescendingOrder)
+    qtbot.waitUntil(lambda: not proxy_model.is_sorting())
+    proxy_inserted = []
+    proxy_model.rowsInserted.connect(lambda parent, first, last: proxy_inserted.append((first, last)))
+    computed = []
+    compute_sort_key = proxy_model._compute_sort_key
+
+    def _compute_sort_key(source_index):
+        computed.append(source_index.row())
+        return compute_sort_key(source_index)
+
+    proxy_model._compute_sort_key = _compute_sort_key
+
+    def _ages():
+        return [proxy_model.index(row, 1).data(QtCore.Qt.EditRole) for row in range(proxy_model.rowCount())]
+
+    model.append_many([{"name": "new_50", "age": 50}, {"name": "new_none", "age": None}])
+    assert proxy_inserted == [(100, 100), (50, 50)]
+    # 只计算新的行的 key，已有的行比较名次
+    assert sorted(computed) == [100, 101]
+    age_list = _ages()
+    assert age_list[:-1] == sorted(age_list[:-1], reverse=True)
+    assert age_list[-1] is None
+    assert proxy_model.index(50, 0).data() == "new_50"
+    # 源模型的行还是追加在最后
+    assert [data_dict["name"] for data_dict in model.get_data_list()[-2:]] == ["new_50", "new_none"]
+
+    # 排序时没有的 key 落在两个名次之间，它们之间再比较 key
+    model.append_many([{"name": "new_50.2", "age": 50.2}, {"name": "new_50.5", "age": 50.5}])
+    assert [proxy_model.index(row, 0).data() for row in range(48, 53)] == [
+        "row_23",
+        "new_50.5",
+        "new_50.2",
+        "row_50",
+        "new_50",
+    ]
+    model.setData(model.index(0, 1), 99.5)
+    assert proxy_model.index(0, 0).data() == "row_0"
+    model.remove(model.get_data_list()[50])
+    age_list = _ages()
+    assert age_list[:-1] == sorted(age_list[:-1], reverse=True)
+    assert len(age_list) == 103
+
+
+def test_sort_key(qtbot):
+    """Test the sort_key of header_list and the sort key cache."""
+    call_list = []
+
+    def _display(value, data_obj):
+        call_list.append(value)
+        return value
+
+    model = MTableModel()
+    model.set_header_list(
+        [
+            {"label": "Name", "key": "name", "display": _display},
+            {"label": "Shot", "key": "name", "sort_key": "natural"},
+            {"label": "Size", "key": "size", "sort_key": "numeric"},
+            {"label": "Date", "key": "date", "sort_key": "date"},
+            {"label": "Length", "key": "name", "sort_key": len},
+        ]
+    )
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    model.set_data_list(
+        [
+            {"name": "shot_10", "size": "1,024", "date": "2020-03-01"},
+            {"name": "shot_2", "size": "9.5", "date": None},
+            {"name": "shot_100", "size": None, "date": "2019-12-31T23:00:00"},
+            {"name": "shot_1", "size": 100, "date": "2020-01-15"},
+        ]
+    )
+
+    def _sorted_names(column, order=QtCore.Qt.AscendingOrder):
+        proxy_model.sort(column, order)
+        return [proxy_model.index(row, 0).data(QtCore.Qt.EditRole) for row in range(proxy_model.rowCount())]
+
+    assert _sorted_names(0) == ["shot_1", "shot_10", "shot_100", "shot_2"]
+    assert len(call_list) == 4
+    # 再次排序使用缓存，不再调用 formatter
+    del call_list[:]
+    assert _sorted_names(0, QtCore.Qt.DescendingOrder) == ["shot_2", "shot_100", "shot_10", "shot_1"]
+    assert call_list == []
+    assert _sorted_names(1) == ["shot_1", "shot_2", "shot_10", "shot_100"]
+    # 空值排在最前
+    assert _sorted_names(2) == ["shot_100", "shot_2", "shot_1", "shot_10"]
+    assert _sorted_names(3) == ["shot_2", "shot_100", "shot_1", "shot_10"]
+    assert _sorted_names(4) == ["shot_2", "shot_1", "shot_10", "shot_100"]
+
+    # 数据变化以后重新计算
+    model.setData(model.index(1, 2), "1e9")
+    assert _sorted_names(2) == ["shot_100", "shot_1", "shot_10", "shot_2"]
+    model.append({"name": "shot_05", "size": 0, "date": "2021-01-01"})
+    assert _sorted_names(1) == ["shot_1", "shot_2", "shot_05", "shot_10", "shot_100"]
+    model.remove_rows([0])
+    assert _sorted_names(2) == ["shot_100", "shot_05", "shot_1", "shot_2"]
+
+    proxy_model.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)
+    assert proxy_model._sort_keys == {}
+
+    with pytest.raises(ValueError):
+        proxy_model.set_header_list([{"label": "Name", "key": "name", "sort_key": "unknown"}])
+
+
+def test_facet_filter(qtbot):
+    """Test the facets of the default_filter columns filter the top level rows and follow the source changes."""
+    model = MTableModel()
+    model.set_header_list(
+        [
+            {"label": "Name", "key": "name", "searchable": True},
+            {"label": "Status", "key": "status", "default_filter": True},
+            {"label": "Dept", "key": "dept", "default_filter": True},
+        ]
+    )
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    model.set_data_list(
+        [
+            {"name": "shot_{}".format(i), "status": ("wip", "done", "review")[i % 3], "dept": ("anim", "comp")[i % 2]}
+            for i in range(12)
+        ]
+    )
+    assert proxy_model.get_facet_keys() == ["status", "dept"]
+    assert proxy_model.get_facet_counts("status") == {"done": 4, "review": 4, "wip": 4}
+
+    with qtbot.waitSignal(proxy_model.sig_facet_changed):
+        proxy_model.set_facet_values("status", ["wip", "done"])
+    assert proxy_model.rowCount() == 8
+    proxy_model.set_facet_values("dept", ["comp"])
+    # shot_1 shot_3 shot_7 shot_9
+    assert proxy_model.rowCount() == 4
+    assert proxy_model.get_facet_counts("dept") == {"anim": 4, "comp": 4}
+    assert proxy_model.get_facet_counts("status") == {"done": 2, "review": 2, "wip": 2}
+    proxy_model.set_search_pattern("shot_1")
+    assert proxy_model.rowCount() == 1
+    proxy_model.set_search_pattern("")
+
+    with qtbot.waitSignal(proxy_model.sig_facet_changed):
+        model.append_many([{"name": "new_1", "status": "wip", "dept": "comp"}, {"name": "new_2", "status": "wip"}])
+    assert proxy_model.rowCount() == 5
+    model.setData(model.index(1, 0), "shot_1_omit")
+    model.get_data_list()[1]["status"] = "omit"
+    model.dataChanged.emit(model.index(1, 0), model.index(1, 2))
+    assert proxy_model.rowCount() == 4
+    assert proxy_model.get_facet_counts("status")["omit"] == 1
+    model.remove_rows([3])
+    assert proxy_model.rowCount() == 3
+    assert sorted(proxy_model.index(row, 0).data() for row in range(3)) == ["new_1", "shot_7", "shot_9"]
+
+    model.set_data_list([{"name": "a", "status": "wip", "dept": "comp"}, {"name": "b", "status": "wip", "dept": "fx"}])
+    assert proxy_model.rowCount() == 1
+    proxy_model.set_facet_values("dept", [])
+    proxy_model.set_facet_values("status", [])
+    assert proxy_model.rowCount() == 2
+    with pytest.raises(ValueError):
+        proxy_model.set_facet_values("name", ["a"])
+
+    # 分面筛选掉的行没有搜索过，逐步输入的搜索结果不能复用
+    model.set_data_list(
+        [
+            {"name": "shot_a", "status": "wip", "dept": "anim"},
+            {"name": "shot_b", "status": "wip", "dept": "comp"},
+            {"name": "shot_c", "status": "wip", "dept": "comp"},
+        ]
+    )
+    proxy_model.set_facet_values("dept", ["anim"])
+    proxy_model.set_search_pattern("sh")
+    assert proxy_model.rowCount() == 1
+    proxy_model.set_search_pattern("sho")
+    assert proxy_model.rowCount() == 1
+    proxy_model.set_facet_values("dept", [])
+    assert proxy_model.rowCount() == 3
+    proxy_model.set_search_pattern("sh")
+    assert proxy_model.rowCount() == 3
+
+
+def test_fuzzy_search(qtbot):
+    """Test the fuzzy search finds names with typos, ranks them by score and follows the source changes."""
+    model = MTableModel()
+    model.set_header_list(
+        [{"label": "Name", "key": "name", "searchable": True}, {"label": "Step", "key": "step", "searchable": True}]
+    )
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    proxy_model.set_header_list(model.header_list)
+    model.set_data_list(
+        [
+            {"name": "chr_knight", "step": "mdl"},
+            {"name": "chr_dragon", "step": "rig"},
+            {"name": "env_castle", "step": "mdl"},
+            {"name": "prp_dragon_egg", "step": "tex"},
+            {"name": "chr_dragonfly", "step": "rig", "children": [{"name": "dragon_wing", "step": "rig"}]},
+        ]
+    )
+
+    def _names():
+        return [proxy_model.index(row, 0).data() for row in range(proxy_model.rowCount())]
+
+    proxy_model.set_search_pattern("dargon rig")
+    assert proxy_model.rowCount() == 0
+    proxy_model.set_fuzzy_search(True, sort_by_score=True)
+    assert _names() == ["chr_dragon", "chr_dragonfly"]
+    assert [row for row, score in proxy_model.get_fuzzy_matches()] == [1, 4]
+    assert proxy_model.get_fuzzy_matches(limit=1) == [(1, pytest.approx(7 / 11.0))]
+    dragonfly_index = proxy_model.index(1, 0)
+    assert proxy_model.rowCount(dragonfly_index) == 1
+
+    model.setData(model.index(0, 0), "chr_dragon_knight")
+    model.append({"name": "chr_dragon_rig", "step": "rig"})
+    # 分数相同的行保持原来的顺序
+    assert _names() == ["chr_dragon", "chr_dragon_rig", "chr_dragonfly"]
+    model.remove_rows([1])
+    model.update_data_list(list(reversed(model.get_data_list())), key="name")
+    assert _names() == ["chr_dragon_rig", "chr_dragonfly"]
+    proxy_model.set_search_pattern("dragon rig")
+    assert _names() == ["chr_dragon_rig", "chr_dragonfly", "prp_dragon_egg", "chr_dragon_knight"]
+    assert proxy_model.get_fuzzy_matches()[0] == (0, 1.0)
+
+    proxy_model.set_search_pattern("")
+    assert proxy_model.sortColumn() == -1
+    assert _names() == ["chr_dragon_rig", "chr_dragonfly", "prp_dragon_egg", "env_castle", "chr_dragon_knight"]
+    proxy_model.set_fuzzy_search(False)
+    proxy_model.set_search_pattern("dragon_")
+    # chr_dragonfly 的子节点 dragon_wing 匹配
+    assert _names() == ["chr_dragon_rig", "chr_dragonfly", "prp_dragon_egg", "chr_dragon_knight"]
@@ -0,0 +1,112 @@
+"""
+Test the empty state of the item views
+"""
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from dayu_widgets import dayu_theme
+from dayu_widgets import item_view
+from dayu_widgets.item_model import MSortFilterModel
+from dayu_widgets.item_model import MTableModel
+from dayu_widgets.item_view import MBigView
+from dayu_widgets.item_view import MListView
+from dayu_widgets.item_view import MTableView
+from dayu_widgets.item_view import MTreeView
+
+
+HEADER_LIST = [{"label": "Name", "key": "name"}]
+
+
+@pytest.fixture
+def paint_calls(monkeypatch):
+    calls = []
+    paint_empty_content = item_view._paint_empty_content
+
+    def _paint(*args):
+        calls.append(args[1:3])
+        return paint_empty_content(*args)
+
+    monkeypatch.setattr(item_view, "_paint_empty_content", _paint)
+    return calls
+
+
+@pytest.mark.parametrize("view_class", [MTableView, MTreeView, MListView, MBigView])
+def test_empty_state_from_model_signals(qtbot, paint_calls, view_class):
+    """Test the emptiness follows the signals of the source model behind a proxy model."""
+    view = view_class()
+    qtbot.addWidget(view)
+    assert view._is_empty
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    proxy_model = MSortFilterModel()
+    view.setModel(proxy_model)
+    assert view._is_empty
+    proxy_model.setSourceModel(model)
+    model.append({"name": "a"})
+    assert not view._is_empty
+    view.grab()
+    assert paint_calls == []
+    model.remove(model.get_data_list()[0])
+    assert view._is_empty
+    model.set_data_list([{"name": "b"}])
+    assert not view._is_empty
+
+    # 筛选掉所有的行也是空的
+    model.append({"name": "c"})
+    proxy_model.set_search_pattern("x")
+    assert view._is_empty
+    proxy_model.set_search_pattern("")
+    assert not view._is_empty
+
+    view.setModel(None)
+    assert view._is_empty
+    model.set_data_list([])
+    model.append({"name": "c"})
+    assert view._is_empty
+
+
+def test_empty_state_source_model_changed(qtbot):
+    """Test the emptiness follows the rows of the view when the proxy model gets another kind of source model."""
+    pytest.importorskip("numpy")
+    # Import local modules
+    from dayu_widgets.columnar_model import MColumnarTableModel
+
+    view = MTableView()
+    qtbot.addWidget(view)
+    model = MTableModel()
+    model.set_header_list(HEADER_LIST)
+    model.set_data_list([{"name": "a"}])
+    proxy_model = MSortFilterModel()
+    proxy_model.setSourceModel(model)
+    view.setModel(proxy_model)
+    assert not view._is_empty
+    columnar_model = MColumnarTableModel()
+    columnar_model.set_header_list(HEADER_LIST)
+    proxy_model.setSourceModel(columnar_model)
+    assert view._is_empty
+    columnar_model.set_data_list([{"name": "b"}])
+    assert not view._is_empty
+
+
+def test_empty_state_pixmap_cached(qtbot, paint_calls, monkeypatch):
+    """Test the empty content is rendered once, again when the size, the text or the theme changes."""
+    view = MTableView()
+    qtbot.addWidget(view)
+    view.resize(300, 200)
+    view.show()
+    view.grab()
+    view.grab()
+    assert len(paint_calls) == 1
+    view.resize(400, 300)
+    view.grab()
+    assert len(paint_calls) == 2
+    assert paint_calls[-1] == (view.viewport().width(), view.viewport().height())
+    view.set_no_data_text("Nothing")
+    view.grab()
+    assert len(paint_calls) == 3
+    monkeypatch.setattr(dayu_theme, "secondary_text_color", "#123456")
+    view.grab()
+    view.grab()
+    assert len(paint_calls) == 4
@@ -0,0 +1,117 @@
+"""Test the page providers and MPageLoader"""
+
+# Import built-in modules
+import sqlite3
+import threading
+
+# Import third-party modules
+from qtpy import QtCore
+
+# Import local modules
+from dayu_widgets.page_provider import MListPageProvider
+from dayu_widgets.page_provider import MPageLoader
+from dayu_widgets.page_provider import MSqlitePageProvider
+
+
+def _make_rows(count):
+    return [{"id": i, "name": "item_{:03d}".format(i), "age": i % 7} for i in range(count)]
+
+
+def test_list_page_provider():
+    """Test MListPageProvider pages, sorts and filters."""
+    provider = MListPageProvider(_make_rows(100), search_keys=["name"])
+    rows, total = provider.fetch(20, 10)
+    assert total == 100
+    assert [row["id"] for row in rows] == list(range(20, 30))
+
+    rows, total = provider.fetch(0, 3, sort=("id", QtCore.Qt.DescendingOrder))
+    assert [row["id"] for row in rows] == [99, 98, 97]
+
+    rows, total = provider.fetch(0, 50, filter="ITEM_01")
+    assert total == 10
+    assert rows[0]["name"] == "item_010"
+
+
+def test_sqlite_page_provider(tmp_path):
+    """Test MSqlitePageProvider gives the same pages as the list provider."""
+    database = str(tmp_path / "test.db")
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE job (id INTEGER, name TEXT, age INTEGER)")
+    connection.executemany("INSERT INTO job VALUES (:id, :name, :age)", _make_rows(100))
+    connection.commit()
+    connection.close()
+
+    provider = MSqlitePageProvider(database, "job", search_keys=["name"])
+    list_provider = MListPageProvider(_make_rows(100), search_keys=["name"])
+    for args in [
+        (20, 10, None, None),
+        (0, 5, ("id", QtCore.Qt.DescendingOrder), None),
+        (5, 5, ("id", QtCore.Qt.AscendingOrder), "item_0"),
+        # LIKE 的通配符按原样查找
+        (0, 5, None, "%"),
+        (0, 5, None, "m_0%"),
+        (0, 5, None, "m%0"),
+    ]:
+        assert provider.fetch(*args) == list_provider.fetch(*args)
+    # 不存在的列不会拼进 SQL
+    _, total = provider.fetch(0, 2, sort=('id"; DROP TABLE job; --', QtCore.Qt.AscendingOrder))
+    assert total == 100
+
+
+def test_page_loader_cache_and_prefetch(qtbot):
+    """Test MPageLoader shows prefetched pages at once and keeps a bounded cache."""
+    loader = MPageLoader(MListPageProvider(_make_rows(100)), cache_size=3)
+    page_list = []
+    loader.sig_page_loaded.connect(lambda rows, total: page_list.append((rows[0]["id"], total)))
+
+    with qtbot.waitSignal(loader.sig_page_loaded, timeout=5000):
+        loader.set_page(1, 10)
+    assert page_list == [(0, 100)]
+
+    # 第二页已经在后台预取了，翻页时同步显示
+    qtbot.waitUntil(lambda: (2, 10, None, None) in loader.cached_pages(), timeout=5000)
+    loader.set_page(2)
+    assert page_list[-1] == (10, 100)
+
+    for page in (3, 4, 5):
+        with qtbot.waitSignal(loader.sig_page_loaded, timeout=5000):
+            loader.set_page(page)
+        qtbot.waitUntil(lambda page=page: (page + 1, 10, None, None) in loader.cached_pages(), timeout=5000)
+        assert len(loader.cached_pages()) <= 3
+    assert page_list[-1] == (40, 100)
+
+    with qtbot.waitSignal(loader.sig_page_loaded, timeout=5000):
+        loader.set_sort("id", QtCore.Qt.DescendingOrder)
+    assert page_list[-1] == (99, 100)
+
+
+class _BlockingProvider(MListPageProvider):
+    def __init__(self, data_list):
+        super(_BlockingProvider, self).__init__(data_list)
+        self.event = threading.Event()
+
+    def fetch(self, offset, limit, sort=None, filter=None):
+        self.event.wait(5)
+        return super(_BlockingProvider, self).fetch(offset, limit, sort, filter)
+
+
+def test_page_loader_provider_swap(qtbot):
+    """Test a page still loading from the old provider is not shown after set_provider."""
+    old_provider = _BlockingProvider([{"id": "old"}])
+    new_provider = _BlockingProvider([{"id": "new"}])
+    thread_pool = QtCore.QThreadPool()
+    thread_pool.setMaxThreadCount(2)
+    loader = MPageLoader(old_provider, thread_pool=thread_pool)
+    page_list = []
+    loader.sig_page_loaded.connect(lambda rows, total: page_list.append(rows[0]["id"]))
+    loader.set_page(1)
+    loader.set_provider(new_provider)
+    loader.set_page(1)
+    # 旧的请求先返回，和新的请求的 page_key 一样
+    old_provider.event.set()
+    qtbot.wait(200)
+    assert page_list == []
+    with qtbot.waitSignal(loader.sig_page_loaded, timeout=5000):
+        new_provider.event.set()
+    assert page_list == ["new"]
+    thread_pool.waitForDone()
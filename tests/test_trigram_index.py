@@ -0,0 +1,117 @@
+"""
+Test MTrigramIndex
+"""
+
+# Import built-in modules
+import random
+
+# Import third-party modules
+import pytest
+
+# Import local modules
+from dayu_widgets.trigram_index import MTrigramIndex
+from dayu_widgets.trigram_index import MTrigramPattern
+from dayu_widgets.trigram_index import get_trigrams
+
+
+def _brute_force(texts, pattern):
+    pattern = MTrigramPattern(pattern)
+    return sorted(
+        ((row, pattern.similarity(text)) for row, text in enumerate(texts) if pattern.match(text)),
+        key=lambda item: -item[1],
+    )
+
+
+def test_trigrams():
+    """Test the words are lowercased and padded, underscores separate words."""
+    assert get_trigrams("Rig") == {"  r", " ri", "rig", "ig "}
+    assert get_trigrams("a_b") == {"  a", " a ", "  b", " b "}
+    assert get_trigrams("") == frozenset()
+    assert get_trigrams("__") == frozenset()
+
+
+@pytest.mark.parametrize(
+    "pattern, text, similarity",
+    (
+        ("dragon", "chr_dragon_rig", 1.0),
+        ("dragn", "chr_dragon_rig", 4 / 6.0),
+        ("dragon", "chr_knight_rig", 0.0),
+        ("dragon", None, 0.0),
+        ("__", "chr_dragon_rig", 0.0),
+    ),
+)
+def test_pattern_similarity(pattern, text, similarity):
+    """Test the similarity is the part of the trigrams of the pattern in the text."""
+    assert MTrigramPattern(pattern).similarity(text) == pytest.approx(similarity)
+
+
+def test_trigram_index_search():
+    """Test the search gives the same rows and scores as matching every text, ranked by score."""
+    texts = ["chr_dragon_rig", "chr_dargon_mdl", "env_castle", "prp_dragon_egg", None, "chr_drake_rig"]
+    trigram_index = MTrigramIndex()
+    trigram_index.rebuild(texts)
+    for pattern in ("dragon", "dragn rig", "castel", "zzz", ""):
+        matches = trigram_index.search(pattern)
+        expected = _brute_force(texts, pattern)
+        assert matches.ranked() == expected
+        assert len(matches) == len(expected)
+        for row, text in enumerate(texts):
+            assert matches.contains(row) == MTrigramPattern(pattern).match(text)
+    assert trigram_index.search("dragon rig").ranked(limit=1) == [(0, 1.0)]
+
+
+def test_trigram_index_incremental():
+    """Test inserting, removing, moving and changing rows gives the same result as indexing again."""
+    random.seed(0)
+    word_list = ["dragon", "knight", "castle", "rig", "mdl", "tex", "v001", "v002"]
+
+    def make_text():
+        return "_".join(random.choice(word_list) for _ in range(3))
+
+    texts = [make_text() for _ in range(600)]
+    trigram_index = MTrigramIndex()
+    trigram_index.rebuild(texts)
+    # 先搜索一次，让常见 trigram 的 bitset 被缓存，之后要随数据更新
+    trigram_index.search("dragon castle")
+    for _ in range(30):
+        action = random.choice(("insert", "remove", "move", "update"))
+        first = random.randrange(len(texts))
+        last = min(len(texts) - 1, first + random.randrange(3))
+        if action == "insert":
+            new_texts = [make_text() for _ in range(random.randrange(1, 5))]
+            texts[first:first] = new_texts
+            trigram_index.insert_rows(first, new_texts)
+        elif action == "remove":
+            del texts[first : last + 1]
+            trigram_index.remove_rows(first, last)
+        elif action == "move":
+            dest_row = random.randrange(len(texts) + 1)
+            if first <= dest_row <= last + 1:
+                continue
+            moved = texts[first : last + 1]
+            del texts[first : last + 1]
+            texts[dest_row - len(moved) if dest_row > last else dest_row : 0] = moved
+            trigram_index.move_rows(first, last, dest_row)
+        else:
+            new_texts = [make_text() for _ in range(last - first + 1)]
+            texts[first : last + 1] = new_texts
+            trigram_index.update_rows(first, new_texts)
+        assert len(trigram_index) == len(texts)
+        for pattern in ("dragon castle", "knigt v002"):
+            ranked = trigram_index.search(pattern).ranked()
+            assert sorted(ranked) == sorted(_brute_force(texts, pattern))
+
+
+def test_trigram_index_renumber():
+    """Test the ids are given again when many rows were removed, so they don't grow with every insert."""
+    trigram_index = MTrigramIndex()
+    trigram_index.rebuild(["chr_dragon_rig", "env_castle"])
+    texts = ["chr_dragon_rig", "env_castle"]
+    for step in range(100):
+        text = "prp_dragon_{}".format(step)
+        trigram_index.insert_rows(1, [text])
+        texts[1:1] = [text]
+        trigram_index.remove_rows(2, 2)
+        del texts[2]
+    assert trigram_index._next_id <= 2 * len(texts) + 1
+    assert sorted(trigram_index.search("dragon rig").ranked()) == sorted(_brute_force(texts, "dragon rig"))
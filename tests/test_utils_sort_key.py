@@ -0,0 +1,69 @@
+"""
+Test natural_sort_key numeric_sort_key date_sort_key
+"""
+
+# Import built-in modules
+import datetime
+
+# Import third-party modules
+import pytest
+from qtpy import QtCore
+
+# Import local modules
+from dayu_widgets import utils
+
+
+def test_natural_sort_key():
+    """Test the numbers in the text are compared by value."""
+    value_list = ["shot_10", "Shot_2", "shot_1b", "shot_1", "asset", "shot_100", "10", "9"]
+    assert sorted(value_list, key=utils.natural_sort_key) == [
+        "9",
+        "10",
+        "asset",
+        "shot_1",
+        "shot_1b",
+        "Shot_2",
+        "shot_10",
+        "shot_100",
+    ]
+
+
+@pytest.mark.parametrize(
+    "input_value, result",
+    (
+        (3, 3.0),
+        (-1.5, -1.5),
+        (" 1,024.5 ", 1024.5),
+        ("1e3", 1000.0),
+        ("12 MB", None),
+        ("", None),
+        (None, None),
+        (float("nan"), None),
+        ([1], None),
+    ),
+)
+def test_numeric_sort_key(input_value, result):
+    """Test numbers and numeric text are converted to float."""
+    assert utils.numeric_sort_key(input_value) == result
+
+
+@pytest.mark.parametrize(
+    "input_value",
+    (
+        datetime.datetime(2020, 1, 2),
+        datetime.date(2020, 1, 2),
+        "2020-01-02",
+        "2020-01-02T00:00:00",
+        QtCore.QDate(2020, 1, 2),
+        QtCore.QDateTime(QtCore.QDate(2020, 1, 2), QtCore.QTime(0, 0)),
+    ),
+)
+def test_date_sort_key(input_value):
+    """Test all kinds of date value give the same timestamp."""
+    assert utils.date_sort_key(input_value) == datetime.datetime(2020, 1, 2).timestamp()
+
+
+@pytest.mark.parametrize("input_value", (None, "", "not a date", "2020-13-01", QtCore.QDate(), True, [2020]))
+def test_date_sort_key_invalid(input_value):
+    """Test invalid dates give None."""
+    assert utils.date_sort_key(input_value) is None